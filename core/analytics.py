@@ -0,0 +1,309 @@
+# core/analytics.py
+"""
+答题历史的统计查询：按 case / (pll, state) / pll / state / color 分组汇总，
+或按天、按周看趋势；可以只看最近一天、一周。
+
+记录按块流式读入（AttemptLog / SqliteLog 的 iter_chunks），每块用 bincount 累加到
+每组的计数、用时之和和用时直方图上，内存只和分组数有关，与记录条数无关。
+分位数从直方图读出，精度为 HIST_BIN 秒；时间分桶的组数可能上万，直方图只存非零格。
+
+    from core import analytics
+    t = analytics.query(by='pll', window='week')
+    for row in t.rows():
+        print(row['label'], row['n'], row['accuracy'], row['p50'])
+
+命令行导出：
+    python -m core.analytics --by key --window week
+    python -m core.analytics --trend day --window all --csv trend.csv
+"""
+
+import argparse
+import csv
+import sys
+import time
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+import numpy as np
+
+from core import cases
+from core import config as cfg
+
+WINDOWS: Dict[str, Optional[float]] = {'day': 86400.0, 'week': 7 * 86400.0, 'all': None}
+BUCKETS: Dict[str, float] = {'hour': 3600.0, 'day': 86400.0, 'week': 7 * 86400.0}
+GROUPS = ('case', 'key', 'pll', 'state', 'color')
+
+HIST_BIN = 0.01         # 秒：分位数精度
+HIST_MAX = 30.0         # 超过的用时都落在最后一格
+_N_BINS = int(HIST_MAX / HIST_BIN) + 1
+
+
+class Table(NamedTuple):
+    """一次查询的结果，每组一行（数组按组下标排列）"""
+    labels: List[str]
+    n: np.ndarray           # 记录条数
+    correct: np.ndarray     # 正确条数
+    accuracy: np.ndarray    # 正确率，无记录为 0
+    mean: np.ndarray        # 正确记录的平均用时，无记录为 0
+    p50: np.ndarray         # 正确记录用时的中位数
+    p90: np.ndarray
+
+    def rows(self, empty: bool = False) -> List[dict]:
+        """每组一个 dict，默认跳过没有记录的组；导出 CSV / 给界面用"""
+        out = []
+        for i, label in enumerate(self.labels):
+            if self.n[i] or empty:
+                out.append(dict(label=label, n=int(self.n[i]), correct=int(self.correct[i]),
+                                accuracy=round(float(self.accuracy[i]), 4),
+                                mean=round(float(self.mean[i]), 3),
+                                p50=round(float(self.p50[i]), 2),
+                                p90=round(float(self.p90[i]), 2)))
+        return out
+
+
+# ---------- 累加器 ----------
+class Aggregate:
+    """
+    一种分组方式的累加器：feed() 一块一块喂 DTYPE 记录，table() 随时出结果。
+    by 为 GROUPS 之一，或 BUCKETS 之一（按时间分桶看趋势）；
+    since / until 为墙钟时间范围，pll / state / color 只统计指定的那部分。
+    没有颜色的旧记录（color = 0）不计入 case / color 分组。
+    时间分桶的起点取 since 所在那天的零点；没有 since 时由 origin 给出（query 先扫一遍
+    取最早的时间），都没有则取第一块里最早的记录，之后更早的记录不计入。
+    """
+
+    def __init__(self, by: str = 'key', since: float = None, until: float = None,
+                 pll: str = None, state: int = None, color: int = None,
+                 origin: float = None):
+        if by not in GROUPS and by not in BUCKETS:
+            raise ValueError(f"未知的分组方式：{by}")
+        if pll is not None and pll not in cfg.PLL_NAMES:
+            raise ValueError(f"未知的 PLL：{pll}（可选 {', '.join(cfg.PLL_NAMES)}）")
+        self.by = by
+        self.since, self.until = since, until
+        self.pll = cfg.PLL_NAMES.index(pll) if pll is not None else None
+        self.state, self.color = state, color
+        self.origin: Optional[float] = None     # 时间分桶的起点（本地零点）
+        if by in BUCKETS:
+            start = since if since is not None else origin
+            if start is not None:
+                self.origin = _midnight(start)
+        size = {'case': cases.N_CASES, 'key': cases.N_KEYS, 'pll': len(cfg.PLL_NAMES),
+                'state': cases.N_STATES, 'color': cases.N_COLORS}.get(by, 0)
+        self.n = np.zeros(size, dtype=np.int64)
+        self.correct = np.zeros(size, dtype=np.int64)
+        self.total = np.zeros(size)
+        # 分组：稠密直方图 (组, 格)；时间分桶：只存非零格，_codes 为升序的 组 * _N_BINS + 格
+        self.hist = np.zeros((size, _N_BINS), dtype=np.int64) if by in GROUPS else None
+        self._codes = np.zeros(0, dtype=np.int64)
+        self._counts = np.zeros(0, dtype=np.int64)
+
+    def _groups(self, arr: np.ndarray) -> np.ndarray:
+        """每条记录的组下标，不参与统计的为 -1"""
+        pll = arr['pll'].astype(np.int64)
+        state = arr['state'].astype(np.int64) - 1
+        color = arr['color'].astype(np.int64) - 1
+        ts = arr['ts']
+        keep = (state >= 0) & (state < cases.N_STATES) & (pll < len(cfg.PLL_NAMES))
+        if self.since is not None:
+            keep &= ts >= self.since
+        if self.until is not None:
+            keep &= ts < self.until
+        if self.pll is not None:
+            keep &= pll == self.pll
+        if self.state is not None:
+            keep &= state == self.state - 1
+        if self.color is not None:
+            keep &= color == self.color - 1
+
+        if self.by == 'case':
+            keep &= color >= 0
+            g = (pll * cases.N_STATES + state) * cases.N_COLORS + color
+        elif self.by == 'key':
+            g = pll * cases.N_STATES + state
+        elif self.by == 'pll':
+            g = pll
+        elif self.by == 'state':
+            g = state
+        elif self.by == 'color':
+            keep &= color >= 0
+            g = color
+        else:
+            keep &= ts > 0              # 旧版导入的记录没有时间
+            if self.origin is None and keep.any():
+                self.origin = _midnight(float(ts[keep].min()))
+            g = np.floor((ts - (self.origin or 0.0)) / BUCKETS[self.by]).astype(np.int64)
+            keep &= g >= 0
+        return np.where(keep, g, -1)
+
+    def _grow(self, size: int):
+        """时间分桶的组数事先不知道，按需加长（至少翻倍，table() 时再截掉空尾）"""
+        extra = max(size, 2 * len(self.n)) - len(self.n)
+        self.n = np.concatenate([self.n, np.zeros(extra, dtype=np.int64)])
+        self.correct = np.concatenate([self.correct, np.zeros(extra, dtype=np.int64)])
+        self.total = np.concatenate([self.total, np.zeros(extra)])
+
+    def feed(self, arr: np.ndarray) -> 'Aggregate':
+        g = self._groups(arr)
+        valid = g >= 0
+        g = g[valid]
+        if not len(g):
+            return self
+        size = len(self.n)
+        if g.max() >= size:
+            self._grow(int(g.max()) + 1)
+            size = len(self.n)
+        ok = arr['ok'][valid] != 0
+        t = arr['time'][valid].astype(float)
+        g_ok, t_ok = g[ok], t[ok]
+        self.n += np.bincount(g, minlength=size)
+        self.correct += np.bincount(g_ok, minlength=size)
+        self.total += np.bincount(g_ok, weights=t_ok, minlength=size)
+        bins = np.minimum((t_ok / HIST_BIN).astype(np.int64), _N_BINS - 1)
+        if self.hist is not None:
+            self.hist += np.bincount(g_ok * _N_BINS + bins,
+                                     minlength=size * _N_BINS).reshape(size, _N_BINS)
+        else:
+            codes, inv = np.unique(np.concatenate([self._codes, g_ok * _N_BINS + bins]),
+                                   return_inverse=True)
+            weights = np.concatenate([self._counts, np.ones(len(g_ok), dtype=np.int64)])
+            self._codes = codes
+            self._counts = np.bincount(inv.ravel(), weights=weights,
+                                       minlength=len(codes)).astype(np.int64)
+        return self
+
+    # ---------- 结果 ----------
+    def percentile(self, q: float) -> np.ndarray:
+        """每组正确记录用时的 q 分位（0..100），取所在直方图格的中点；无记录为 0"""
+        target = np.maximum(np.ceil(self.correct * q / 100.0), 1)
+        if self.hist is not None:
+            cum = self.hist.cumsum(axis=1)
+            idx = (cum < target[:, None]).sum(axis=1)
+            return np.where(self.correct > 0,
+                            (np.minimum(idx, _N_BINS - 1) + 0.5) * HIST_BIN, 0.0)
+        out = np.zeros(len(self.n))
+        codes, counts = self._codes, self._counts
+        if not len(codes):
+            return out
+        g, bins = np.divmod(codes, _N_BINS)
+        # 同组的格按格号连续排列：组内累计 = 全局累计 - 该组之前的累计
+        cum = counts.cumsum()
+        first = np.flatnonzero(np.r_[True, g[1:] != g[:-1]])
+        base = np.repeat(cum[first] - counts[first], np.diff(np.r_[first, len(g)]))
+        hit = cum - base >= target[g]
+        groups, at = np.unique(g[hit], return_index=True)     # 每组第一个够数的格
+        out[groups] = (bins[hit][at] + 0.5) * HIST_BIN
+        return out
+
+    def labels(self) -> List[str]:
+        if self.by == 'case':
+            return [f"{c.pll}-{c.state}-{c.color}" for c in cases.CASES]
+        if self.by == 'key':
+            return [c.label for c in cases.key_cases()]
+        if self.by == 'pll':
+            return list(cfg.PLL_NAMES)
+        if self.by in ('state', 'color'):
+            return [str(i + 1) for i in range(len(self.n))]
+        fmt = '%Y-%m-%d %H:00' if self.by == 'hour' else '%Y-%m-%d'
+        step = BUCKETS[self.by]
+        return [time.strftime(fmt, time.localtime((self.origin or 0.0) + i * step))
+                for i in range(len(self.n))]
+
+    def table(self) -> Table:
+        if self.hist is None:           # 时间分桶：去掉 _grow 多留的空尾
+            used = np.flatnonzero(self.n)
+            size = int(used[-1]) + 1 if len(used) else 0
+            self.n, self.correct, self.total = \
+                self.n[:size], self.correct[:size], self.total[:size]
+        safe = np.maximum(self.n, 1)
+        return Table(self.labels(), self.n.copy(), self.correct.copy(),
+                     self.correct / safe,
+                     np.where(self.correct > 0, self.total / np.maximum(self.correct, 1), 0.0),
+                     self.percentile(50), self.percentile(90))
+
+
+def _midnight(ts: float) -> float:
+    """ts 所在那天的本地零点"""
+    t = time.localtime(ts)
+    return time.mktime((t.tm_year, t.tm_mon, t.tm_mday, 0, 0, 0, 0, 0, -1))
+
+
+# ---------- 查询 ----------
+def _window(window: str, now: float = None) -> Optional[float]:
+    if window not in WINDOWS:
+        raise ValueError(f"未知的时间范围：{window}")
+    span = WINDOWS[window]
+    return None if span is None else (now or time.time()) - span
+
+
+def _chunks(log) -> Iterable[np.ndarray]:
+    if log is None:
+        from core import storage
+        log = storage.open_log()
+    return log.iter_chunks()
+
+
+def _first_ts(log) -> Optional[float]:
+    """最早一条有时间的记录（旧版导入的记录 ts 为 0，不算）"""
+    first = None
+    for chunk in _chunks(log):
+        ts = chunk['ts'][chunk['ts'] > 0]
+        if len(ts):
+            first = float(ts.min()) if first is None else min(first, float(ts.min()))
+    return first
+
+
+def query(by: str = 'key', window: str = 'all', log=None, now: float = None,
+          **where) -> Table:
+    """按 by 分组汇总 window 内的记录；where 可以是 pll= / state= / color="""
+    since = _window(window, now)
+    if by in BUCKETS and since is None:
+        where.setdefault('origin', _first_ts(log))     # 记录不一定按时间顺序，先扫一遍找起点
+    agg = Aggregate(by, since=since, **where)
+    for chunk in _chunks(log):
+        agg.feed(chunk)
+    return agg.table()
+
+
+def trend(bucket: str = 'day', window: str = 'week', log=None, now: float = None,
+          **where) -> Table:
+    """按小时 / 天 / 周分桶的趋势，每桶一行"""
+    if bucket not in BUCKETS:
+        raise ValueError(f"未知的分桶：{bucket}")
+    return query(bucket, window, log, now, **where)
+
+
+# ---------- 命令行 ----------
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description='答题历史统计 / 导出')
+    group = ap.add_mutually_exclusive_group()
+    group.add_argument('--by', choices=GROUPS, default='key')
+    group.add_argument('--trend', choices=tuple(BUCKETS), help='按时间分桶看趋势')
+    ap.add_argument('--window', choices=tuple(WINDOWS), default='all')
+    ap.add_argument('--pll', choices=cfg.PLL_NAMES, metavar='PLL', help='只看某个 PLL，如 T、Ua')
+    ap.add_argument('--csv', help='写到 CSV 文件（- 为标准输出）')
+    args = ap.parse_args(argv)
+
+    where = {'pll': args.pll} if args.pll else {}
+    table = trend(args.trend, args.window, **where) if args.trend else \
+        query(args.by, args.window, **where)
+    rows = table.rows()
+    if args.csv:
+        f = sys.stdout if args.csv == '-' else open(args.csv, 'w', newline='', encoding='utf-8')
+        try:
+            w = csv.DictWriter(f, fieldnames=['label', 'n', 'correct', 'accuracy', 'mean',
+                                              'p50', 'p90'])
+            w.writeheader()
+            w.writerows(rows)
+        finally:
+            if f is not sys.stdout:
+                f.close()
+        return 0
+    print(f"{'':10s} {'条数':>6s} {'正确率':>7s} {'平均':>6s} {'中位':>6s} {'P90':>6s}")
+    for r in rows:
+        print(f"{r['label']:10s} {r['n']:6d} {r['accuracy'] * 100:6.1f}% "
+              f"{r['mean']:6.2f} {r['p50']:6.2f} {r['p90']:6.2f}")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
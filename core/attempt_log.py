@@ -0,0 +1,246 @@
+# core/attempt_log.py
+"""
+只追加的二进制答题记录。
+每条记录定长 28 字节：时间戳（图片绘制完成的墙钟时间）、pll 编号、state、color、
+用时（按键事件时间戳 - 绘制时刻）、按键分发延迟、是否正确、session 编号。
+追加先进内存缓冲，由后台写线程一次性 append 到文件末尾；读取走 mmap，不把整个文件读进来。
+array() 把全部记录一次读成 numpy 结构化数组，供打分引擎整体计算；
+iter_chunks() 按块读，内存占用与文件大小无关，供统计查询流式汇总。
+"""
+
+import mmap
+import os
+import struct
+import threading
+import time
+from typing import Iterator, List, NamedTuple
+
+import numpy as np
+
+from core import config as cfg
+from core import persist
+
+LOG_FILE = os.path.join(os.path.dirname(__file__), '..', 'resources', 'attempts.bin')
+CHUNK = 65536       # iter_chunks 每块的记录数
+
+_MAGIC = b'PLLLOG\x00\x01'
+_HEADER = struct.Struct('<8sII')          # magic, version, record size
+# ts(double) session(u32) pll(u16) state(u8) color(u8) time(f32) latency(f32) ok(u8) 3 字节填充
+_RECORD = struct.Struct('<dIHBBffB3x')
+_VERSION = 2
+# 旧版记录（无 latency），读取时兼容，首次追加前整体升级
+_RECORD_V1 = struct.Struct('<dIHBBfB3x')
+
+# 与 _RECORD 逐字节对应的 numpy 类型
+DTYPE = np.dtype([('ts', '<f8'), ('session', '<u4'), ('pll', '<u2'), ('state', 'u1'),
+                  ('color', 'u1'), ('time', '<f4'), ('latency', '<f4'), ('ok', 'u1'),
+                  ('pad', 'V3')])
+_DTYPE_V1 = np.dtype([('ts', '<f8'), ('session', '<u4'), ('pll', '<u2'), ('state', 'u1'),
+                      ('color', 'u1'), ('time', '<f4'), ('ok', 'u1'), ('pad', 'V3')])
+
+
+class Attempt(NamedTuple):
+    ts: float
+    session: int
+    pll: str
+    state: int
+    color: int
+    time: float
+    ok: bool
+    latency: float = 0.0
+
+
+def pll_id(pll: str) -> int:
+    try:
+        return cfg.PLL_NAMES.index(pll)
+    except ValueError:
+        raise ValueError(f"未知的 PLL：{pll}") from None
+
+
+def _header() -> bytes:
+    return _HEADER.pack(_MAGIC, _VERSION, _RECORD.size)
+
+
+def _upgrade_array(raw: np.ndarray) -> np.ndarray:
+    """旧版记录数组转成 DTYPE，latency 补 0"""
+    out = np.zeros(len(raw), DTYPE)
+    for name in _DTYPE_V1.names:
+        if name != 'pad':
+            out[name] = raw[name]
+    return out
+
+
+_logs = {}
+
+
+class AttemptLog:
+    """定长记录的追加日志；同一文件请用 AttemptLog.open() 共享一个实例"""
+
+    @classmethod
+    def open(cls, path: str = LOG_FILE) -> 'AttemptLog':
+        """同一路径返回同一个实例，保证所有写入共用一个缓冲区"""
+        path = os.path.abspath(path)
+        if path not in _logs:
+            _logs[path] = cls(path)
+        return _logs[path]
+
+    def __init__(self, path: str = LOG_FILE):
+        self.path = os.path.abspath(path)
+        self._buf: List[bytes] = []        # 还没写到磁盘的记录
+        self._lock = threading.Lock()
+
+    # ---------- 写 ----------
+    def append(self, pll: str, state: int, color: int, time_taken: float, ok: bool,
+               session: int = 0, ts: float = None, latency: float = 0.0):
+        """追加一条记录；只进内存缓冲，O(1)"""
+        rec = _RECORD.pack(time.time() if ts is None else ts, session,
+                           pll_id(pll), state, color, time_taken, latency, bool(ok))
+        with self._lock:
+            self._buf.append(rec)
+        persist.schedule(self.path, self._write_pending)
+
+    def _write_pending(self):
+        """后台线程：把缓冲区追加到文件末尾；失败时缓冲区保持原样，等待重试"""
+        with self._lock:
+            chunk = b''.join(self._buf)
+            n = len(self._buf)
+        if not n:
+            return
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._upgrade()
+        # 不带缓冲：失败时不会有残留在缓冲里的字节在 close 时又写进去
+        with open(self.path, 'ab', buffering=0) as f:
+            size = f.seek(0, os.SEEK_END)
+            # 上次写到一半崩溃留下的残尾先截掉，否则之后的记录全部错位
+            whole = 0 if size < _HEADER.size else \
+                _HEADER.size + (size - _HEADER.size) // _RECORD.size * _RECORD.size
+            if whole != size:
+                f.truncate(whole)
+            data = memoryview((_header() if whole == 0 else b'') + chunk)
+            try:
+                while data:
+                    data = data[f.write(data):]
+            except OSError:
+                # 只写进去一部分（如磁盘满）：退回追加前的长度，重试时整段再写，不会重复
+                f.truncate(whole)
+                raise
+        with self._lock:
+            del self._buf[:n]
+
+    def _upgrade(self):
+        """旧版文件整体转换成当前格式（只发生一次）"""
+        if not os.path.exists(self.path) or os.path.getsize(self.path) < _HEADER.size:
+            return
+        with open(self.path, 'rb') as f:
+            _, version, _ = _HEADER.unpack(f.read(_HEADER.size))
+        if version == _VERSION:
+            return
+        recs = [_RECORD.pack(*r[:6], 0.0, r[6]) for r in self._iter_file()]
+        tmp = self.path + '.tmp'
+        with open(tmp, 'wb') as f:
+            f.write(_header())
+            f.write(b''.join(recs))
+        os.replace(tmp, self.path)
+
+    def flush(self):
+        persist.flush(self.path)
+
+    def clear(self):
+        """删除全部记录（包括尚未落盘的）"""
+        with self._lock:
+            self._buf.clear()
+        self.flush()
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+    # ---------- 读 ----------
+    def _iter_file(self) -> Iterator[tuple]:
+        """mmap 逐条解出文件里的记录，统一成 (ts, session, pid, state, color, time, ok, latency)"""
+        if not os.path.exists(self.path) or os.path.getsize(self.path) <= _HEADER.size:
+            return
+        with open(self.path, 'rb') as f, \
+                mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            magic, version, size = _HEADER.unpack_from(mm, 0)
+            rec = {1: _RECORD_V1, _VERSION: _RECORD}.get(version)
+            if magic != _MAGIC or rec is None or size != rec.size:
+                raise ValueError(f"{self.path} 不是可识别的答题记录文件")
+            # 末尾不完整的记录（写到一半崩溃）直接忽略
+            end = _HEADER.size + (len(mm) - _HEADER.size) // size * size
+            view = memoryview(mm)[_HEADER.size:end]
+            it = rec.iter_unpack(view)
+            try:
+                if version == _VERSION:
+                    for ts, session, pid, state, color, t, lat, ok in it:
+                        yield ts, session, pid, state, color, t, ok, lat
+                else:
+                    for r in it:
+                        yield r + (0.0,)
+            finally:
+                del it                 # 先放掉对 view 的引用，mmap 才能关闭
+                view.release()
+
+    def _read_array(self) -> np.ndarray:
+        """文件部分整块解析；旧版记录补 latency = 0"""
+        if not os.path.exists(self.path) or os.path.getsize(self.path) <= _HEADER.size:
+            return np.empty(0, DTYPE)
+        with open(self.path, 'rb') as f, \
+                mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            magic, version, size = _HEADER.unpack_from(mm, 0)
+            dtype = {1: _DTYPE_V1, _VERSION: DTYPE}.get(version)
+            if magic != _MAGIC or dtype is None or size != dtype.itemsize:
+                raise ValueError(f"{self.path} 不是可识别的答题记录文件")
+            count = (len(mm) - _HEADER.size) // size
+            raw = np.frombuffer(mm, dtype, count, _HEADER.size).copy()   # 拷出来才能关 mmap
+        return raw if version == _VERSION else _upgrade_array(raw)
+
+    def array(self) -> np.ndarray:
+        """全部记录（含未落盘的缓冲）按时间顺序读成一个 DTYPE 结构化数组"""
+        arr = self._read_array()
+        with self._lock:
+            pending = b''.join(self._buf)
+        if pending:
+            arr = np.concatenate([arr, np.frombuffer(pending, DTYPE)])
+        return arr
+
+    def iter_chunks(self, rows: int = CHUNK) -> Iterator[np.ndarray]:
+        """按时间顺序一块一块读出全部记录（含未落盘的缓冲），每块最多 rows 条"""
+        if os.path.exists(self.path) and os.path.getsize(self.path) > _HEADER.size:
+            with open(self.path, 'rb') as f, \
+                    mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                magic, version, size = _HEADER.unpack_from(mm, 0)
+                dtype = {1: _DTYPE_V1, _VERSION: DTYPE}.get(version)
+                if magic != _MAGIC or dtype is None or size != dtype.itemsize:
+                    raise ValueError(f"{self.path} 不是可识别的答题记录文件")
+                count = (len(mm) - _HEADER.size) // size
+                for start in range(0, count, rows):
+                    raw = np.frombuffer(mm, dtype, min(rows, count - start),
+                                        _HEADER.size + start * size).copy()
+                    yield raw if version == _VERSION else _upgrade_array(raw)
+        with self._lock:
+            pending = b''.join(self._buf)
+        if pending:
+            yield np.frombuffer(pending, DTYPE)
+
+    def _iter_raw(self) -> Iterator[tuple]:
+        yield from self._iter_file()
+        with self._lock:
+            pending = list(self._buf)
+        for rec in pending:
+            ts, session, pid, state, color, t, lat, ok = _RECORD.unpack(rec)
+            yield ts, session, pid, state, color, t, ok, lat
+
+    def __iter__(self) -> Iterator[Attempt]:
+        names = cfg.PLL_NAMES
+        for ts, session, pid, state, color, t, ok, lat in self._iter_raw():
+            yield Attempt(ts, session, names[pid], state, color, t, bool(ok), lat)
+
+    def __len__(self) -> int:
+        n = 0
+        if os.path.exists(self.path) and os.path.getsize(self.path) >= _HEADER.size:
+            with open(self.path, 'rb') as f:
+                _, _, size = _HEADER.unpack(f.read(_HEADER.size))
+            n = (os.path.getsize(self.path) - _HEADER.size) // size
+        with self._lock:
+            return n + len(self._buf)
@@ -0,0 +1,182 @@
+# core/bench.py
+"""
+核心热路径的微基准，不需要显示器，数据全部在临时目录里。
+
+用法：
+    python -m core.bench             # 跑一遍并与基线比较，比基线慢 TOLERANCE 倍以上的项返回 1
+    python -m core.bench --save      # 把这次的结果存为本机基线
+    python -m core.bench -k weights  # 只跑名字里带 weights 的项
+
+基线与机器相关，存在 resources/bench_baseline.json（不入库）。
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import timeit
+from typing import Callable, Dict, List, Tuple
+
+import numpy as np
+
+from core import analytics, case_image, cases, persist, planner, replay, scoring, subsets
+from core.session import CustomSession
+from core.simulate import sandbox
+from core.sqlite_store import SqliteLog, SqliteWeights
+from core.svg_scanner import build_standard_test_list, case_index, case_set, scan_all_svg
+
+BASELINE_FILE = os.path.join(os.path.dirname(__file__), '..', 'resources', 'bench_baseline.json')
+TOLERANCE = 1.5         # 比基线慢这么多倍算回退
+REPEAT = 5
+LOG_RECORDS = 10_000    # 加载类基准预先写入的记录数
+
+Bench = Tuple[str, Callable[[], object]]
+
+
+def measure(fn: Callable[[], object], repeat: int = REPEAT) -> float:
+    """单次调用耗时（秒）：自动选循环次数，取 repeat 轮里最快的一轮"""
+    timer = timeit.Timer(fn)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat, number)) / number
+
+
+def _benches(wm, store) -> List[Bench]:
+    """在 sandbox 里准备好数据，返回 (名字, 无参函数) 列表"""
+    rng = random.Random(0)
+    files = scan_all_svg(validate=False)
+    for _ in range(200):
+        path, pll, color, state = rng.choice(files)
+        wm.update(pll, state, color, rng.random() < 0.8, rng.uniform(0.5, 6))
+
+    # 加载类基准：先写满 LOG_RECORDS 条记录并落盘
+    log = store.log
+    for _ in range(LOG_RECORDS):
+        _, pll, color, state = rng.choice(files)
+        log.append(pll, state, color, rng.uniform(0.5, 6), rng.random() < 0.8, ts=0.0)
+    log.flush()
+    # sqlite 后端：同一个临时目录里建库，写入同样多的记录
+    db = os.path.join(os.path.dirname(wm.backend.path), 'pll.db')
+    slog = SqliteLog.open('bench', db)
+    for a in log:
+        slog.append(a.pll, a.state, a.color, a.time, a.ok, ts=a.ts)
+    slog.flush()
+    sweights = SqliteWeights('bench', db)
+    w_all = np.where(wm._known, wm._w, np.nan)
+
+    # 录一轮 20 张的定制训练，回放基准每次跑同样的负载
+    session = CustomSession(wm, store, count=20, seed=0)
+    session.recorder = replay.Recorder(os.path.dirname(wm.backend.path))
+    session.reset()
+    session.begin()
+    while not session.done:
+        session.advance()
+        session.record(rng.uniform(0.5, 6), rng.random() < 0.8, ts=0.0)
+    session.finish()
+    recording = session.recorder.data
+
+    ids = list(range(cases.N_CASES))
+    batch = [(rng.randrange(cases.N_CASES), rng.random() < 0.8, rng.uniform(0.5, 6)) for _ in range(20)]
+    w = wm.weights()
+    drill = subsets.compile('adj & state:1,2 | weakest:20')
+    all_dirty = set(range(cases.N_KEYS))
+    one = files[0]
+
+    def snapshot_all():
+        store._dirty |= all_dirty
+        store.snapshot()
+
+    def snapshot_one():
+        store._dirty.add(0)
+        store.snapshot()
+
+    def snapshot_one_vector():
+        # 同样 1 行，走向量化的 key_stats，对照逐行标量的收益
+        rows = np.array([0])
+        store._avg[rows], store._acc[rows], store._mastery[rows] = scoring.key_stats(
+            store._times[rows], store._ok[rows], np.minimum(store._count[rows], store._max_hist))
+
+    # 加载类放最前面：后面的 push 会继续往同一份记录里追加
+    return [
+        ('stat.load(1 万条)', lambda: type(store)(log_file=log.path, legacy_file=store._file)),
+        ('log.array(1 万条)', log.array),
+        ('sqlite.log.array(1 万条)', slog.array),
+        ('analytics.query(1 万条, 按 case)', lambda: analytics.query('case', log=log)),
+        ('analytics.trend(1 万条, 按天)', lambda: analytics.trend('day', 'all', log=log)),
+        ('stat.push', lambda: store.push(one[1], one[3], 1.5, True, color=one[2], ts=0.0)),
+        ('stat.snapshot(全部重算)', snapshot_all),
+        ('stat.snapshot(1 行脏)', snapshot_one),
+        ('stat.snapshot(1 行脏, 向量化对照)', snapshot_one_vector),
+        ('weights.update', lambda: wm.update(one[1], one[3], one[2], True, 1.5)),
+        ('weights.forget', wm.forget),
+        ('weights.update_batch(20 条+遗忘)', lambda: wm.update_batch(batch, forget=True)),
+        ('weights.build_weighted_list', lambda: wm.build_weighted_list(files)),
+        ('weights.dump', lambda: wm.backend.dump(w_all)),
+        ('weights.write(json 整份)', lambda: wm.backend.write(np.arange(4), w_all)),
+        ('weights.write(sqlite 4 行)', lambda: sweights.write(np.arange(4), w_all)),
+        ('plan.round(100 张, 间隔 2)', lambda: planner.plan_round(ids, w, 100, rng, max_repeats=2, min_gap=2)),
+        ('subsets.resolve(含 weakest)', lambda: (case_set(validate=False) & drill.resolve(wm.weights)).ids()),
+        ('subsets.excluded(规则不变)', subsets.excluded),
+        ('standard.build_test_list', lambda: build_standard_test_list(rng)),
+        ('replay.custom(20 张, 含建沙盒)', lambda: replay.replay(recording)),
+        ('scan.case_index', lambda: case_index(validate=False)),
+        ('scan.scan_all_svg', lambda: scan_all_svg(validate=False)),
+        ('image.case_svg(不走缓存)', lambda: case_image.case_svg.__wrapped__('T', 2, 3)),
+        ('image.stickers(不走缓存)', lambda: case_image.stickers.__wrapped__('T', 2, 3)),
+    ]
+
+
+def run(pattern: str = '') -> Dict[str, float]:
+    """跑全部（或名字包含 pattern 的）基准，返回 名字 -> 秒/次"""
+    results: Dict[str, float] = {}
+    with sandbox() as (wm, store):
+        for name, fn in _benches(wm, store):
+            if pattern in name:
+                results[name] = measure(fn)
+    return results
+
+
+def _fmt(sec: float) -> str:
+    if sec >= 1e-3:
+        return f'{sec * 1e3:8.2f} ms'
+    return f'{sec * 1e6:8.2f} µs'
+
+
+def load_baseline() -> Dict[str, float]:
+    try:
+        with open(BASELINE_FILE, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description='核心热路径微基准')
+    ap.add_argument('-k', dest='pattern', default='', help='只跑名字包含该字符串的项')
+    ap.add_argument('--save', action='store_true', help='把结果存为基线')
+    ap.add_argument('--tolerance', type=float, default=TOLERANCE)
+    args = ap.parse_args(argv)
+
+    results = run(args.pattern)
+    baseline = load_baseline()
+    regressions = 0
+    for name, sec in results.items():
+        base = baseline.get(name)
+        if base:
+            ratio = sec / base
+            flag = '  ← 回退' if ratio > args.tolerance else ''
+            regressions += bool(flag)
+            print(f'{name:32s} {_fmt(sec)}   基线 {_fmt(base)}  ×{ratio:4.2f}{flag}')
+        else:
+            print(f'{name:32s} {_fmt(sec)}')
+
+    if args.save:
+        baseline.update(results)
+        persist.atomic_write(os.path.abspath(BASELINE_FILE),
+                             json.dumps(baseline, ensure_ascii=False, indent=2))
+        print(f'基线已写入 {os.path.abspath(BASELINE_FILE)}')
+    return 1 if regressions and not args.save else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,174 @@
+# core/case_image.py
+"""
+按排列表直接生成 case 图，不再依赖 resources/SVG 下的 336 个文件。
+
+所有 case 图都是同一个立方体投影：顶面 9 格恒为黄色，
+右面、左面各 9 格，其中只有最上面一行（共"六格"）随 (pll, state, color) 变化，
+下面两行恒为红（右）、蓝（左）。
+
+PLL_TABLE 只记每个 PLL 的角块 / 棱块排列（各 4 位），其余全部推导：
+- 侧面按观察顺序编号 0..3，color1 下依次为 红、蓝、橙、绿；
+- 第 k 面顶行 = [角 k 的左贴纸, 棱 k, 角 k-1 的右贴纸]；
+  角位置 k 上放的是原位 h 的角块时，左贴纸是第 h 面的颜色，右贴纸是第 h+1 面的颜色；
+- state s：右面显示第 s-1 面，左面显示第 s 面；
+- color c：把颜色沿 红→蓝→橙→绿→红 轮换 c-1 次。
+
+生成的 SVG 与 core.svg_optimize 精简后的文件逐字节一致。
+"""
+
+from functools import lru_cache
+from typing import Dict, List, Tuple
+
+from core.config import PLL_NAMES
+
+VERSION = 1          # 生成规则或几何改动时加一，让缩略图缓存失效
+
+STATES = (1, 2, 3, 4)
+COLORS = (1, 2, 3, 4)
+
+BACKGROUND = '#FFFFFF'
+BODY = '#000000'
+TOP = '#FEFE00'
+RIGHT = '#EE0000'              # 右面下两行
+LEFT = '#0000F2'               # 左面下两行
+SIDE_COLORS = ('#EE0000', '#0000F2', '#FFA100', '#00D800')   # 红 蓝 橙 绿
+
+# pll -> (角块排列, 棱块排列)：位置 k 上是原位第几号块
+PLL_TABLE: Dict[str, Tuple[str, str]] = {
+    'Aa': ('0231', '0123'),
+    'Ab': ('3021', '0123'),
+    'E': ('3210', '0123'),
+    'F': ('3120', '0321'),
+    'Ga': ('3120', '2031'),
+    'Gb': ('3120', '1302'),
+    'Gc': ('3102', '2130'),
+    'Gd': ('3120', '3201'),
+    'H': ('0123', '2301'),
+    'Ja': ('3102', '3102'),
+    'Jb': ('3120', '1023'),
+    'Na': ('0321', '2103'),
+    'Nb': ('2103', '2103'),
+    'Ra': ('0231', '1203'),
+    'Rb': ('1203', '2130'),
+    'T': ('3120', '2103'),
+    'Ua': ('0123', '2013'),
+    'Ub': ('0123', '1203'),
+    'V': ('2103', '3120'),
+    'Y': ('2103', '0132'),
+    'Z': ('1230', '0321'),
+}
+
+# ---------- 几何（viewBox 坐标） ----------
+VIEWBOX = (-0.9, -0.9, 1.8, 1.8)
+
+# 立方体三个面的黑色底
+FACE_POINTS = (
+    '0,-0.71734 0.70405,-0.41273 0,-0.02173 -0.70405,-0.41273',
+    '0,-0.02173 0.70405,-0.41273 0.62948,0.36901 0,0.81107',
+    '-0.70405,-0.41273 0,-0.02173 0,0.81107 -0.62948,0.36901',
+)
+
+# 27 格贴纸：0-8 顶面，9-17 右面（9-11 为顶行），18-26 左面（18-20 为顶行）
+STICKER_POINTS = (
+    '0,-0.74757 0.19599,-0.66277 0,-0.57124 -0.19599,-0.66277',
+    '0.23201,-0.64655 0.44357,-0.55501 0.24823,-0.45589 0.03602,-0.55501',
+    '0.48258,-0.53743 0.71167,-0.43832 0.51778,-0.33064 0.28724,-0.43832',
+    '-0.23201,-0.64655 -0.03602,-0.55501 -0.24823,-0.45589 -0.44357,-0.55501',
+    '0,-0.53743 0.21221,-0.43832 0,-0.33064 -0.21221,-0.43832',
+    '0.25135,-0.41921 0.4819,-0.31154 0.27051,-0.19414 0.03914,-0.31154',
+    '-0.48258,-0.53743 -0.28724,-0.43832 -0.51778,-0.33064 -0.71167,-0.43832',
+    '-0.25135,-0.41921 -0.03914,-0.31154 -0.27051,-0.19414 -0.4819,-0.31154',
+    '0,-0.2907 0.23137,-0.1733 0,-0.04481 -0.23137,-0.1733',
+    '0.01957,-0.01096 0.25094,-0.13946 0.24139,0.12673 0.01957,0.26172',
+    '0.28931,-0.16172 0.50069,-0.27911 0.48318,-0.01932 0.27976,0.10447',
+    '0.53586,-0.29952 0.72975,-0.4072 0.70556,-0.15367 0.51835,-0.03974',
+    '0.0188,0.3074 0.24062,0.17241 0.23182,0.41749 0.0188,0.55753',
+    '0.27748,0.14913 0.4809,0.02534 0.46472,0.26535 0.26869,0.39421',
+    '0.51482,0.00392 0.70204,-0.11001 0.67963,0.12496 0.49864,0.24393',
+    '0.01808,0.59957 0.23111,0.45954 0.22298,0.68593 0.01808,0.82983',
+    '0.26659,0.43546 0.46262,0.3066 0.44763,0.52902 0.25847,0.66186',
+    '0.49537,0.28438 0.67636,0.16541 0.65553,0.38379 0.48038,0.5068',
+    '-0.73034,-0.40665 -0.53645,-0.29897 -0.51893,-0.03918 -0.70615,-0.15312',
+    '-0.50139,-0.27855 -0.29001,-0.16115 -0.28046,0.10503 -0.48388,-0.01876',
+    '-0.25178,-0.13888 -0.02041,-0.01039 -0.02041,0.26229 -0.24223,0.1273',
+    '-0.70259,-0.10957 -0.51537,0.00436 -0.49919,0.24438 -0.68018,0.12541',
+    '-0.48156,0.02579 -0.27814,0.14958 -0.26934,0.39466 -0.46537,0.2658',
+    '-0.24139,0.17286 -0.01957,0.30785 -0.01957,0.55797 -0.2326,0.41794',
+    '-0.67687,0.16577 -0.49589,0.28474 -0.48089,0.50715 -0.65604,0.38415',
+    '-0.46323,0.30696 -0.2672,0.43581 -0.25908,0.66221 -0.44823,0.52937',
+    '-0.23182,0.45988 -0.0188,0.59991 -0.0188,0.83017 -0.2237,0.68627',
+)
+RIGHT_ROW = (9, 10, 11)
+LEFT_ROW = (18, 19, 20)
+
+Polygon = Tuple[Tuple[float, float], ...]
+
+
+def _parse(points: str) -> Polygon:
+    return tuple(tuple(float(v) for v in p.split(',')) for p in points.split())
+
+
+# QPainter 直接用的浮点坐标，导入时解析一次
+FACES: Tuple[Polygon, ...] = tuple(_parse(p) for p in FACE_POINTS)
+STICKERS: Tuple[Polygon, ...] = tuple(_parse(p) for p in STICKER_POINTS)
+
+CaseKey = Tuple[str, int, int]           # (pll, state, color)
+
+
+# ---------- 配色 ----------
+def case_keys() -> List[CaseKey]:
+    """全部可生成的 (pll, state, color)，顺序与 PLL_NAMES 一致"""
+    return [(pll, state, color)
+            for pll in PLL_NAMES if pll in PLL_TABLE
+            for state in STATES for color in COLORS]
+
+
+def _ring(pll: str) -> List[Tuple[int, int, int]]:
+    """四个侧面顶行的面编号（color1、state 无关）"""
+    cp, ep = PLL_TABLE[pll]
+    cp, ep = [int(c) for c in cp], [int(e) for e in ep]
+    return [(cp[k], ep[k], (cp[k - 1] + 1) % 4) for k in range(4)]
+
+
+@lru_cache(maxsize=None)
+def stickers(pll: str, state: int, color: int) -> Tuple[str, ...]:
+    """27 格贴纸的填充色，顺序同 STICKER_POINTS；未知 pll 抛 KeyError"""
+    ring = _ring(pll)
+    shift = color - 1
+    fills = [TOP] * 9 + [RIGHT] * 9 + [LEFT] * 9
+    for row, face in ((RIGHT_ROW, (state - 1) % 4), (LEFT_ROW, state % 4)):
+        for idx, f in zip(row, ring[face]):
+            fills[idx] = SIDE_COLORS[(f + shift) % 4]
+    return tuple(fills)
+
+
+# ---------- SVG ----------
+_HEADER = ('<svg xmlns="http://www.w3.org/2000/svg" version="1.1" width="400" height="400" '
+           'viewBox="-0.9 -0.9 1.8 1.8">'
+           '<rect fill="#FFFFFF" x="-0.9" y="-0.9" width="1.8" height="1.8" />'
+           '<g style="stroke-width:0.1;stroke-linejoin:round;opacity:1" stroke="#000000" fill="#000000">'
+           + ''.join(f'<polygon points="{p}" />' for p in FACE_POINTS) +
+           '</g>'
+           '<g style="opacity:1;stroke-opacity:0.5;stroke-width:0;stroke-linejoin:round" stroke="#000000">')
+_FOOTER = '</g></svg>'
+
+
+@lru_cache(maxsize=None)
+def case_svg(pll: str, state: int, color: int) -> bytes:
+    """生成一张 case 图的 SVG 字节；相邻同色贴纸包进同一个 <g fill>"""
+    parts = [_HEADER]
+    fills = stickers(pll, state, color)
+    i = 0
+    while i < len(fills):
+        j = i
+        while j < len(fills) and fills[j] == fills[i]:
+            j += 1
+        if j - i == 1:
+            parts.append(f'<polygon fill="{fills[i]}" points="{STICKER_POINTS[i]}" />')
+        else:
+            parts.append(f'<g fill="{fills[i]}">')
+            parts.extend(f'<polygon points="{p}" />' for p in STICKER_POINTS[i:j])
+            parts.append('</g>')
+        i = j
+    parts.append(_FOOTER)
+    return ''.join(parts).encode('utf-8')
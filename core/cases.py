@@ -0,0 +1,90 @@
+# core/cases.py
+"""
+case 注册表：每个 (pll, state, color) 对应一个小整数 id，内存和磁盘上都只用这个 id 当 key。
+
+    id     = pll 编号 * 16 + (state - 1) * 4 + (color - 1)
+    key id = id // 4          # 只看 (pll, state)，统计用
+
+pll 编号就是 cfg.PLL_NAMES 的下标（只追加），所以 id 永远稳定，
+weights.json、attempts.bin、内存里的数组用的都是这一套编号。
+"""
+
+from typing import Dict, List, Tuple
+
+from core import config as cfg
+
+N_STATES = 4
+N_COLORS = 4
+N_KEYS = len(cfg.PLL_NAMES) * N_STATES
+N_CASES = N_KEYS * N_COLORS
+
+
+class Case:
+    """一个 (pll, state, color)；全局只有一份，可以直接用 is 比较"""
+    __slots__ = ('id', 'pll', 'state', 'color')
+
+    def __init__(self, cid: int, pll: str, state: int, color: int):
+        self.id = cid
+        self.pll = pll
+        self.state = state
+        self.color = color
+
+    @property
+    def key_id(self) -> int:
+        return self.id // N_COLORS
+
+    @property
+    def key(self) -> Tuple[str, int, int]:
+        return self.pll, self.state, self.color
+
+    @property
+    def label(self) -> str:
+        return f"{self.pll}-{self.state}"
+
+    def __repr__(self) -> str:
+        return f"Case({self.id}, {self.pll!r}, {self.state}, {self.color})"
+
+
+CASES: Tuple[Case, ...] = tuple(
+    Case(i, pll, state, color)
+    for i, (pll, state, color) in enumerate(
+        (pll, state, color)
+        for pll in cfg.PLL_NAMES
+        for state in range(1, N_STATES + 1)
+        for color in range(1, N_COLORS + 1)
+    )
+)
+_BY_KEY: Dict[Tuple[str, int, int], Case] = {c.key: c for c in CASES}
+
+
+# ---------- 查询 ----------
+def get(pll: str, state: int, color: int) -> Case:
+    """(pll, state, color) → Case；不存在抛 KeyError"""
+    return _BY_KEY[(pll, state, color)]
+
+
+def has(pll: str, state: int, color: int) -> bool:
+    """(pll, state, color) 是否在注册表里（不认识的 PLL 目录等）"""
+    return (pll, state, color) in _BY_KEY
+
+
+def by_id(cid: int) -> Case:
+    return CASES[cid]
+
+
+def case_id(pll: str, state: int, color: int) -> int:
+    return _BY_KEY[(pll, state, color)].id
+
+
+def key_id(pll: str, state: int) -> int:
+    return _BY_KEY[(pll, state, 1)].key_id
+
+
+def key_of(kid: int) -> Tuple[str, int]:
+    c = CASES[kid * N_COLORS]
+    return c.pll, c.state
+
+
+def key_cases(color: int = 1) -> List[Case]:
+    """每个 (pll, state) 取一个颜色，按 key id 排列（统计页每行一个）"""
+    return [CASES[kid * N_COLORS + color - 1] for kid in range(N_KEYS)]
@@ -2,7 +2,7 @@
 """
 全局配置：排除规则、路径、常量等。
 如需新增排除规则，直接在 EXCLUDE_RULES 列表里追加即可。
-格式：(pll简称, 'color'|'state', 要排除的值)
+格式：(pll简称, 'color'|'state', 要排除的值)，或子集表达式字符串（见 core/subsets.py）
 """
 
 # 示例：排除 T-perm 的 color=1 及 state=3
@@ -10,9 +10,17 @@ EXCLUDE_RULES = [
     # ('T', 'color', 1),
     # ('T', 'state', 3),
     # ('Ua', 'color', 2),
+    # 'diag & color:4',
 ]
 
-# 全局可改参数
+# 全部 PLL 简称；顺序即 pll 编号（二进制记录里用），新增只能追加到末尾
+PLL_NAMES = [
+    "Aa", "Ab", "E", "F", "Ga", "Gb", "Gc", "Gd", "H",
+    "Ja", "Jb", "Na", "Nb", "Ra", "Rb", "T", "Ua",
+    "Ub", "V", "Y", "Z",
+]
+
+# 全局可改参数（类型和取值范围见 core/settings.py 的 FIELDS）
 FORGET_RATE = 1.00# 遗忘率
 COLOR_SYNC_FACTOR = 1.00# 颜色同步因子
 CUSTOM_TRAIN_COUNT = 20# 每轮定制训练抽多少张
@@ -24,6 +32,27 @@ COLOR_MIN = 0.10# 最小颜色权重
 TIME_MAX = 8.00# 最大时间
 MAX_PERFECT = 0.50# 满分时间
 
+# 定制训练每轮开局排好的出牌计划（见 core/planner.py）
+ROUND_REPLACE = True        # 一轮内同一 case 可以重复出现
+ROUND_MAX_REPEATS = 2       # 可重复时每个 case 一轮最多几次，None 不限
+ROUND_MIN_GAP = 2           # 同一 (pll, state) 之间至少隔几张
+
+# 定制训练只练这个子集（表达式见 core/subsets.py），如 'G'、'diag | weakest:20'
+DRILL = 'all'
+
+# 卡面来源：True 按排列表现场生成（不读任何文件）；
+# False 读 resources/svg.bundle，没有打包文件时读 resources/SVG 下的散文件
+PROCEDURAL = True
+
+# 存储后端：'files' = resources 下的 attempts.bin + weights.json（单人）；
+# 'sqlite' = resources/pll.db（WAL，多人共用一台机器时按 profile 分开，见 core/sqlite_store.py）
+STORAGE = 'files'
+PROFILE = 'default'         # 环境变量 PLL_PROFILE 优先；这个 profile 第一次用 sqlite 时自动导入旧文件
+
+# 权重更新时机：'immediate' 每答一张就改，权重变化够大时重排本轮后面的牌（见 core/session.py）；
+# 'batch' 一轮结束连同遗忘一次算完、写一次盘，结果与作答顺序无关
+WEIGHT_UPDATE = 'immediate'
+
 # 时间分段影响因子，线性
 TIME_K = {
     0.5: 0.6,
@@ -34,43 +63,7 @@ TIME_K = {
 }
 
 # --------------------------------------------------
-# 新增：把当前内存值写回文件（覆盖原文件）
-import os
-_CFG_FILE = os.path.abspath(__file__)
-
-def save():
-    """
-    仅持久化简单标量（int/float/str/bool），
-    列表/字典等多行字面量保持不变，避免格式被破坏。
-    """
-    import re
-    simple_keys = {
-        'FORGET_RATE', 'COLOR_SYNC_FACTOR', 'CUSTOM_TRAIN_COUNT',
-        'NEXT_DELAY_MS', 'LAMBDA', 'CASE_MIN', 'COLOR_MIN',
-        'TIME_MAX', 'MAX_PERFECT'
-    }
-
-    with open(_CFG_FILE, 'r', encoding='utf-8') as f:
-        src = f.read()
-
-    # 用正则逐行匹配：KEY = VALUE  # 注释
-    def repl(m):
-        key = m.group(1)
-        if key not in simple_keys:
-            return m.group(0)          # 不改动多行字面量
-        val = globals()[key]
-        if isinstance(val, float):
-            val_str = f'{val:.2f}'
-        else:
-            val_str = str(val)
-        return f'{key} = {val_str}{m.group(2)}'
-
-    new_src = re.sub(r'^(FORGET_RATE|COLOR_SYNC_FACTOR|CUSTOM_TRAIN_COUNT|'
-                     r'NEXT_DELAY_MS|LAMBDA|CASE_MIN|COLOR_MIN|'
-                     r'TIME_MAX|MAX_PERFECT)\s*=\s*[^#\n]*(.*)$',
-                     repl, src, flags=re.MULTILINE)
-
-    tmp = _CFG_FILE + '.tmp'
-    with open(tmp, 'w', encoding='utf-8') as f:
-        f.write(new_src)
-    os.replace(tmp, _CFG_FILE)
\ No newline at end of file
+# 上面的标量是默认值；设置页改过的值存在 resources/settings.json，导入时覆盖到这里。
+# 运行中改参数走 core.settings.set()，它校验、改这里的属性并通知订阅者（见 core/settings.py）
+from core import settings as _settings   # noqa: E402  settings 只在函数里回头取 config，不构成循环
+_settings.load()
@@ -0,0 +1,130 @@
+# core/persist.py
+"""
+写后（write-behind）持久化：
+业务代码只在内存里改数据并调用 mark_dirty()，后台线程把同一文件的多次改动合并，
+定时落盘；训练结束、程序退出或显式 flush() 时立即写入。
+落盘统一走临时文件 + os.replace，中途崩溃不会留下半个文件。
+"""
+
+import atexit
+import os
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+from core import trace
+
+FLUSH_INTERVAL = 2.0    # 秒：第一次标脏后最多等这么久就落盘
+
+Dump = Callable[[], str]    # 返回要写入的完整文本，在后台线程里调用
+Action = Callable[[], None]  # 自行完成写盘的动作（如追加日志），在后台线程里调用
+
+
+def atomic_write(path: str, text: str):
+    """临时文件写完再替换，保证文件要么是旧版本要么是新版本"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(tmp, path)
+
+
+class WriteBehind:
+    """按文件路径合并写请求的后台写线程"""
+
+    def __init__(self, interval: float = FLUSH_INTERVAL):
+        self.interval = interval
+        self._pending: Dict[str, Action] = {}
+        self._cond = threading.Condition()
+        self._io_lock = threading.Lock()      # 串行化真正的磁盘写入
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+
+    # ---------- 生产者（GUI 线程） ----------
+    def mark_dirty(self, path: str, dump: Dump):
+        """登记一次整文件改写；同一路径只保留最新的 dump，O(1)，不碰磁盘"""
+        path = os.path.abspath(path)
+        self.schedule(path, lambda: atomic_write(path, dump()))
+
+    def schedule(self, path: str, action: Action):
+        """登记一个后台写盘动作；同一路径只保留最新的一个"""
+        path = os.path.abspath(path)
+        with self._cond:
+            self._pending[path] = action
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name='write-behind', daemon=True)
+                self._thread.start()
+            self._cond.notify()
+
+    def pending(self, path: Optional[str] = None) -> bool:
+        with self._cond:
+            if path is None:
+                return bool(self._pending)
+            return os.path.abspath(path) in self._pending
+
+    # ---------- 落盘 ----------
+    def flush(self, path: Optional[str] = None):
+        """立即写入（全部或指定路径），返回时数据已在磁盘上"""
+        with self._io_lock:
+            with self._cond:
+                if path is None:
+                    batch, self._pending = self._pending, {}
+                else:
+                    path = os.path.abspath(path)
+                    action = self._pending.pop(path, None)
+                    batch = {path: action} if action else {}
+            for p, action in batch.items():
+                try:
+                    t0 = time.perf_counter()
+                    action()
+                    if trace.ON:
+                        trace.emit('persist.write', path=p,
+                                   ms=(time.perf_counter() - t0) * 1000)
+                except Exception as e:     # 任何异常都不能带走写线程和同批的其他文件
+                    print(f"写入 {p} 失败，稍后重试：{type(e).__name__}: {e}")
+                    with self._cond:
+                        self._pending.setdefault(p, action)
+
+    def close(self):
+        """程序退出：停掉后台线程并写完剩余数据"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self.flush()
+
+    # ---------- 后台线程 ----------
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending and not self._closed:
+                    self._cond.wait()
+                if self._closed:
+                    return
+                # 攒一个时间窗口，把这段时间的改动合并成一次写入
+                deadline = time.monotonic() + self.interval
+                while not self._closed:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                if self._closed:
+                    return
+            self.flush()
+
+
+# 全局一份，所有存储共用
+writer = WriteBehind()
+atexit.register(writer.close)
+
+
+def mark_dirty(path: str, dump: Dump):
+    writer.mark_dirty(path, dump)
+
+
+def schedule(path: str, action: Action):
+    writer.schedule(path, action)
+
+
+def flush(path: Optional[str] = None):
+    writer.flush(path)
@@ -0,0 +1,86 @@
+# core/planner.py
+"""
+一轮的出牌计划：开局时按权重一次算好整轮的 case id 序列，之后每张只是下标 +1。
+
+    replace=False      一轮内每个 case 最多一次（= max_repeats=1）
+    max_repeats=k      可重复时每个 case 最多 k 次；None 不限
+    min_gap=g          同一 (pll, state) 之间至少隔 g 张，避免连着出同一个 case
+    drawn=[...]        本轮已出的牌：计入重复上限，间隔从它们后面接着算（轮中重排用）
+"""
+
+import math
+import random
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from core import cases, trace
+
+
+def plan_round(ids: Sequence[int], weights: Sequence[float], n: int, rng=random,
+               replace: bool = True, max_repeats: Optional[int] = None,
+               min_gap: int = 0, drawn: Sequence[int] = ()) -> List[int]:
+    """
+    从 ids 里按 weights（与 ids 等长）抽 n 张，返回出牌顺序的 case id 列表。
+    有重复上限时最多 len(ids) * max_repeats 张（减去 drawn 里已用掉的次数）。
+    """
+    ids = np.asarray(ids, dtype=np.int64)
+    w = np.asarray(weights, dtype=float)
+    if not len(ids) or n <= 0:
+        return []
+    gen = np.random.default_rng(rng.getrandbits(64))   # 随 rng 的种子可复现
+    if not replace:
+        max_repeats = 1
+
+    if max_repeats is None:
+        picks = gen.choice(len(ids), size=n, p=w / w.sum())
+    else:
+        # 每个 case 复制 max_repeats 份，Efraimidis–Spirakis 键 log(u)/w 取最大的 n 个，
+        # 一次向量化完成加权不放回抽样
+        keys = np.log(gen.random((max_repeats, len(ids)))) / w
+        if len(drawn):
+            # 已出过 k 次的 case 前 k 份作废
+            index = {cid: i for i, cid in enumerate(ids.tolist())}
+            used = np.zeros(len(ids), dtype=np.int64)
+            for cid in drawn:
+                if cid in index:
+                    used[index[cid]] += 1
+            keys[np.arange(max_repeats)[:, None] < used] = -np.inf
+            n = min(n, int(np.maximum(max_repeats - used, 0).sum()))
+        else:
+            n = min(n, len(ids) * max_repeats)
+        if n <= 0:
+            return []
+        top = np.argpartition(-keys.ravel(), n - 1)[:n]
+        picks = gen.permutation(top % len(ids))
+    seq = ids[picks].tolist()
+
+    if min_gap > 0:
+        seq = spread(seq, min_gap, drawn)
+    if trace.ON:
+        trace.emit('plan.round', n=len(seq), distinct=len(set(seq)),
+                   replace=replace, max_repeats=max_repeats, min_gap=min_gap)
+    return seq
+
+
+def spread(seq: List[int], min_gap: int, drawn: Sequence[int] = ()) -> List[int]:
+    """
+    贪心重排：每个位置取第一个与同 (pll, state) 上次出现隔够 min_gap 张的；
+    都不够时取最久没出现的那个（排不开就尽量拉开）。drawn 为排在 seq 之前、已经出过的牌。
+    """
+    pending = list(seq)
+    out: List[int] = []
+    last: Dict[int, int] = {}           # key id -> 上次出现的位置（drawn 从负位置开始）
+    for pos, cid in enumerate(drawn, -len(drawn)):
+        last[int(cid) // cases.N_COLORS] = pos
+    while pending:
+        pos = len(out)
+        for i, cid in enumerate(pending):
+            if pos - last.get(cid // cases.N_COLORS, -math.inf) > min_gap:
+                break
+        else:
+            i = min(range(len(pending)), key=lambda j: last[pending[j] // cases.N_COLORS])
+        cid = pending.pop(i)
+        last[cid // cases.N_COLORS] = pos
+        out.append(cid)
+    return out
@@ -0,0 +1,215 @@
+# core/replay.py
+"""
+一轮训练的录制与无界面回放。
+
+每轮开局（Session.reset）从会话的 rng 取一个种子，本轮的抽牌只用这个种子建的 Random，
+所以只要记下：种子、当时的参数和权重、按键 / 作答时间线，就能原样重放出同样的出牌顺序
+和同样的权重变化。用来在完全相同的负载上做基准、profile，或 git bisect 找行为回退。
+
+    PLL_RECORD=resources/replays python main.py       # 每轮写一个 JSON
+    PLL_SEED=42 python main.py                        # 固定会话种子（不录制也可以用）
+
+    python -m core.replay resources/replays/custom-20260101-120000-01234.json
+    python -m core.replay FILE --repeat 20            # 重复回放计时
+    python -m core.replay FILE --profile              # cProfile 看抽牌 / 更新路径
+回放结果与录制不一致时返回 1，可以直接给 git bisect run 用。
+"""
+
+import argparse
+import cProfile
+import hashlib
+import json
+import math
+import os
+import pstats
+import sys
+import time
+from typing import Any, Dict, List, NamedTuple, Optional
+
+import numpy as np
+
+from core import config as cfg
+from core import cases, persist, settings
+
+RECORD_DIR = os.environ.get('PLL_RECORD') or None    # 为空不录制
+_VERSION = 1
+
+
+def default_seed() -> Optional[int]:
+    """环境变量 PLL_SEED 给的会话种子；没有返回 None（随机）"""
+    seed = os.environ.get('PLL_SEED')
+    return int(seed) if seed else None
+
+
+def weights_digest(w: np.ndarray) -> str:
+    """权重数组的指纹，回放时逐条比对"""
+    return hashlib.sha1(np.ascontiguousarray(w, dtype=float).tobytes()).hexdigest()[:16]
+
+
+def _json_weights(w: np.ndarray) -> List[Optional[float]]:
+    return [None if math.isnan(x) else x for x in w.tolist()]
+
+
+# ---------- 录制 ----------
+class Recorder:
+    """挂在 Session.recorder 上；Session 在各个节点调用 event()，一轮结束写一个 JSON 文件"""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.data: Optional[Dict[str, Any]] = None
+        self.path: Optional[str] = None
+        self._t0 = 0.0
+
+    @classmethod
+    def auto(cls) -> Optional['Recorder']:
+        """设置了 PLL_RECORD 时返回一个录制器"""
+        return cls(RECORD_DIR) if RECORD_DIR else None
+
+    def start(self, session):
+        """开局、排计划之前调用：记下种子、参数、排除规则和当时的权重"""
+        wm = getattr(session, 'wm', None)
+        subset = getattr(session, 'subset', None)
+        self.data = {
+            'version': _VERSION,
+            'kind': session.KIND,
+            'seed': session.seed,
+            'count': getattr(session, 'count', None),
+            'subset': subset if subset is None or isinstance(subset, str) else hex(subset.bits),
+            'settings': settings.values(),
+            'exclude': [r if isinstance(r, str) else list(r) for r in cfg.EXCLUDE_RULES],
+            'weights': None if wm is None else _json_weights(wm.array()),
+            'created': time.time(),
+            'events': [],
+        }
+        self.path = None
+        self._t0 = time.perf_counter()
+
+    def event(self, name: str, **fields):
+        """时间线上的一条：[距开局秒数, 事件名, 字段]"""
+        if self.data is not None:
+            self.data['events'].append([round(time.perf_counter() - self._t0, 4), name, fields])
+
+    def save(self):
+        """写出本轮（可以多次调用，覆盖同一个文件）"""
+        if self.data is None:
+            return
+        if self.path is None:
+            stamp = time.strftime('%Y%m%d-%H%M%S', time.localtime(self.data['created']))
+            name = f"{self.data['kind']}-{stamp}-{self.data['seed'] % 100000:05d}.json"
+            self.path = os.path.join(self.directory, name)
+        persist.atomic_write(self.path, json.dumps(self.data, ensure_ascii=False))
+
+
+# ---------- 回放 ----------
+class Divergence(Exception):
+    """回放与录制不一致"""
+
+
+class Replay(NamedTuple):
+    cards: List[int]            # 实际出的 case id，按顺序
+    digests: List[str]          # 每次作答后 / 结束时的权重指纹（标准训练为空）
+    elapsed: float              # 纯回放耗时（秒），不含建沙盒
+
+
+def load(path: str) -> Dict[str, Any]:
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    if data.get('version') != _VERSION:
+        raise ValueError(f"不认识的录制文件版本：{data.get('version')}")
+    return data
+
+
+def _session(data: Dict[str, Any], wm, store):
+    from core.session import CustomSession, StandardSession    # session 导入了本模块
+    from core.subsets import CaseSet
+    subset = data['subset']
+    if subset is not None and subset.startswith('0x'):
+        subset = CaseSet(int(subset, 16))
+    if data['kind'] == StandardSession.KIND:
+        session = StandardSession(store, subset=subset)
+    else:
+        session = CustomSession(wm, store, count=data['count'], subset=subset)
+    session.recorder = None
+    return session
+
+
+def replay(data: Dict[str, Any], verify: bool = True) -> Replay:
+    """在临时目录里按录制重放一轮；verify 时出牌或权重对不上就抛 Divergence"""
+    from core.simulate import overrides, sandbox
+    cards: List[int] = []
+    digests: List[str] = []
+    with sandbox() as (wm, store), \
+            overrides(**data['settings'],
+                      EXCLUDE_RULES=[r if isinstance(r, str) else tuple(r) for r in data['exclude']]):
+        if data['weights'] is not None:
+            wm.assign(np.array(data['weights'], dtype=float))
+        session = _session(data, wm, store)
+        custom = data['weights'] is not None
+
+        def check(i: int, what: str, got, want):
+            if verify and got != want:
+                raise Divergence(f"第 {i} 个事件 {what} 不一致：回放 {got}，录制 {want}")
+
+        t0 = time.perf_counter()
+        session.reset(seed=data['seed'])
+        for i, (_, name, f) in enumerate(data['events']):
+            if name == 'plan':
+                check(i, '计划张数', session.total, f['n'])
+            elif name == 'begin':
+                session.begin()
+            elif name == 'advance':
+                path, pll, color, state = session.advance()
+                cards.append(cases.case_id(pll, state, color))
+                check(i, '出牌', cards[-1], f['case'])
+            elif name == 'record':
+                session.record(f['t'], f['ok'], ts=f.get('ts'), latency=f.get('latency', 0.0))
+                if custom:
+                    digests.append(weights_digest(wm.array()))
+                    check(i, '权重', digests[-1], f.get('weights'))
+            elif name == 'flush':
+                session.flush()
+            elif name == 'finish':
+                session.finish()
+                if custom:
+                    digests.append(weights_digest(wm.array()))
+                    check(i, '权重', digests[-1], f.get('weights'))
+            # 'key'：作答之外的按键（答错后补按的正确键），只是时间线，不影响引擎
+        elapsed = time.perf_counter() - t0
+    return Replay(cards, digests, elapsed)
+
+
+# ---------- 命令行 ----------
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description='无界面回放录制的训练轮')
+    ap.add_argument('files', nargs='+')
+    ap.add_argument('--repeat', type=int, default=1, help='每个文件回放几次，报最快一次')
+    ap.add_argument('--profile', action='store_true', help='用 cProfile 跑一次，打印热点')
+    args = ap.parse_args(argv)
+
+    failed = 0
+    for path in args.files:
+        data = load(path)
+        try:
+            if args.profile:
+                prof = cProfile.Profile()
+                prof.enable()
+                res = replay(data)
+                prof.disable()
+                pstats.Stats(prof).sort_stats('cumulative').print_stats(25)
+            else:
+                res = min((replay(data) for _ in range(args.repeat)), key=lambda r: r.elapsed)
+        except Divergence as e:
+            print(f"{path}: 不一致 — {e}")
+            failed += 1
+            continue
+        except ValueError as e:         # 录制里的参数现在不合法（范围改过、字段已删）
+            print(f"{path}: 无法回放 — {e}")
+            failed += 1
+            continue
+        print(f"{path}: 一致 | {data['kind']} 种子 {data['seed']} | {len(res.cards)} 张 | "
+              f"回放 {res.elapsed * 1e3:.2f} ms")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,95 @@
+# core/scoring.py
+"""
+数组化的打分引擎：掌握值、置信系数、遗忘、clamp 都对全部 case 一次向量化计算。
+
+数组下标即 core.cases 的 case id / key id。
+"""
+
+from typing import Tuple
+
+import numpy as np
+
+from core import config as cfg
+from core import trace
+
+# 置信系数：按记录条数查表，下标 0 不会被用到（无记录掌握值直接为 0）
+CONFIDENCE = np.array([1.00, 0.80, 0.85, 0.90, 0.95, 1.00])
+
+# 时间 → 分数的三次曲线：1s=100, 2s=80, 3s=60, 8s=0
+_CURVE = (4 / 21, -8 / 7, -376 / 21, 832 / 7)
+
+
+# ---------- 掌握值 ----------
+def curve_score(t: np.ndarray) -> np.ndarray:
+    """平均折算时间 → 0..100 的曲线分数"""
+    a, b, c, d = _CURVE
+    score = np.where(t <= 1, 100.0,
+                     np.where(t >= cfg.TIME_MAX, 0.0, d + c * t + b * t ** 2 + a * t ** 3))
+    score = np.clip(score, 0.0, 100.0)
+    if trace.ON:
+        trace.emit('score.curve', t=t.tolist(), score=score.tolist())
+    return score
+
+
+def confidence(n: np.ndarray) -> np.ndarray:
+    """记录条数 → 置信系数，超出表长按 1.0"""
+    return CONFIDENCE[np.minimum(n, len(CONFIDENCE) - 1)]
+
+
+def key_stats(times: np.ndarray, ok: np.ndarray, n: np.ndarray):
+    """
+    times / ok 为 (行数, 保留条数) 的最近记录，n 为每行有效条数（有效的在前 n 格）。
+    返回 (avg_time, accuracy, mastery)，均已 round 到 2 位：
+    平均时间只算正确记录；错误在掌握值里折算 TIME_MAX；无记录的行全部为 0。
+    """
+    valid = np.arange(times.shape[1]) < n[:, None]
+    right = valid & ok
+    n_ok = right.sum(axis=1)
+    safe_n = np.maximum(n, 1)
+
+    avg_time = np.where(n_ok > 0, (times * right).sum(axis=1) / np.maximum(n_ok, 1), 0.0)
+    accuracy = n_ok / safe_n
+    score_t = np.where(valid, np.where(ok, times, cfg.TIME_MAX), 0.0).sum(axis=1) / safe_n
+    mastery = np.where(n > 0, np.clip(curve_score(score_t) * confidence(n), 0.0, 100.0), 0.0)
+    return avg_time.round(2), accuracy.round(2), mastery.round(2)
+
+
+def key_stat(times: list, ok: list, n: int) -> Tuple[float, float, float]:
+    """
+    key_stats 的单行版，times / ok 为一行的 list：纯 Python 标量运算，
+    只有一两行要算时省掉建数组的开销。结果与 key_stats 逐位相同。
+    """
+    if n <= 0:
+        return 0.0, 0.0, 0.0
+    total_ok = score_sum = 0.0
+    n_ok = 0
+    for t, right in zip(times[:n], ok[:n]):
+        if right:
+            total_ok += t
+            n_ok += 1
+            score_sum += t
+        else:
+            score_sum += cfg.TIME_MAX
+    t = score_sum / n
+    if t <= 1:
+        score = 100.0
+    elif t >= cfg.TIME_MAX:
+        score = 0.0
+    else:
+        a, b, c, d = _CURVE
+        score = min(max(d + c * t + b * t ** 2 + a * t ** 3, 0.0), 100.0)
+    conf = float(CONFIDENCE[min(n, len(CONFIDENCE) - 1)])
+    mastery = min(max(score * conf, 0.0), 100.0)
+    avg_time = total_ok / n_ok if n_ok else 0.0
+    # 与 ndarray.round(2) 同样是 rint(x * 100) / 100
+    return round(avg_time * 100) / 100, round(n_ok / n * 100) / 100, round(mastery * 100) / 100
+
+
+# ---------- 权重 ----------
+def clamp(w: np.ndarray) -> np.ndarray:
+    return np.clip(w, cfg.CASE_MIN, cfg.CASE_MAX)
+
+
+def forget(w: np.ndarray) -> np.ndarray:
+    """每轮结束向 1 回归：FORGET_RATE * w + 1 - FORGET_RATE"""
+    return cfg.FORGET_RATE * w + 1 - cfg.FORGET_RATE
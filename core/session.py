@@ -0,0 +1,281 @@
+# core/session.py
+"""
+一轮训练的引擎：抽牌、记录答题、打分，不依赖 Qt。
+
+界面（ui/pll_trainer.py、ui/custom_trainer.py）只负责显示和计时，
+模拟器、基准和命令行脚本可以直接驱动同一套逻辑。
+
+    s = CustomSession()
+    s.reset()                      # 准备新一轮：整轮出牌顺序已算好（s.plan）
+    s.begin()
+    while not s.done:
+        path, pll, color, state = s.advance()
+        s.record(t, ok)
+    s.finish()                     # 本轮结束：遗忘 + 落盘
+
+随机性全部来自注入的 rng（默认 random.Random(seed)，seed 取 PLL_SEED 或随机）：
+每轮 reset() 从 rng 取一个种子，本轮抽牌只用 round_rng = Random(种子)，
+所以单独一轮也能按种子重放（录制 / 回放见 core/replay.py）。
+"""
+
+import abc
+import random
+from typing import List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from core import cases, planner, replay, subsets
+from core import config as cfg
+from core.stat_store import StatStore
+from core.subsets import CaseSet
+from core.svg_scanner import build_standard_test_list, card, case_set
+from core.weight_manager import WeightManager
+
+Card = Tuple[str, str, int, int]        # (path, pll, color, state)，与 scan_all_svg 一致
+
+# immediate 模式的轮中重排（见 CustomSession._replan）
+REPLAN_KEEP = 2         # 接下来这几张不动：界面已经在预渲染（不小于 ui.card_view.PREFETCH_AHEAD）
+REPLAN_MIN_CARDS = 0.5  # 按新权重，后面某个 case 的期望张数至少差这么多才重排
+
+
+class Attempt(NamedTuple):
+    card: Card
+    time: float
+    ok: bool
+
+
+class Session(abc.ABC):
+    """一轮训练的公共部分：按计划出牌、记录结果、汇总；子类决定计划"""
+    KIND = ''                           # 录制文件里的类型名
+
+    def __init__(self, store: StatStore = None, rng: random.Random = None, seed: int = None):
+        self.store = store or StatStore.shared()
+        if rng is None:
+            rng = random.Random(seed if seed is not None else replay.default_seed())
+        self.rng = rng                  # 只用来给每轮取种子
+        self.seed: Optional[int] = None  # 本轮的种子
+        self.round_rng = random.Random()
+        self.recorder = replay.Recorder.auto()     # 设置了 PLL_RECORD 才有
+        self._finished = False
+        self.plan: List[Card] = []      # 本轮全部要出的牌，按顺序
+        self.idx = 0                    # 已出的张数
+        self.current: Optional[Card] = None
+        self.records: List[Attempt] = []
+        self.started = False
+        self.notice: Optional[str] = None   # 本轮开局要提示用户的话（如子集为空），界面负责显示
+
+    # ---------- 子类实现 ----------
+    @abc.abstractmethod
+    def _plan(self) -> List[Card]:
+        """算出新一轮的出牌顺序"""
+
+    def _digest(self) -> Optional[str]:
+        """录制用的权重指纹；没有权重的训练为 None"""
+        return None
+
+    def _log(self, name: str, **fields):
+        if self.recorder is not None:
+            self.recorder.event(name, **fields)
+
+    # ---------- 流程 ----------
+    def reset(self, seed: int = None):
+        """回到未开始状态，并算好整轮的出牌顺序；seed 给定时用它（回放），否则从 rng 取"""
+        self.records.clear()
+        self.idx = 0
+        self.current = None
+        self.started = False
+        self._finished = False
+        self.notice = None
+        self.seed = seed if seed is not None else self.rng.getrandbits(63)
+        self.round_rng.seed(self.seed)
+        if self.recorder is not None:
+            self.recorder.start(self)   # 排计划之前：记下当时的权重
+        self.plan = self._plan()
+        self._log('plan', n=self.total)
+
+    def begin(self):
+        self.started = True
+        self.store.begin_session()
+        self._log('begin')
+
+    @property
+    def total(self) -> int:
+        return len(self.plan)
+
+    @property
+    def done(self) -> bool:
+        return self.idx >= self.total
+
+    @property
+    def upcoming(self) -> Optional[Card]:
+        """下一张，界面据此预渲染"""
+        return self.plan[self.idx] if self.idx < self.total else None
+
+    def peek(self, n: int) -> List[Card]:
+        """接下来的 n 张（不含当前）"""
+        return self.plan[self.idx:self.idx + n]
+
+    def advance(self) -> Card:
+        """换到下一张"""
+        self.current = self.plan[self.idx]
+        self.idx += 1
+        if self.recorder is not None:
+            _, pll, color, state = self.current
+            self._log('advance', case=cases.case_id(pll, state, color))
+        return self.current
+
+    def record(self, t: float, ok: bool, ts: float = None, latency: float = 0.0,
+               key: str = None) -> Attempt:
+        """记录当前这张的第一次作答；key 为按下的键，只进录制时间线"""
+        attempt = self._record(t, ok, ts, latency)
+        if self.recorder is not None:
+            self._log('record', t=t, ok=ok, ts=ts, latency=latency, key=key,
+                      weights=self._digest())
+        return attempt
+
+    def _record(self, t: float, ok: bool, ts: float, latency: float) -> Attempt:
+        path, pll, color, state = self.current
+        self.store.push(pll, state, t, ok, color=color, ts=ts, latency=latency)
+        attempt = Attempt(self.current, t, ok)
+        self.records.append(attempt)
+        return attempt
+
+    def keystroke(self, key: str):
+        """作答之外的按键（答错后补按正确键等），只进录制时间线"""
+        self._log('key', key=key)
+
+    def finish(self):
+        """本轮结束"""
+        self._finished = True           # 下面的 flush 属于结束，不单独记
+        self.flush()
+        if self.recorder is not None:
+            self._log('finish', weights=self._digest())
+            self.recorder.save()
+
+    def flush(self):
+        """把后台尚未写出的数据立即落盘"""
+        self.store.flush()
+        if self.recorder is not None and self.started and not self._finished:
+            self._log('flush')          # 中途退出：已答的部分也存下来
+            self.recorder.save()
+
+    # ---------- 汇总 ----------
+    @property
+    def correct_count(self) -> int:
+        return sum(a.ok for a in self.records)
+
+    def average_time(self) -> float:
+        """正确作答的平均用时"""
+        return sum(a.time for a in self.records if a.ok) / max(self.correct_count, 1)
+
+    def ranked(self) -> List[Attempt]:
+        """错误在前，其余按用时从长到短"""
+        return sorted(self.records, key=lambda a: (a.ok, -a.time if a.ok else 0.0))
+
+
+# ---------- 标准训练 ----------
+class StandardSession(Session):
+    """每个 (pll, state) 随机一个颜色，打乱后各出一次；subset 给定时只出其中的 case"""
+    KIND = 'standard'
+
+    def __init__(self, store: StatStore = None, rng: random.Random = None, seed: int = None,
+                 subset: CaseSet = None):
+        super().__init__(store, rng, seed)
+        self.subset = subset
+
+    def _plan(self) -> List[Card]:
+        return build_standard_test_list(self.round_rng, self.subset)
+
+
+# ---------- 权重训练 ----------
+class CustomSession(Session):
+    """
+    每轮开局按当时的权重一次排好 count 张（没训练过的 case 权重为 1，
+    所以还没有权重时就是均匀抽）；重复与间隔规则见 core.planner。
+    cfg.WEIGHT_UPDATE 为 'immediate' 时每答一张改一次权重，权重变化够大时按新权重重排
+    本轮后面的牌（已出的计入重复上限和间隔，已预渲染的几张不动）；为 'batch' 时攒到本轮结束
+    连同遗忘一次算完；每轮结束权重遗忘。
+    只在 drill 子集（见 core.subsets）里抽：subset 为表达式或 CaseSet，None 表示每轮读 cfg.DRILL；
+    换子集只是一次位运算，不用重新扫描。
+    """
+
+    KIND = 'custom'
+
+    def __init__(self, wm: WeightManager = None, store: StatStore = None,
+                 count: int = None, rng: random.Random = None, seed: int = None, subset=None):
+        super().__init__(store, rng, seed)
+        self.wm = wm or WeightManager()
+        self.count = count              # None 表示每轮读 cfg.CUSTOM_TRAIN_COUNT
+        self.subset = subset
+        self._pending: List[Tuple[int, bool, float]] = []   # batch 模式下本轮还没应用的作答
+        self._ids = np.empty(0, dtype=np.int64)     # 本轮的候选 case id
+        self._seq: List[int] = []                   # 本轮计划的 case id，与 plan 一一对应
+        self._planned_w = np.empty(0)               # 上次排计划时候选的权重，判断要不要重排
+
+    def candidates(self) -> CaseSet:
+        """本轮可以抽的 case：有图、未被排除、且在 drill 子集里；子集为空时退回全部"""
+        usable = case_set(validate=False)   # 内存索引，不碰磁盘
+        sel = subsets.compile(cfg.DRILL if self.subset is None else self.subset)
+        chosen = usable & sel.resolve(self.wm.weights)
+        if not chosen:
+            self.notice = f"练习范围 {sel.expr or '（自定义）'} 里没有可用的 case，本轮改练全部"
+            return usable
+        return chosen
+
+    def _plan(self) -> List[Card]:
+        self._ids = self.candidates().ids()
+        self._seq = self._draw(self.count or cfg.CUSTOM_TRAIN_COUNT)
+        return [card(cid) for cid in self._seq]
+
+    def _draw(self, n: int, drawn: List[int] = ()) -> List[int]:
+        ids = self._ids
+        self._planned_w = self.wm.weights()[ids]
+        return planner.plan_round(ids, self._planned_w, n, self.round_rng,
+                                  replace=cfg.ROUND_REPLACE, max_repeats=cfg.ROUND_MAX_REPEATS,
+                                  min_gap=cfg.ROUND_MIN_GAP, drawn=drawn)
+
+    def _replan(self):
+        """
+        immediate 模式：权重变化让后面某个 case 的期望张数变了 REPLAN_MIN_CARDS 以上才重排，
+        且只排 REPLAN_KEEP 张之后的部分，总张数不变。候选多时一次作答影响很小，多数时候什么都不做。
+        """
+        start = self.idx + REPLAN_KEEP
+        if start >= self.total or not len(self._ids):
+            return
+        w = self.wm.weights()[self._ids]
+        shift = np.abs(w / w.sum() - self._planned_w / self._planned_w.sum()).max()
+        if shift * (self.total - start) < REPLAN_MIN_CARDS:
+            return
+        seq = self._draw(self.total - start, self._seq[:start])
+        self._seq[start:] = seq
+        self.plan[start:] = [card(cid) for cid in seq]
+
+    def _digest(self) -> Optional[str]:
+        return replay.weights_digest(self.wm.array())
+
+    def _record(self, t: float, ok: bool, ts: float, latency: float) -> Attempt:
+        if not ok:
+            t = 0.0
+        attempt = super()._record(t, ok, ts, latency)
+        path, pll, color, state = self.current
+        if cfg.WEIGHT_UPDATE == 'batch':
+            self._pending.append((cases.case_id(pll, state, color), ok, t))
+        else:
+            self.wm.update(pll=pll, state=state, color=color, is_correct=ok, time_taken=t)
+            self._replan()
+        return attempt
+
+    def finish(self):
+        if self._pending:
+            self.wm.update_batch(self._pending, forget=True)    # 更新 + 全局权重衰减一次完成
+            self._pending.clear()
+        else:
+            self.wm.forget()            # 全局权重衰减
+        super().finish()
+
+    def flush(self):
+        if self._pending:               # 中途退出：已答的照样算进权重，但不遗忘
+            self.wm.update_batch(self._pending)
+            self._pending.clear()
+        super().flush()
+        self.wm.flush()
@@ -0,0 +1,194 @@
+# core/settings.py
+"""
+可调参数：带类型、范围校验的字段表，改动即时写回 core.config 的模块属性（业务代码照旧读 cfg.X），
+通知订阅者，并由 persist 后台线程原子写入 resources/settings.json。
+
+config.py 里写的值是默认值；settings.json 只是覆盖。
+
+    from core import settings
+    settings.set('LAMBDA', 0.5)                 # 校验 → cfg.LAMBDA = 0.5 → 通知 → 登记写盘
+    settings.subscribe(on_change)               # on_change(changed: Set[str])
+"""
+
+import json
+import os
+import weakref
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Set, Tuple
+
+from core import persist
+
+SETTINGS_FILE = os.path.join(os.path.dirname(__file__), '..', 'resources', 'settings.json')
+_VERSION = 1
+
+Listener = Callable[[Set[str]], None]   # 参数为有变化的字段名
+
+
+class Field(NamedTuple):
+    name: str               # 即 cfg 里的属性名
+    type: type              # int / float / bool / str
+    label: str = ''         # 设置页上的名字；空的不出现在设置页
+    min: Optional[float] = None
+    max: Optional[float] = None
+    step: Optional[float] = None    # 设置页滑块步长；float 字段按它取整
+    choices: Tuple = ()
+    optional: bool = False  # 允许 None
+    check: Optional[Callable[[Any], None]] = None   # 额外校验，不合法抛 ValueError
+
+
+def _check_drill(expr: str):
+    from core import subsets    # subsets 依赖 config，这里延迟导入
+    subsets.compile(expr)
+
+
+FIELDS: Tuple[Field, ...] = (
+    # ---------- 设置页 ----------
+    Field('FORGET_RATE', float, '遗忘率', 0.9, 1.0, 0.01),
+    Field('COLOR_SYNC_FACTOR', float, '颜色同步因子', 0.9, 1.0, 0.01),
+    Field('CUSTOM_TRAIN_COUNT', int, '定制训练每轮张数', 10, 100, 10),
+    Field('NEXT_DELAY_MS', int, '下一张图延迟（毫秒）', 0, 1000, 100),
+    Field('LAMBDA', float, '全局收敛速度', 0.1, 1.0, 0.1),
+    # ---------- 不在设置页上（settings.json 或其他页面里改） ----------
+    Field('CASE_MIN', float, min=0.01, max=1.0),
+    Field('CASE_MAX', float, min=1.0, max=100.0),
+    Field('TIME_MAX', float, min=1.0, max=60.0),
+    Field('ROUND_REPLACE', bool),
+    Field('ROUND_MAX_REPEATS', int, min=1, max=100, optional=True),
+    Field('ROUND_MIN_GAP', int, min=0, max=20),
+    Field('WEIGHT_UPDATE', str, choices=('immediate', 'batch')),
+    Field('DRILL', str, check=_check_drill),
+    Field('PROCEDURAL', bool),
+)
+_BY_NAME: Dict[str, Field] = {f.name: f for f in FIELDS}
+
+_listeners: List[Any] = []      # 绑定方法存弱引用，训练器 / 临时 WeightManager 销毁后自动失效
+_defaults: Dict[str, Any] = {}
+
+
+def _cfg():
+    from core import config     # config.py 末尾会导入本模块，这里延迟取
+    return config
+
+
+# ---------- 校验 ----------
+def validate(name: str, value: Any) -> Any:
+    """按字段类型转换并检查范围，返回规整后的值；不合法抛 ValueError"""
+    try:
+        f = _BY_NAME[name]
+    except KeyError:
+        raise ValueError(f"未知的设置项：{name}") from None
+    if value is None:
+        if f.optional:
+            return None
+        raise ValueError(f"{name} 不能为空")
+    if f.type is bool:
+        if not isinstance(value, bool):
+            raise ValueError(f"{name} 应为 true / false：{value!r}")
+    elif f.type is str:
+        value = str(value)
+    else:
+        try:
+            value = f.type(round(float(value))) if f.type is int else float(value)
+        except (TypeError, ValueError):
+            raise ValueError(f"{name} 应为数字：{value!r}") from None
+        if f.type is float and f.step:
+            value = round(round(value / f.step) * f.step, 10)     # 0.9500000001 → 0.95
+        if (f.min is not None and value < f.min) or (f.max is not None and value > f.max):
+            raise ValueError(f"{name} 超出范围 [{f.min}, {f.max}]：{value}")
+    if f.choices and value not in f.choices:
+        raise ValueError(f"{name} 只能是 {'/'.join(f.choices)}：{value!r}")
+    if f.check is not None:
+        f.check(value)
+    return value
+
+
+# ---------- 读写 ----------
+def fields(ui: bool = False) -> Tuple[Field, ...]:
+    """全部字段；ui=True 只要设置页上显示的"""
+    return tuple(f for f in FIELDS if f.label) if ui else FIELDS
+
+
+def get(name: str) -> Any:
+    return getattr(_cfg(), _BY_NAME[name].name)
+
+
+def values() -> Dict[str, Any]:
+    return {f.name: get(f.name) for f in FIELDS}
+
+
+def default(name: str) -> Any:
+    return _defaults[name]
+
+
+def update(changes: Dict[str, Any], save: bool = True) -> Set[str]:
+    """校验全部改动后一起生效，只通知值真的变了的字段；返回这些字段名"""
+    checked = {name: validate(name, v) for name, v in changes.items()}
+    cfg = _cfg()
+    changed = {name for name, v in checked.items() if getattr(cfg, name) != v}
+    for name in changed:
+        setattr(cfg, name, checked[name])
+    if changed:
+        if save:
+            persist.mark_dirty(SETTINGS_FILE, _dump)
+        _notify(changed)
+    return changed
+
+
+def set(name: str, value: Any, save: bool = True) -> bool:
+    """改一个字段；值没变时什么都不做。返回是否有变化"""
+    return bool(update({name: value}, save))
+
+
+def reset(save: bool = True) -> Set[str]:
+    """全部恢复成 config.py 里的默认值"""
+    return update(dict(_defaults), save)
+
+
+def _dump() -> str:
+    """只写与 config.py 默认值不同的字段，以后改默认值对没动过它的用户照样生效"""
+    changed = {name: v for name, v in values().items() if v != _defaults.get(name)}
+    return json.dumps({'version': _VERSION, 'values': changed}, ensure_ascii=False, indent=2)
+
+
+def flush():
+    """立即把设置写到磁盘"""
+    persist.flush(SETTINGS_FILE)
+
+
+def load(path: str = SETTINGS_FILE):
+    """读 settings.json 覆盖默认值（不通知、不写回）；不合法的项打印后跳过"""
+    cfg = _cfg()
+    if not _defaults:
+        _defaults.update({f.name: getattr(cfg, f.name) for f in FIELDS})
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return
+    except (OSError, ValueError) as e:
+        print(f"读取 {path} 失败，使用默认设置：{e}")
+        return
+    for name, value in data.get('values', {}).items():
+        try:
+            setattr(cfg, name, validate(name, value))
+        except ValueError as e:
+            print(f"忽略设置：{e}")
+
+
+# ---------- 通知 ----------
+def subscribe(listener: Listener):
+    """listener(changed) 在字段变化后调用；绑定方法只存弱引用"""
+    ref = weakref.WeakMethod(listener) if hasattr(listener, '__self__') else (lambda: listener)
+    _listeners.append(ref)
+
+
+def unsubscribe(listener: Listener):
+    _listeners[:] = [r for r in _listeners if r() is not None and r() != listener]
+
+
+def _notify(changed: Set[str]):
+    for ref in list(_listeners):
+        listener = ref()
+        if listener is None:
+            _listeners.remove(ref)
+        else:
+            listener(changed)
@@ -0,0 +1,198 @@
+# core/simulate.py
+"""
+无界面的训练模拟器：用合成的"答题者"驱动 WeightManager 和 StatStore，
+看权重算法多少轮能把所有 case 练到掌握、抽样是否真的偏向难的 case。
+不需要显示器，也不碰 resources 下的真实数据（全部写进临时目录）。
+
+用法：
+    python -m core.simulate                           # 默认参数跑 200 轮
+    python -m core.simulate --rounds 100 --seed 1 -v  # -v 打印每轮平均掌握值
+    python -m core.simulate --lambda 0.5,1 --forget 0.9,1 --sync 0.5,1   # 参数网格对比
+    python -m core.simulate --mode immediate,batch    # 对比两种权重更新时机
+"""
+
+import argparse
+import itertools
+import math
+import os
+import random
+import shutil
+import tempfile
+from collections import Counter
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from core import cases, persist, settings
+from core import config as cfg
+from core.session import CustomSession
+from core.stat_store import StatStore
+from core.weight_manager import WeightManager
+
+MASTERY_GOAL = 80.0     # 每个 (pll, state) 的掌握值都达到它，才算"练会"
+
+
+# ---------- 合成答题者 ----------
+class SyntheticSolver:
+    """
+    每个 case 一个对数正态的反应时间分布和一个错误率。
+    难度按 (pll, state) 给，同一 case 的 4 个颜色只差一点；
+    每答一次，该 case 的中位时间和错误率按 learn 的比例向下限靠近（学习曲线）。
+    """
+
+    def __init__(self, rng: random.Random, time_range: Tuple[float, float] = (0.8, 6.0),
+                 error_range: Tuple[float, float] = (0.02, 0.4), sigma: float = 0.3,
+                 learn: float = 0.05, floor: float = 0.6):
+        self.rng = rng
+        self.sigma = sigma
+        self.learn = learn
+        self.floor = floor
+        key_difficulty = np.array([rng.random() for _ in range(cases.N_KEYS)])
+        self.difficulty = np.repeat(key_difficulty, cases.N_COLORS)    # 下标为 case id
+        jitter = np.array([rng.uniform(0.9, 1.1) for _ in range(cases.N_CASES)])
+        lo, hi = time_range
+        self.median = (lo + (hi - lo) * self.difficulty) * jitter
+        lo, hi = error_range
+        self.error = lo + (hi - lo) * self.difficulty
+
+    def attempt(self, cid: int) -> Tuple[float, bool]:
+        """答一次 case id，返回 (用时, 是否正确)"""
+        ok = self.rng.random() >= self.error[cid]
+        t = self.rng.lognormvariate(math.log(self.median[cid]), self.sigma)
+        self.median[cid] = self.floor + (self.median[cid] - self.floor) * (1 - self.learn)
+        self.error[cid] *= 1 - self.learn
+        return t, ok
+
+
+# ---------- 环境 ----------
+@contextmanager
+def sandbox() -> Iterator[Tuple[WeightManager, StatStore]]:
+    """临时目录里的一对全新 WeightManager / StatStore，退出时落盘并删除"""
+    tmp = tempfile.mkdtemp(prefix='pll-sim-')
+    try:
+        wm = WeightManager(os.path.join(tmp, 'weights.json'))
+        store = StatStore(log_file=os.path.join(tmp, 'attempts.bin'),
+                          legacy_file=os.path.join(tmp, 'stat.json'))
+        yield wm, store
+    finally:
+        persist.flush()
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+@contextmanager
+def overrides(**params):
+    """
+    临时改参数（LAMBDA=…），退出时还原。settings 里有的字段走 settings.update：
+    校验范围、通知订阅者（扫描索引、StatStore 等跟着刷新），但不写盘；
+    其余（如 EXCLUDE_RULES）直接改 cfg。值不合法时抛 ValueError，什么都不改。
+    """
+    fields = {f.name for f in settings.fields()}
+    tracked = {k: v for k, v in params.items() if k in fields}
+    plain = {k: v for k, v in params.items() if k not in fields}
+    for k, v in tracked.items():
+        settings.validate(k, v)
+    old_plain = {k: getattr(cfg, k) for k in plain}
+    old_tracked = {k: settings.get(k) for k in tracked}
+    try:
+        for k, v in plain.items():
+            setattr(cfg, k, v)
+        settings.update(tracked, save=False)
+        yield
+    finally:
+        for k, v in old_plain.items():
+            setattr(cfg, k, v)
+        settings.update(old_tracked, save=False)
+
+
+# ---------- 模拟 ----------
+class Result(NamedTuple):
+    params: Dict[str, float]
+    rounds_to_mastery: Optional[int]    # None 表示没练会
+    mean_mastery: List[float]           # 每轮结束后 84 个 key 的平均掌握值
+    draws: Counter                      # case id -> 被抽中次数
+    difficulty: np.ndarray              # case id -> 答题者的初始难度
+
+    def draw_bias(self) -> float:
+        """抽中次数与难度的相关系数：越接近 1 越会盯着难的练"""
+        counts = np.array([self.draws.get(i, 0) for i in range(cases.N_CASES)], dtype=float)
+        if counts.std() == 0:
+            return 0.0
+        return float(np.corrcoef(counts, self.difficulty)[0, 1])
+
+
+def run(rounds: int = 200, seed: int = 0, count: int = None, **params) -> Result:
+    """
+    用 CustomTrainer 背后的同一个 CustomSession 跑 rounds 轮：
+    还没有权重时均匀抽，有了之后按权重抽；每张 push + update，每轮结束 forget。
+    params 为临时覆盖的 cfg 参数，如 LAMBDA=0.5。
+    """
+    rng = random.Random(seed)
+    solver = SyntheticSolver(rng)
+    count = count or cfg.CUSTOM_TRAIN_COUNT
+    draws: Counter = Counter()
+    mean_mastery: List[float] = []
+    first = None
+
+    with overrides(**params), sandbox() as (wm, store):
+        session = CustomSession(wm, store, count=count, rng=rng)
+        for r in range(rounds):
+            session.reset()
+            while not session.done:
+                path, pll, color, state = session.advance()
+                cid = cases.case_id(pll, state, color)
+                t, ok = solver.attempt(cid)
+                session.record(t, ok, ts=0.0)
+                draws[cid] += 1
+            session.finish()
+            mastery = np.array([v['mastery'] for v in store.snapshot().values()])
+            mean_mastery.append(float(mastery.mean()))
+            if first is None and mastery.min() >= MASTERY_GOAL:
+                first = r + 1
+
+    return Result(dict(params), first, mean_mastery, draws, solver.difficulty)
+
+
+# ---------- 命令行 ----------
+def _floats(text: str) -> List[float]:
+    return [float(x) for x in text.split(',')]
+
+
+def _report(res: Result, verbose: bool):
+    p = res.params
+    rounds = res.rounds_to_mastery if res.rounds_to_mastery is not None else '未练会'
+    print(f"λ={p['LAMBDA']:.2f} 遗忘={p['FORGET_RATE']:.2f} 同步={p['COLOR_SYNC_FACTOR']:.2f} "
+          f"{p['WEIGHT_UPDATE']} | "
+          f"练会轮数 {rounds} | 最终平均掌握 {res.mean_mastery[-1]:.1f} | "
+          f"抽样-难度相关 {res.draw_bias():.2f}")
+    if verbose:
+        for i, m in enumerate(res.mean_mastery, 1):
+            print(f"  第 {i:3d} 轮  平均掌握 {m:5.1f}")
+        by_pll = Counter()
+        for cid, n in res.draws.items():
+            by_pll[cases.by_id(cid).pll] += n
+        print("  抽得最多的 PLL：" + '，'.join(f"{k} {v}" for k, v in by_pll.most_common(5)))
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description='无界面模拟训练，评估权重参数')
+    ap.add_argument('--rounds', type=int, default=200)
+    ap.add_argument('--seed', type=int, default=0)
+    ap.add_argument('--count', type=int, default=None, help='每轮张数，默认 CUSTOM_TRAIN_COUNT')
+    ap.add_argument('--lambda', dest='lam', type=_floats, default=[cfg.LAMBDA])
+    ap.add_argument('--forget', type=_floats, default=[cfg.FORGET_RATE])
+    ap.add_argument('--sync', type=_floats, default=[cfg.COLOR_SYNC_FACTOR])
+    ap.add_argument('--mode', type=lambda s: s.split(','), default=[cfg.WEIGHT_UPDATE],
+                    help='权重更新时机 immediate / batch，可逗号分隔对比')
+    ap.add_argument('-v', '--verbose', action='store_true')
+    args = ap.parse_args(argv)
+
+    for lam, forget, sync, mode in itertools.product(args.lam, args.forget, args.sync, args.mode):
+        res = run(args.rounds, args.seed, args.count,
+                  LAMBDA=lam, FORGET_RATE=forget, COLOR_SYNC_FACTOR=sync, WEIGHT_UPDATE=mode)
+        _report(res, args.verbose)
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
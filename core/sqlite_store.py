@@ -0,0 +1,374 @@
+# core/sqlite_store.py
+"""
+SQLite 存储后端：一个库里按 profile 分开存权重和答题记录，多人共用一台机器、
+同时开多个实例都安全（WAL：读写互不阻塞，写入之间由 SQLite 排队）。
+
+    profiles(id, name, imported)
+    weights(profile, pll, state, color, weight)     主键 (profile, pll, state, color)，按行 upsert
+    attempts(id, profile, pll, state, color, time, ok, latency, session, ts)
+                                                    索引 (profile, pll, state, color)
+
+权重只写改动过的行，记录只追加；两个实例各写各的行，不会整表互相覆盖。
+写入和文件后端一样走 persist 的后台写线程；库被别的实例锁住时转成 OSError，由 persist 稍后重试。
+构造 SqliteWeights / SqliteLog 只读库，新 profile 的那一行等第一次写入时才建，
+所以库被锁住时界面照常打开。
+
+用法（把旧文件导入某个 profile；default 在第一次打开时会自动导入）：
+    python -m core.sqlite_store --import --profile alice
+    python -m core.sqlite_store --list
+"""
+
+import argparse
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from core import cases, persist
+from core import config as cfg
+from core.attempt_log import CHUNK, DTYPE, Attempt, pll_id
+
+DB_FILE = os.path.join(os.path.dirname(__file__), '..', 'resources', 'pll.db')
+BUSY_TIMEOUT = 5.0      # 秒：别的实例正在写时最多等这么久
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS profiles (
+    id       INTEGER PRIMARY KEY,
+    name     TEXT NOT NULL UNIQUE,
+    imported INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS weights (
+    profile INTEGER NOT NULL REFERENCES profiles(id),
+    pll     TEXT    NOT NULL,
+    state   INTEGER NOT NULL,
+    color   INTEGER NOT NULL,
+    weight  REAL    NOT NULL,
+    PRIMARY KEY (profile, pll, state, color)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS attempts (
+    id      INTEGER PRIMARY KEY,
+    profile INTEGER NOT NULL REFERENCES profiles(id),
+    pll     TEXT    NOT NULL,
+    state   INTEGER NOT NULL,
+    color   INTEGER NOT NULL,
+    time    REAL    NOT NULL,
+    ok      INTEGER NOT NULL,
+    latency REAL    NOT NULL DEFAULT 0,
+    session INTEGER NOT NULL DEFAULT 0,
+    ts      REAL    NOT NULL
+);
+CREATE INDEX IF NOT EXISTS attempts_case ON attempts (profile, pll, state, color);
+"""
+_UPSERT_WEIGHT = ('INSERT INTO weights (profile, pll, state, color, weight) VALUES (?, ?, ?, ?, ?) '
+                  'ON CONFLICT (profile, pll, state, color) DO UPDATE SET weight = excluded.weight')
+_INSERT_ATTEMPT = ('INSERT INTO attempts (profile, pll, state, color, time, ok, latency, session, ts) '
+                   'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)')
+
+
+# ---------- 连接 ----------
+class Database:
+    """一个库文件一个连接，GUI 线程和后台写线程共用，用锁串行化"""
+    _open: Dict[str, 'Database'] = {}
+
+    @classmethod
+    def open(cls, path: str = DB_FILE) -> 'Database':
+        path = os.path.abspath(path)
+        if path not in cls._open:
+            cls._open[path] = cls(path)
+        return cls._open[path]
+
+    def __init__(self, path: str):
+        self.path = os.path.abspath(path)
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')     # WAL 下断电最多丢最后一个事务
+        self.conn.executescript(_SCHEMA)
+
+    def query(self, sql: str, args: Sequence = ()) -> List[tuple]:
+        with self._lock:
+            return self.conn.execute(sql, args).fetchall()
+
+    def write(self, sql: str, rows: Sequence[Sequence] = ((),)):
+        """一个事务里执行；被锁住等超时转成 OSError，让 persist 重试"""
+        self.write_many([(sql, rows)])
+
+    def write_many(self, steps: Sequence[Tuple[str, Sequence[Sequence]]]):
+        """多条 (sql, rows) 放在同一个事务里，要么全部生效要么都不生效；出错一律转成 OSError"""
+        with self._lock:
+            try:
+                with self.conn:
+                    for sql, rows in steps:
+                        self.conn.executemany(sql, rows)
+            except sqlite3.Error as e:
+                raise OSError(f"{self.path}：{e}") from e
+
+    def find_profile(self, name: str) -> Optional[int]:
+        """只读；profile 还不存在时返回 None"""
+        rows = self.query('SELECT id FROM profiles WHERE name = ?', (name,))
+        return rows[0][0] if rows else None
+
+    def profile_id(self, name: str) -> int:
+        """profile 的 id，不存在就建（会写库，放在后台写线程或命令行里调用）"""
+        pid = self.find_profile(name)
+        if pid is None:
+            self.write('INSERT OR IGNORE INTO profiles (name) VALUES (?)', [(name,)])
+            pid = self.find_profile(name)
+        return pid
+
+    def profiles(self) -> List[str]:
+        return [r[0] for r in self.query('SELECT name FROM profiles ORDER BY name')]
+
+
+# ---------- 权重 ----------
+class _Profile:
+    """按名字找 profile 的 id：读的时候没有就当空的，第一次写时才建"""
+
+    def __init__(self, profile: str, path: str):
+        self.db = Database.open(path)
+        self.profile = profile
+        self._pid = self.db.find_profile(profile)
+
+    @property
+    def pid(self) -> Optional[int]:
+        """只读用：还没建时为 None，查询结果为空"""
+        return self._pid
+
+    def _write_pid(self) -> int:
+        if self._pid is None:
+            self._pid = self.db.profile_id(self.profile)
+        return self._pid
+
+
+class SqliteWeights(_Profile):
+    """WeightManager 的后端：只 upsert / 删除改动过的 case"""
+
+    def __init__(self, profile: str, path: str = DB_FILE):
+        super().__init__(profile, path)
+        self.key = f'{self.db.path}#weights/{profile}'     # persist 按它合并写盘
+
+    def load(self) -> np.ndarray:
+        """按 case id 排的权重，未训练为 nan"""
+        w = np.full(cases.N_CASES, np.nan)
+        for pll, state, color, weight in self.db.query(
+                'SELECT pll, state, color, weight FROM weights WHERE profile = ?', (self.pid,)):
+            try:
+                w[cases.case_id(pll, state, color)] = weight
+            except KeyError:
+                continue                # 已不存在的 PLL
+        return w
+
+    def write(self, ids: np.ndarray, w: np.ndarray):
+        """ids 为改动过的 case id，w 为全部权重（nan 表示删掉这一行）"""
+        pid = self._write_pid()
+        up, gone = [], []
+        for cid in ids.tolist():
+            c = cases.by_id(cid)
+            if np.isnan(w[cid]):
+                gone.append((pid, c.pll, c.state, c.color))
+            else:
+                up.append((pid, c.pll, c.state, c.color, float(w[cid])))
+        # 同一个事务：中途崩溃不会留下一半新、一半旧的权重表
+        self.db.write_many([
+            (_UPSERT_WEIGHT, up),
+            ('DELETE FROM weights WHERE profile = ? AND pll = ? AND state = ? AND color = ?', gone),
+        ])
+
+
+# ---------- 答题记录 ----------
+def _attempt_row(pll: str, state: int, color: int, time_taken: float, ok: bool,
+                 session: int = 0, ts: float = None, latency: float = 0.0) -> tuple:
+    """attempts 表除 profile 外的一行：(pll, state, color, time, ok, latency, session, ts)"""
+    pll_id(pll)                         # 未知 PLL 立即报错，和文件后端一致
+    return (pll, state, color, float(time_taken), int(bool(ok)), float(latency),
+            session, time.time() if ts is None else ts)
+
+
+class SqliteLog(_Profile):
+    """与 AttemptLog 同样的接口；追加先进内存缓冲，由后台写线程一个事务批量插入"""
+    _logs: Dict[str, 'SqliteLog'] = {}
+
+    @classmethod
+    def open(cls, profile: str, path: str = DB_FILE) -> 'SqliteLog':
+        key = f'{os.path.abspath(path)}#attempts/{profile}'
+        if key not in cls._logs:
+            cls._logs[key] = cls(profile, path)
+        return cls._logs[key]
+
+    def __init__(self, profile: str, path: str = DB_FILE):
+        super().__init__(profile, path)
+        self.path = f'{self.db.path}#attempts/{profile}'   # persist 按它合并写盘
+        self._buf: List[tuple] = []
+        self._lock = threading.Lock()
+
+    # ---------- 写 ----------
+    def append(self, pll: str, state: int, color: int, time_taken: float, ok: bool,
+               session: int = 0, ts: float = None, latency: float = 0.0):
+        row = _attempt_row(pll, state, color, time_taken, ok, session, ts, latency)
+        with self._lock:
+            self._buf.append(row)
+        persist.schedule(self.path, self._write_pending)
+
+    def _write_pending(self):
+        with self._lock:
+            rows = list(self._buf)
+        if not rows:
+            return
+        pid = self._write_pid()
+        self.db.write(_INSERT_ATTEMPT, [(pid,) + r for r in rows])
+        with self._lock:
+            del self._buf[:len(rows)]
+
+    def flush(self):
+        persist.flush(self.path)
+
+    def clear(self):
+        """删除本 profile 的全部记录（包括尚未落盘的）"""
+        with self._lock:
+            self._buf.clear()
+        self.flush()
+        self.db.write('DELETE FROM attempts WHERE profile = ?', [(self.pid,)])
+
+    # ---------- 读 ----------
+    _COLUMNS = 'ts, session, pll, state, color, time, latency, ok'
+
+    def _pending_rows(self) -> List[tuple]:
+        with self._lock:
+            return [(r[7], r[6], r[0], r[1], r[2], r[3], r[5], r[4]) for r in self._buf]
+
+    def _rows(self) -> List[tuple]:
+        """(ts, session, pll, state, color, time, latency, ok)，按写入顺序，含缓冲"""
+        rows = self.db.query(f'SELECT {self._COLUMNS} FROM attempts WHERE profile = ? '
+                             'ORDER BY id', (self.pid,))
+        return rows + self._pending_rows()
+
+    def array(self) -> np.ndarray:
+        """全部记录读成与 AttemptLog.array() 相同的 DTYPE 结构化数组"""
+        return _to_array(self._rows())
+
+    def iter_chunks(self, rows: int = CHUNK) -> Iterator[np.ndarray]:
+        """按写入顺序分页读出（按 id 翻页，每页一个短查询，不长时间占着连接）"""
+        last = 0
+        while True:
+            page = self.db.query(f'SELECT id, {self._COLUMNS} FROM attempts '
+                                 'WHERE profile = ? AND id > ? ORDER BY id LIMIT ?',
+                                 (self.pid, last, rows))
+            if not page:
+                break
+            last = page[-1][0]
+            yield _to_array([r[1:] for r in page])
+        pending = self._pending_rows()
+        if pending:
+            yield _to_array(pending)
+
+    def __iter__(self) -> Iterator[Attempt]:
+        for ts, session, pll, state, color, t, lat, ok in self._rows():
+            yield Attempt(ts, session, pll, state, color, t, bool(ok), lat)
+
+    def __len__(self) -> int:
+        n = self.db.query('SELECT COUNT(*) FROM attempts WHERE profile = ?', (self.pid,))[0][0]
+        with self._lock:
+            return n + len(self._buf)
+
+
+def _to_array(rows: List[tuple]) -> np.ndarray:
+    """(ts, session, pll, state, color, time, latency, ok) 行 → DTYPE 数组，丢掉已不存在的 PLL"""
+    arr = np.zeros(len(rows), DTYPE)
+    if not rows:
+        return arr
+    ts, session, pll, state, color, t, lat, ok = zip(*rows)
+    index = {name: i for i, name in enumerate(cfg.PLL_NAMES)}
+    keep = np.array([p in index for p in pll])  # 已不存在的 PLL 丢掉
+    arr['ts'], arr['session'], arr['state'], arr['color'] = ts, session, state, color
+    arr['pll'] = [index.get(p, 0) for p in pll]
+    arr['time'], arr['latency'], arr['ok'] = t, lat, ok
+    return arr[keep]
+
+
+# ---------- 导入 ----------
+class _Rows:
+    """import_stat_json 用的收集器：append 只攒成 attempts 行，不写库"""
+
+    def __init__(self):
+        self.rows: List[tuple] = []
+
+    def append(self, *args, **kwargs):
+        self.rows.append(_attempt_row(*args, **kwargs))
+
+    def flush(self):
+        pass
+
+
+def needs_import(profile: str, path: str = DB_FILE) -> bool:
+    """只读：profile 还不存在或还没导入过旧文件"""
+    rows = Database.open(path).query('SELECT imported FROM profiles WHERE name = ?', (profile,))
+    return not rows or not rows[0][0]
+
+
+def import_files(profile: str, path: str = DB_FILE, force: bool = False) -> bool:
+    """
+    把文件后端的数据（weights.json、attempts.bin，没有 attempts.bin 时用旧版 stat.json）
+    导入 profile；每个 profile 只导入一次，force 时先清空该 profile 再导入。返回是否导入了。
+    权重、记录和“已导入”标记在同一个事务里写，失败时什么都不留下，抛 OSError。
+    """
+    from core.attempt_log import LOG_FILE, AttemptLog
+    from core.stat_store import StatStore, import_stat_json
+    from core.storage import JsonWeights
+    from core.weight_manager import CFG_FILE
+
+    if not force and not needs_import(profile, path):     # 已导入过：不碰库
+        return False
+    db = Database.open(path)
+    pid = db.profile_id(profile)
+
+    w = JsonWeights(CFG_FILE).load()
+    weights = [(pid, c.pll, c.state, c.color, float(w[c.id]))
+               for c in cases.CASES if not np.isnan(w[c.id])]
+    attempts = _Rows()
+    if os.path.exists(LOG_FILE):
+        for a in AttemptLog.open(LOG_FILE):
+            attempts.append(a.pll, a.state, a.color, a.time, a.ok, session=a.session, ts=a.ts,
+                            latency=a.latency)
+    elif os.path.exists(StatStore._file):
+        import_stat_json(StatStore._file, attempts)
+
+    steps = []
+    if force:                           # 再导入一次是替换，不是追加，否则历史会重复
+        steps += [('DELETE FROM attempts WHERE profile = ?', [(pid,)]),
+                  ('DELETE FROM weights WHERE profile = ?', [(pid,)])]
+    steps += [(_UPSERT_WEIGHT, weights),
+              (_INSERT_ATTEMPT, [(pid,) + r for r in attempts.rows]),
+              ('UPDATE profiles SET imported = 1 WHERE id = ?', [(pid,)])]
+    db.write_many(steps)
+    return True
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description='SQLite 存储：导入旧文件 / 查看 profile')
+    ap.add_argument('--db', default=DB_FILE)
+    ap.add_argument('--profile', default=cfg.PROFILE)
+    ap.add_argument('--import', dest='do_import', action='store_true',
+                    help='把 resources 下的 weights.json / attempts.bin 导入该 profile')
+    ap.add_argument('--force', action='store_true', help='已导入过也再导入一次（先清空该 profile）')
+    ap.add_argument('--list', action='store_true', help='列出全部 profile 及记录条数')
+    args = ap.parse_args(argv)
+
+    if args.do_import:
+        done = import_files(args.profile, args.db, args.force)
+        print(f"{args.profile}：{'已导入' if done else '之前已导入过，跳过（--force 强制）'}")
+    if args.list:
+        db = Database.open(args.db)
+        for name in db.profiles():
+            log = SqliteLog.open(name, args.db)
+            n_w = db.query('SELECT COUNT(*) FROM weights WHERE profile = ?', (log.pid,))[0][0]
+            print(f"{name:16s} 记录 {len(log):6d}   权重 {n_w:4d}")
+    persist.flush()
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
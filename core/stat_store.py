@@ -1,101 +1,205 @@
 # core/stat_store.py
-import json, os
-from collections import deque
-from typing import Dict, Tuple
+import json, os, threading, time
+from typing import Callable, Iterator, List, Mapping, Set
+import numpy as np
 from core import config as cfg
+from core import cases, scoring, settings, storage, trace
+from core.attempt_log import AttemptLog
 
-Record = Tuple[float, bool]          # (time, is_correct)
-Key = Tuple[str, int]                # (pll, state)
+Listener = Callable[[Set[int]], None]    # 参数为有变化的 key id（见 core.cases）
+_LOOP_ROWS = 8      # snapshot：脏行不超过这么多时逐行标量计算，否则整表向量化
 
-# ---------- 工具 ----------
-def _curve_score(t: float) -> float:
-    # if t <= 0.5:
-    if t <= 1:
-    # 1s=100, 2s=80, 3s=60, 8s=0
-        return 100.0
-    if t >= cfg.TIME_MAX:
-        return 0.0
-    a, b, c, d =4 / 21, -8 / 7, -376 / 21, 832 / 7
-    # a, b, c, d = 0.855, -9.915, 34.060, 45.0
-    score = d + c * t + b * t ** 2 + a * t ** 3
-    print(f"t={t:.2f}s -> curve_score={score:.2f}")
-    return max(0.0, min(100.0, score))
 
+def import_stat_json(path: str, log):
+    """把旧版 stat.json 的滚动记录追加进答题记录（无时间戳、颜色）"""
+    with open(path, 'r', encoding='utf-8') as f:
+        raw = json.load(f)
+    for k, v in raw.items():
+        pll, state = k.split('|')
+        if pll not in cfg.PLL_NAMES:
+            continue
+        for t, ok in v:
+            log.append(pll, int(state), 0, t, ok, ts=0.0)
+    log.flush()
+
+
+# ---------- 只读视图 ----------
+class StatsView(Mapping):
+    """key id -> {avg_time, accuracy, mastery}；直接读 StatStore 的结果数组，不复制"""
+
+    def __init__(self, store: 'StatStore'):
+        self._store = store
+
+    def __getitem__(self, i: int) -> dict:
+        if not isinstance(i, int) or not 0 <= i < cases.N_KEYS:
+            raise KeyError(i)
+        s = self._store
+        return dict(avg_time=float(s._avg[i]),
+                    accuracy=float(s._acc[i]),
+                    mastery=float(s._mastery[i]))
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(range(cases.N_KEYS))
+
+    def __len__(self) -> int:
+        return cases.N_KEYS
 
-CONFIDENCE = {1: 0.80, 2: 0.85, 3: 0.90, 4: 0.95, 5: 1.00}
 
 class StatStore:
+    """
+    答题统计：全部历史在答题记录里（attempts.bin 或 sqlite，见 core.storage），
+    内存里只保留每个 (pll, state) 最近 5 次用于掌握值。
+    最近记录和统计结果都是按 key id（见 core.cases）排的稠密数组，重算一次向量化完成。
+    文件后端下，旧版 stat.json 仅在没有记录文件时导入一次。
+    """
     _file = os.path.join(os.path.dirname(__file__), '..', 'resources', 'stat.json')
     _max_hist = 5
 
-    def __init__(self):
-        self._hist: Dict[Key, deque] = {}
+    _shared = None
+
+    def __init__(self, log_file: str = None, legacy_file: str = None):
+        # 默认按 cfg.STORAGE 选后端；模拟器等场景可以指向临时文件
+        if legacy_file is not None:
+            self._file = legacy_file
+        n, h = cases.N_KEYS, self._max_hist
+        # 每个 key 最近 h 次：环形缓冲，第 i 次记录放在 i % h 格
+        self._times = np.zeros((n, h))
+        self._ok = np.zeros((n, h), dtype=bool)
+        self._count = np.zeros(n, dtype=np.int64)     # 累计条数
+        self._lock = threading.Lock()   # push（GUI 线程）与读取之间的互斥
+        # snapshot 结果：只有 _dirty 里的 key id 需要重算
+        self._avg = np.zeros(n)
+        self._acc = np.zeros(n)
+        self._mastery = np.zeros(n)
+        self._view = StatsView(self)
+        self._dirty: Set[int] = set(range(n))
+        self._listeners: List[Listener] = []
+        self.session = 0
+        self.log = AttemptLog.open(log_file) if log_file is not None else storage.open_log()
         self._load()
+        settings.subscribe(self._on_settings)
+
+    @classmethod
+    def shared(cls) -> 'StatStore':
+        """进程内共用的一份，训练器和统计页面看到同一份数据"""
+        if cls._shared is None:
+            cls._shared = cls()
+        return cls._shared
+
+    # ---------- 变更通知 ----------
+    def subscribe(self, listener: Listener):
+        """listener(ids) 在 push / 清空之后调用，ids 是有变化的 key id 集合"""
+        self._listeners.append(listener)
+
+    def unsubscribe(self, listener: Listener):
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def _notify(self, ids: Set[int]):
+        for listener in list(self._listeners):
+            listener(ids)
+
+    def _on_settings(self, changed: Set[str]):
+        # 掌握值里错误按 TIME_MAX 折算，改了要全部重算
+        if 'TIME_MAX' in changed:
+            with self._lock:
+                self._dirty |= set(range(cases.N_KEYS))
+            self._notify(set(range(cases.N_KEYS)))
 
     def _load(self):
-        if os.path.exists(self._file):
-            with open(self._file, 'r', encoding='utf-8') as f:
-                raw = json.load(f)
-                for k, v in raw.items():
-                    pll, state = k.split('|')
-                    self._hist[(pll, int(state))] = deque(v, maxlen=self._max_hist)
+        # sqlite 后端的旧文件导入见 core.sqlite_store.import_files
+        if isinstance(self.log, AttemptLog) and not len(self.log) and os.path.exists(self._file):
+            import_stat_json(self._file, self.log)
+        # 整个记录文件一次读成数组，向量化挑出每个 key 最近 5 条
+        arr = self.log.array()
+        state = arr['state'].astype(np.int64)
+        arr = arr[(state >= 1) & (state <= cases.N_STATES) & (arr['pll'] < len(cfg.PLL_NAMES))]
+        # 记录里存的 pll 编号、state 就是 key id 的两部分
+        kid = arr['pll'].astype(np.int64) * cases.N_STATES + arr['state'] - 1
+        # 按 key 稳定排序，组内仍是时间顺序；每组只写最后 h 条
+        order = np.argsort(kid, kind='stable')
+        kid = kid[order]
+        counts = np.bincount(kid, minlength=cases.N_KEYS)
+        seq = np.arange(len(kid)) - (np.cumsum(counts) - counts)[kid]
+        last = seq >= counts[kid] - self._max_hist
+        rows, slots = kid[last], seq[last] % self._max_hist
+        self._times[rows, slots] = arr['time'][order][last]
+        self._ok[rows, slots] = arr['ok'][order][last] != 0
+        self._count[:] = counts
 
     def save(self):
-        os.makedirs(os.path.dirname(self._file), exist_ok=True)
-        to_save = {"|".join(map(str, k)): list(v) for k, v in self._hist.items()}
-        with open(self._file, 'w', encoding='utf-8') as f:
-            json.dump(to_save, f, indent=2)
-
-    def push(self, pll: str, state: int, time: float, ok: bool):
-        key = (pll, state)
-        if key not in self._hist:
-            self._hist[key] = deque(maxlen=self._max_hist)
-        self._hist[key].append((time, ok))
-        self.save()
-
-    def snapshot(self) -> Dict[Key, Dict]:
+        """同步写盘：把缓冲的记录立即追加到文件"""
+        self.flush()
+
+    def flush(self):
+        self.log.flush()
+
+    def begin_session(self) -> int:
+        """开始新一轮训练，之后的记录都带上这个 session 编号"""
+        self.session = int(time.time())
+        return self.session
+
+    @classmethod
+    def clear_all(cls):
+        """清空当前 profile 的全部统计数据（答题记录 + 旧版 stat.json + 共享实例的内存）"""
+        log = cls._shared.log if cls._shared is not None else storage.open_log()
+        log.clear()
+        if isinstance(log, AttemptLog):
+            try:
+                os.remove(cls._file)
+            except FileNotFoundError:
+                pass
+        if cls._shared is not None:
+            cls._shared._reset()
+
+    def _reset(self):
+        with self._lock:
+            self._times[:] = 0.0
+            self._ok[:] = False
+            self._count[:] = 0
+            self._dirty |= set(range(cases.N_KEYS))
+        self._notify(set(range(cases.N_KEYS)))
+
+    def push(self, pll: str, state: int, time: float, ok: bool, color: int = 0,
+             ts: float = None, latency: float = 0.0):
+        """
+        追加一条记录（只进内存缓冲，落盘交给后台写线程）
+        ts 为图片绘制完成的墙钟时间，latency 为按键事件到处理函数的延迟
+        """
+        i = cases.key_id(pll, state)
+        self.log.append(pll, state, color, time, ok, session=self.session,
+                        ts=ts, latency=latency)
+        with self._lock:
+            slot = self._count[i] % self._max_hist
+            self._times[i, slot] = time
+            self._ok[i, slot] = ok
+            self._count[i] += 1
+            self._dirty.add(i)
+        self._notify({i})
+
+    def snapshot(self) -> Mapping[int, dict]:
         """
-        返回每个 case 的实时统计
+        返回每个 key id 的实时统计（只读视图，随 push 自动更新）
         错误在掌握值里折算 8 秒；平均时间只统计正确记录
         无数据 case 掌握值默认 0
+        只重算上次以来有新记录的 key：脏行少（训练中每答一张一行）时逐行标量计算，
+        多了（载入、清空、改 TIME_MAX）再一次向量化算完
         """
-        out = {}
-        # 所有 84 个 (pll, state) 占位
-        for pll in ["Aa", "Ab", "E", "F", "Ga", "Gb", "Gc", "Gd","H",
-                    "Ja", "Jb", "Na", "Nb", "Ra", "Rb", "T", "Ua",
-                    "Ub", "V", "Y", "Z"]:
-            for state in range(1, 5):
-                key = (pll, state)
-                recs = list(self._hist.get(key, []))
-
-                if not recs:
-                    # 无数据 → 默认 0
-                    out[key] = dict(avg_time=0.0,
-                                    accuracy=0.0,
-                                    mastery=0.0)
-                    continue
-
-                # 正确时间列表（平均时间只用这个）
-                correct_times = [t for t, ok in recs if ok]
-                avg_time = (sum(correct_times) / len(correct_times)
-                            if correct_times else 0.0)
-
-                # 掌握值：全部记录折算时间
-                times_for_score = [t if ok else cfg.TIME_MAX for t, ok in recs]
-
-                score_t = sum(times_for_score) / len(times_for_score)
-                acc = sum(r[1] for r in recs) / len(recs)
-
-                # 曲线分数 + 置信系数
-                base = _curve_score(score_t)
-                # print(score_t)
-                # print(base)
-                conf = CONFIDENCE.get(len(recs), 1.00)
-                mastery = base * conf
-                mastery = max(0.0, min(100.0, mastery))
-                # print(f"{pll}-{state}: mastery = {base:.2f} * {conf:.2f} = {mastery:.2f}")
-
-                out[key] = dict(avg_time=round(avg_time, 2),
-                                accuracy=round(acc, 2),
-                                mastery=round(mastery, 2))
-        return out
\ No newline at end of file
+        h = self._max_hist
+        with self._lock:
+            dirty, self._dirty = self._dirty, set()
+            if len(dirty) > _LOOP_ROWS:
+                rows = np.arange(cases.N_KEYS)
+                times, ok = self._times.copy(), self._ok.copy()
+                n = np.minimum(self._count, h)
+            else:
+                loop = [(i, self._times[i].tolist(), self._ok[i].tolist(),
+                         min(int(self._count[i]), h)) for i in dirty]
+        if len(dirty) > _LOOP_ROWS:
+            self._avg[rows], self._acc[rows], self._mastery[rows] = scoring.key_stats(times, ok, n)
+        else:
+            for i, times, ok, n in loop:
+                self._avg[i], self._acc[i], self._mastery[i] = scoring.key_stat(times, ok, n)
+        if trace.ON:
+            trace.emit('score.snapshot', dirty=len(dirty))
+        return self._view
@@ -0,0 +1,99 @@
+# core/storage.py
+"""
+存储后端选择。
+
+    cfg.STORAGE = 'files'    resources 下的 attempts.bin（只追加）+ weights.json（整文件改写），单人使用
+    cfg.STORAGE = 'sqlite'   resources/pll.db，按 profile 分开，见 core/sqlite_store.py
+
+profile 取环境变量 PLL_PROFILE，没有则用 cfg.PROFILE。
+sqlite 模式下旧文件是导入来源：cfg.PROFILE 对应的 profile 还没导入过时，打开前先迁移一次
+（建 profile + 导入）；之后打开只读查一下标记，构造后端不写库。
+
+权重后端的接口（JsonWeights / SqliteWeights）：
+    key             persist 合并写盘用的键
+    load()          按 case id 排的权重数组，未训练为 nan
+    write(ids, w)   ids 为改动过的 case id，w 为全部权重（nan 表示未训练）
+答题记录后端与 AttemptLog 接口相同（append / flush / clear / array / 迭代 / len）。
+"""
+
+import json
+import math
+import os
+
+import numpy as np
+
+from core import cases, persist
+from core import config as cfg
+from core.attempt_log import LOG_FILE, AttemptLog
+
+_VERSION = 2       # weights.json：{"version": 2, "weights": [按 case id 排列，未训练为 null]}
+
+
+def profile() -> str:
+    return os.environ.get('PLL_PROFILE') or cfg.PROFILE
+
+
+# ---------- weights.json ----------
+class JsonWeights:
+    """整个文件改写，ids 不用；旧版 {"case": {...}} 读进来，下次保存时转成新格式"""
+
+    def __init__(self, path: str):
+        self.path = os.path.abspath(path)
+        self.key = self.path
+
+    def load(self) -> np.ndarray:
+        w = np.full(cases.N_CASES, np.nan)
+        if not os.path.exists(self.path):
+            return w
+        with open(self.path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get('version') == _VERSION:
+            saved = np.array(data['weights'][:cases.N_CASES], dtype=float)   # null → nan
+            w[:len(saved)] = saved
+        else:
+            # 旧版：key 是 json 编码的 [pll, state, color]
+            for k, v in data.get('case', {}).items():
+                try:
+                    w[cases.case_id(*json.loads(k))] = v
+                except (KeyError, TypeError):
+                    continue            # 已不存在的 PLL
+        return w
+
+    def dump(self, w: np.ndarray) -> str:
+        return json.dumps({
+            'version': _VERSION,
+            'weights': [None if math.isnan(x) else x for x in w.tolist()],
+        })
+
+    def write(self, ids: np.ndarray, w: np.ndarray):
+        persist.atomic_write(self.path, self.dump(w))
+
+
+# ---------- 工厂 ----------
+def _sqlite_profile() -> str:
+    """当前 profile 名；默认 profile 还没迁移过时先做一次性迁移（import_files），已迁移过只读"""
+    from core import sqlite_store
+    name = profile()
+    if name == cfg.PROFILE:
+        try:
+            sqlite_store.import_files(name)
+        except OSError as e:            # 库被别的实例锁住：先照常打开，下次启动再导入
+            print(f"导入旧文件失败，下次启动再试：{e}")
+    return name
+
+
+def open_weights():
+    """按 cfg.STORAGE 返回 WeightManager 用的权重后端"""
+    if cfg.STORAGE == 'sqlite':
+        from core.sqlite_store import SqliteWeights
+        return SqliteWeights(_sqlite_profile())
+    from core.weight_manager import CFG_FILE
+    return JsonWeights(CFG_FILE)
+
+
+def open_log():
+    """按 cfg.STORAGE 返回 StatStore 用的答题记录"""
+    if cfg.STORAGE == 'sqlite':
+        from core.sqlite_store import SqliteLog
+        return SqliteLog.open(_sqlite_profile())
+    return AttemptLog.open(LOG_FILE)
@@ -0,0 +1,313 @@
+# core/subsets.py
+"""
+case 子集：按 case id（见 core.cases）编成位集，交 / 并 / 差都是整数位运算。
+
+    CaseSet               一个 case 集合，内部是一个 Python int，第 id 位为 1 表示包含
+    pll('T') / state(1) / color(2) / GROUPS['G']      基本集合
+    weakest(n, weights)   权重最高（答得最差）的 n 个，随权重变化
+
+子集表达式（cfg.DRILL、EXCLUDE_RULES 里的字符串都用它）：
+
+    G                     组名，见 GROUPS；或 PLL 简称，如 T、Ua（不分大小写）
+    state:1,2  color:3    按 state / 颜色
+    weakest:20            当前权重最高的 20 个
+    all                   全部
+    a & b   a | b   a - b   (...)      & 优先于 | 和 -
+
+    sel = subsets.compile('diag & state:1 | weakest:10')    # 编译结果有缓存
+    ids = sel.resolve(wm.weights).ids()                      # 只有 weakest 需要权重
+"""
+
+import re
+from functools import lru_cache
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Union
+
+import numpy as np
+
+from core import cases
+from core import config as cfg
+
+Weights = Callable[[], np.ndarray]      # 返回按 case id 排的权重数组（如 WeightManager.weights）
+
+
+class CaseSet:
+    """不可变的 case 位集"""
+    __slots__ = ('bits',)
+
+    def __init__(self, bits: int = 0):
+        self.bits = bits
+
+    @classmethod
+    def of(cls, ids: Iterable[int]) -> 'CaseSet':
+        bits = 0
+        for cid in ids:
+            bits |= 1 << int(cid)
+        return cls(bits)
+
+    @classmethod
+    def from_mask(cls, mask: np.ndarray) -> 'CaseSet':
+        """按 case id 排的 bool 数组 → 位集"""
+        packed = np.packbits(np.asarray(mask, dtype=bool), bitorder='little')
+        return cls(int.from_bytes(packed.tobytes(), 'little'))
+
+    def mask(self) -> np.ndarray:
+        """位集 → 长度 N_CASES 的 bool 数组"""
+        raw = np.frombuffer(self.bits.to_bytes(_N_BYTES, 'little'), dtype=np.uint8)
+        return np.unpackbits(raw, bitorder='little')[:cases.N_CASES].astype(bool)
+
+    def ids(self) -> np.ndarray:
+        """包含的 case id，升序"""
+        return np.flatnonzero(self.mask())
+
+    def keys(self) -> np.ndarray:
+        """涉及的 key id（(pll, state)），升序"""
+        return np.unique(self.ids() // cases.N_COLORS)
+
+    # ---------- 集合运算 ----------
+    def __and__(self, other: 'CaseSet') -> 'CaseSet':
+        return CaseSet(self.bits & other.bits)
+
+    def __or__(self, other: 'CaseSet') -> 'CaseSet':
+        return CaseSet(self.bits | other.bits)
+
+    def __sub__(self, other: 'CaseSet') -> 'CaseSet':
+        return CaseSet(self.bits & ~other.bits)
+
+    def __invert__(self) -> 'CaseSet':
+        return CaseSet(_FULL & ~self.bits)
+
+    def __contains__(self, cid: int) -> bool:
+        return bool(self.bits >> cid & 1)
+
+    def __len__(self) -> int:
+        return bin(self.bits).count('1')
+
+    def __bool__(self) -> bool:
+        return self.bits != 0
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, CaseSet) and self.bits == other.bits
+
+    def __hash__(self) -> int:
+        return hash(self.bits)
+
+    def __repr__(self) -> str:
+        return f"CaseSet({len(self)} cases)"
+
+
+_N_BYTES = (cases.N_CASES + 7) // 8
+_FULL = (1 << cases.N_CASES) - 1
+ALL = CaseSet(_FULL)
+EMPTY = CaseSet()
+
+
+# ---------- 基本集合 ----------
+def _where(pred: Callable[[cases.Case], bool]) -> CaseSet:
+    return CaseSet.of(c.id for c in cases.CASES if pred(c))
+
+
+def pll(*names: str) -> CaseSet:
+    wanted = {_pll_name(n) for n in names}
+    return _where(lambda c: c.pll in wanted)
+
+
+def state(*states: int) -> CaseSet:
+    return _where(lambda c: c.state in states)
+
+
+def color(*colors: int) -> CaseSet:
+    return _where(lambda c: c.color in colors)
+
+
+def _pll_name(name: str) -> str:
+    try:
+        return _PLL_LOWER[name.lower()]
+    except KeyError:
+        raise ValueError(f"未知的 PLL：{name}") from None
+
+
+_PLL_LOWER: Dict[str, str] = {n.lower(): n for n in cfg.PLL_NAMES}
+
+# 组名 -> PLL 简称；adj / diag 按角块是相邻交换还是对角交换分，edge 只换棱
+_GROUP_PLLS: Dict[str, Sequence[str]] = {
+    'A': ('Aa', 'Ab'),
+    'G': ('Ga', 'Gb', 'Gc', 'Gd'),
+    'J': ('Ja', 'Jb'),
+    'N': ('Na', 'Nb'),
+    'R': ('Ra', 'Rb'),
+    'U': ('Ua', 'Ub'),
+    'adj': ('Aa', 'Ab', 'F', 'Ga', 'Gb', 'Gc', 'Gd', 'Ja', 'Jb', 'Ra', 'Rb', 'T'),
+    'diag': ('E', 'Na', 'Nb', 'V', 'Y'),
+    'edge': ('H', 'Ua', 'Ub', 'Z'),
+}
+GROUPS: Dict[str, CaseSet] = {name: pll(*plls) for name, plls in _GROUP_PLLS.items()}
+_GROUP_LOWER: Dict[str, CaseSet] = {name.lower(): s for name, s in GROUPS.items()}
+_GROUP_LOWER['all'] = ALL
+
+
+def weakest(n: int, weights: np.ndarray, within: CaseSet = ALL) -> CaseSet:
+    """within 里权重最高的 n 个（同权重按 case id 先后）"""
+    ids = within.ids()
+    if n >= len(ids):
+        return within
+    # 稳定排序保证同权重时结果固定
+    order = np.argsort(-np.asarray(weights, dtype=float)[ids], kind='stable')
+    return CaseSet.of(ids[order[:n]].tolist())
+
+
+# ---------- 表达式 ----------
+class Selection:
+    """编译好的子集表达式；不含 weakest 时 static 即结果，resolve 不再计算"""
+
+    def __init__(self, expr: str, fn: Callable[[Optional[Weights]], CaseSet],
+                 static: Optional[CaseSet] = None):
+        self.expr = expr
+        self.static = static
+        self._fn = fn
+
+    def resolve(self, weights: Weights = None) -> CaseSet:
+        if self.static is not None:
+            return self.static
+        return self._fn(weights)
+
+    def __repr__(self) -> str:
+        return f"Selection({self.expr!r})"
+
+
+_TOKEN = re.compile(r'\s*(?:([&|()\-])|([A-Za-z]+(?::[\d,]+)?))')
+Node = Union[CaseSet, Callable[[Optional[Weights]], CaseSet]]
+
+
+def _tokens(expr: str) -> List[str]:
+    out, pos = [], 0
+    expr = expr.strip()
+    while pos < len(expr):
+        m = _TOKEN.match(expr, pos)
+        if not m:
+            raise ValueError(f"子集表达式无法解析：{expr!r}（第 {pos + 1} 个字符）")
+        out.append(m.group(1) or m.group(2))
+        pos = m.end()
+    return out
+
+
+def _atom(tok: str) -> Node:
+    name, _, arg = tok.partition(':')
+    low = name.lower()
+    if arg:
+        try:
+            nums = [int(x) for x in arg.split(',') if x]
+        except ValueError:
+            raise ValueError(f"参数应为整数：{tok}") from None
+        if low == 'state':
+            return state(*nums)
+        if low == 'color':
+            return color(*nums)
+        if low == 'weakest' and len(nums) == 1:
+            n = nums[0]
+
+            def dynamic(weights: Optional[Weights]) -> CaseSet:
+                if weights is None:
+                    raise ValueError("weakest 需要当前权重")
+                return weakest(n, weights())
+            return dynamic
+        raise ValueError(f"未知的子集：{tok}")
+    if low in _GROUP_LOWER:
+        return _GROUP_LOWER[low]
+    return pll(name)
+
+
+def _combine(op: str, a: Node, b: Node) -> Node:
+    apply = {'&': CaseSet.__and__, '|': CaseSet.__or__, '-': CaseSet.__sub__}[op]
+    if isinstance(a, CaseSet) and isinstance(b, CaseSet):
+        return apply(a, b)              # 静态部分编译时就算好
+    fa = (lambda w, s=a: s) if isinstance(a, CaseSet) else a
+    fb = (lambda w, s=b: s) if isinstance(b, CaseSet) else b
+    return lambda w: apply(fa(w), fb(w))
+
+
+@lru_cache(maxsize=64)
+def _compile(expr: str) -> Selection:
+    toks = _tokens(expr)
+    pos = 0
+
+    def peek() -> Optional[str]:
+        return toks[pos] if pos < len(toks) else None
+
+    def take() -> str:
+        nonlocal pos
+        if pos >= len(toks):
+            raise ValueError(f"子集表达式不完整：{expr!r}")
+        pos += 1
+        return toks[pos - 1]
+
+    def primary() -> Node:
+        tok = take()
+        if tok == '(':
+            node = union()
+            if take() != ')':
+                raise ValueError(f"括号不匹配：{expr!r}")
+            return node
+        if tok in '&|-)':
+            raise ValueError(f"子集表达式在 {tok!r} 处出错：{expr!r}")
+        return _atom(tok)
+
+    def inter() -> Node:
+        node = primary()
+        while peek() == '&':
+            take()
+            node = _combine('&', node, primary())
+        return node
+
+    def union() -> Node:
+        node = inter()
+        while peek() in ('|', '-'):
+            node = _combine(take(), node, inter())
+        return node
+
+    if not toks:
+        return Selection(expr, lambda w: ALL, ALL)
+    node = union()
+    if pos != len(toks):
+        raise ValueError(f"子集表达式多出 {toks[pos]!r}：{expr!r}")
+    if isinstance(node, CaseSet):
+        return Selection(expr, lambda w: node, node)
+    return Selection(expr, node)
+
+
+def compile(expr: Union[str, CaseSet, Selection]) -> Selection:
+    """子集表达式 → Selection（同一字符串只编译一次）；CaseSet / Selection 原样包装"""
+    if isinstance(expr, Selection):
+        return expr
+    if isinstance(expr, CaseSet):
+        return Selection('', lambda w: expr, expr)
+    return _compile(expr)
+
+
+# ---------- 排除规则 ----------
+@lru_cache(maxsize=8)
+def _excluded(rules: tuple) -> CaseSet:
+    out = EMPTY
+    for rule in rules:
+        try:
+            if isinstance(rule, str):
+                out |= compile(rule).resolve()
+                continue
+            rule_pll, rule_key, rule_val = rule
+            base = pll(rule_pll)
+        except ValueError as e:
+            print(f"忽略排除规则 {rule!r}：{e}")
+            continue
+        if rule_key == 'color':
+            out |= base & color(rule_val)
+        elif rule_key == 'state':
+            out |= base & state(rule_val)
+    return out
+
+
+def excluded(rules: Iterable = None) -> CaseSet:
+    """
+    EXCLUDE_RULES 编译成的位集：(pll, 'color'|'state', 值) 或子集表达式字符串；
+    规则不变时直接复用缓存。
+    """
+    rules = cfg.EXCLUDE_RULES if rules is None else rules
+    return _excluded(tuple(r if isinstance(r, str) else tuple(r) for r in rules))
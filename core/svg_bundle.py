@@ -0,0 +1,112 @@
+# core/svg_bundle.py
+"""
+把 resources/SVG 下的全部 case 图打包成一个文件，运行时 mmap 读取。
+
+文件格式：
+    header   : magic(8s) version(u32) index 长度(u32)
+    index    : UTF-8 JSON，[[pll, state, color, 相对路径, offset, length], ...]
+    data     : 各 SVG 原始字节首尾相接，offset 相对文件开头
+
+打包（离线步骤，SVG 有改动后重跑）：
+    python -m core.svg_bundle
+"""
+
+import json
+import mmap
+import os
+import struct
+import sys
+from typing import Dict, Optional, Tuple
+
+BUNDLE_FILE = os.path.join(os.path.dirname(__file__), '..', 'resources', 'svg.bundle')
+
+_MAGIC = b'PLLSVG\x00\x01'
+_HEADER = struct.Struct('<8sII')
+_VERSION = 1
+
+CaseKey = Tuple[str, int, int]           # (pll, state, color)
+Entry = Tuple[str, int, int]             # (相对路径, offset, length)
+
+
+class SvgBundle:
+    """只读的 mmap 打包文件"""
+
+    def __init__(self, path: str = BUNDLE_FILE):
+        self.path = os.path.abspath(path)
+        self._f = open(self.path, 'rb')
+        try:
+            self._mm = mmap.mmap(self._f.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, version, index_len = _HEADER.unpack_from(self._mm, 0)
+            if magic != _MAGIC or version != _VERSION:
+                raise ValueError(f"{self.path} 不是可识别的 SVG 打包文件")
+            raw = self._mm[_HEADER.size:_HEADER.size + index_len]
+        except Exception:
+            self._f.close()
+            raise
+        self.index: Dict[CaseKey, Entry] = {
+            (pll, state, color): (rel, off, length)
+            for pll, state, color, rel, off, length in json.loads(raw.decode('utf-8'))
+        }
+        self.mtime_ns = os.fstat(self._f.fileno()).st_mtime_ns
+
+    def read(self, key: CaseKey) -> bytes:
+        _, off, length = self.index[key]
+        return self._mm[off:off + length]
+
+    def close(self):
+        self._mm.close()
+        self._f.close()
+
+
+def open_bundle(path: str = BUNDLE_FILE) -> Optional[SvgBundle]:
+    """打包文件不存在或损坏时返回 None，由调用方退回散文件"""
+    if not os.path.isfile(path):
+        return None
+    try:
+        return SvgBundle(path)
+    except (OSError, ValueError, struct.error):
+        return None
+
+
+def build(src_dir: str = None, out: str = BUNDLE_FILE) -> int:
+    """扫描散文件目录并打包，返回打包的图片数"""
+    from core import svg_scanner
+    src_dir = os.path.abspath(src_dir or svg_scanner.SVG_DIR)
+    found = svg_scanner.scan_dir(src_dir)   # 永远扫散文件，不读旧的打包文件
+
+    entries, blobs = [], []
+    for (pll, state, color), path in sorted(found.items()):
+        with open(path, 'rb') as f:
+            blobs.append(f.read())
+        entries.append([pll, state, color, os.path.relpath(path, src_dir).replace(os.sep, '/')])
+
+    # index 里的 offset 依赖 index 自身长度：先按占位算一次长度，再回填
+    def encode(base):
+        off, out_entries = base, []
+        for e, b in zip(entries, blobs):
+            out_entries.append(e + [off, len(b)])
+            off += len(b)
+        return json.dumps(out_entries, separators=(',', ':')).encode('utf-8')
+
+    index = encode(0)
+    while True:
+        base = _HEADER.size + len(index)
+        new_index = encode(base)
+        if len(new_index) == len(index):
+            index = new_index
+            break
+        index = new_index
+
+    tmp = out + '.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(_HEADER.pack(_MAGIC, _VERSION, len(index)))
+        f.write(index)
+        for b in blobs:
+            f.write(b)
+    os.replace(tmp, out)
+    return len(entries)
+
+
+if __name__ == '__main__':
+    n = build(*sys.argv[1:2])
+    print(f"已打包 {n} 张 SVG → {os.path.abspath(BUNDLE_FILE)}")
@@ -0,0 +1,176 @@
+# core/svg_optimize.py
+"""
+离线精简 case 图 SVG：
+- 去掉 XML 声明和 DOCTYPE；
+- 坐标四舍五入到 DIGITS 位小数（viewBox 宽 1.8 对应 400 像素，1e-5 ≈ 0.002 像素）；
+- 把每个 <polygon> 上重复的 stroke / fill 提到 <g> 上，相邻同色贴纸合并成一个 <g fill>；
+- 去掉缩进换行。
+
+用法：
+    python -m core.svg_optimize              # 只统计，不改文件
+    python -m core.svg_optimize --verify     # 额外栅格化比对，报告像素差异
+    python -m core.svg_optimize --verify --write   # 比对通过的文件才写回
+可选参数：--digits N  --tolerance N  [目录]
+"""
+
+import argparse
+import os
+import re
+import sys
+import xml.etree.ElementTree as ET
+from glob import glob
+from typing import List, Optional, Tuple
+
+DIGITS = 5          # 坐标保留的小数位
+TOLERANCE = 4       # 比对时单个通道允许的最大差值（0-255），只容许抗锯齿边缘的微小变化
+RENDER_SIZE = 400   # 比对用的栅格尺寸，与训练器大图一致
+
+SVG_NS = 'http://www.w3.org/2000/svg'
+_NUM = re.compile(r'-?\d+(?:\.\d*)?(?:[eE][-+]?\d+)?')
+_NUMERIC_ATTRS = ('points', 'x', 'y', 'width', 'height', 'viewBox')
+_HOIST_ATTRS = ('stroke', 'fill')
+
+
+# ---------- 精简 ----------
+def _fmt(m, digits: int) -> str:
+    v = round(float(m.group(0)), digits)
+    s = f'{v:.{digits}f}'.rstrip('0').rstrip('.')
+    return '0' if s in ('-0', '') else s
+
+
+def _round_numbers(text: str, digits: int) -> str:
+    return _NUM.sub(lambda m: _fmt(m, digits), text)
+
+
+def _tag(el) -> str:
+    return el.tag.split('}')[-1]
+
+
+def _hoist(group):
+    """子元素上取值都相同的属性提到 group 上；再把相邻同 fill 的子元素包进 <g fill>"""
+    kids = list(group)
+    if not kids or any(_tag(k) != 'polygon' for k in kids):
+        return
+    for attr in _HOIST_ATTRS:
+        vals = {k.get(attr) for k in kids}
+        if len(vals) == 1 and None not in vals:
+            group.set(attr, vals.pop())
+            for k in kids:
+                del k.attrib[attr]
+
+    if any(k.get('fill') is None for k in kids):
+        return
+    runs: List[Tuple[str, list]] = []
+    for k in kids:
+        if runs and runs[-1][0] == k.get('fill'):
+            runs[-1][1].append(k)
+        else:
+            runs.append((k.get('fill'), [k]))
+    if len(runs) == len(kids):
+        return                                  # 没有相邻同色，包一层反而更大
+    for k in kids:
+        group.remove(k)
+    for fill, members in runs:
+        if len(members) == 1:
+            group.append(members[0])
+            continue
+        sub = ET.SubElement(group, f'{{{SVG_NS}}}g', fill=fill)
+        for k in members:
+            del k.attrib['fill']
+            sub.append(k)
+
+
+def optimize(src: bytes, digits: int = DIGITS) -> bytes:
+    """返回精简后的 SVG 字节"""
+    ET.register_namespace('', SVG_NS)
+    root = ET.fromstring(src)        # expat 会跳过 DOCTYPE
+    for el in root.iter():
+        el.text = el.tail = None
+        for attr in _NUMERIC_ATTRS:
+            if attr in el.attrib:
+                el.set(attr, _round_numbers(el.get(attr), digits))
+    for g in [el for el in root.iter() if _tag(el) == 'g']:
+        _hoist(g)
+    return ET.tostring(root, encoding='utf-8', xml_declaration=False)
+
+
+# ---------- 比对 ----------
+_app = None
+
+
+def _rasterize(data: bytes, size: int = RENDER_SIZE):
+    global _app
+    from PyQt5.QtCore import QByteArray, Qt
+    from PyQt5.QtGui import QGuiApplication, QImage, QPainter
+    from PyQt5.QtSvg import QSvgRenderer
+    if QGuiApplication.instance() is None:
+        _app = QGuiApplication(sys.argv[:1])
+    img = QImage(size, size, QImage.Format_ARGB32)
+    img.fill(Qt.transparent)
+    renderer = QSvgRenderer(QByteArray(data))
+    painter = QPainter(img)
+    renderer.render(painter)
+    painter.end()
+    ptr = img.constBits()
+    ptr.setsize(img.byteCount())
+    return bytes(ptr)
+
+
+def pixel_diff(a: bytes, b: bytes, size: int = RENDER_SIZE) -> Tuple[int, int]:
+    """两份 SVG 栅格化后比较，返回 (最大通道差, 超出 TOLERANCE 的像素数)"""
+    ra, rb = _rasterize(a, size), _rasterize(b, size)
+    if ra == rb:
+        return 0, 0
+    worst, bad = 0, 0
+    for i in range(0, len(ra), 4):
+        d = max(abs(ra[i + j] - rb[i + j]) for j in range(4))
+        if d:
+            worst = max(worst, d)
+            if d > TOLERANCE:
+                bad += 1
+    return worst, bad
+
+
+# ---------- 命令行 ----------
+def run(root: str, digits: int, verify: bool, write: bool, tolerance: int) -> int:
+    global TOLERANCE
+    TOLERANCE = tolerance
+    files = sorted(glob(os.path.join(root, '*', '*.svg')))
+    before = after = failed = 0
+    for path in files:
+        with open(path, 'rb') as f:
+            src = f.read()
+        out = optimize(src, digits)
+        before += len(src)
+        after += len(out)
+        ok = True
+        if verify:
+            worst, bad = pixel_diff(src, out)
+            ok = bad == 0
+            if not ok:
+                failed += 1
+                print(f"[差异] {os.path.relpath(path, root)}：最大通道差 {worst}，{bad} 个像素超出容差")
+        if write and ok and out != src:
+            tmp = path + '.tmp'
+            with open(tmp, 'wb') as f:
+                f.write(out)
+            os.replace(tmp, path)
+    print(f"{len(files)} 个文件：{before} → {after} 字节"
+          f"（{after / max(before, 1):.0%}）" + (f"，比对失败 {failed} 个" if verify else ''))
+    return 1 if failed else 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    from core.svg_scanner import SVG_DIR
+    ap = argparse.ArgumentParser(description='精简 resources/SVG 下的 case 图')
+    ap.add_argument('root', nargs='?', default=SVG_DIR)
+    ap.add_argument('--digits', type=int, default=DIGITS)
+    ap.add_argument('--tolerance', type=int, default=TOLERANCE)
+    ap.add_argument('--verify', action='store_true', help='栅格化比对，需要 PyQt5')
+    ap.add_argument('--write', action='store_true', help='写回文件（配合 --verify 只写比对通过的）')
+    args = ap.parse_args(argv)
+    return run(os.path.abspath(args.root), args.digits, args.verify, args.write, args.tolerance)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,53 +1,86 @@
 # core/svg_scanner.py
 """
 扫描 SVG 目录，返回 (path, pll, color, state) 列表。
+扫描结果缓存在内存索引里，目录 mtime 变化时才重建；EXCLUDE_RULES 编译成位集（core.subsets），
+规则变化只重新做一次位运算。
+cfg.PROCEDURAL 为 True（默认）时不读任何文件，case 列表和图片都由 core.case_image 生成；
+否则有 resources/svg.bundle 时直接读打包文件的索引，图片字节也从里面取（read_svg），
+没有打包文件时退回散文件目录。在 settings.json 里改（settings.set('PROCEDURAL', False)），
+改了立即丢弃索引重建。
 """
 
 import os
 import random
+import threading
 from glob import iglob
-from typing import List, Tuple
+from typing import Dict, List, Optional, Tuple
 
-# 允许外部覆盖，也可直接放这里
-try:
-    from core.config import EXCLUDE_RULES
-except ImportError:
-    EXCLUDE_RULES: List[Tuple[str, str, int]] = []
+from core import case_image, cases, settings, subsets
+from core import config as cfg
+from core.subsets import CaseSet
+from core.svg_bundle import BUNDLE_FILE, open_bundle
 
 # 相对于本文件向上两级，再进入 resources/SVG
 SVG_DIR = os.path.join(
     os.path.dirname(__file__), '..', 'resources', 'SVG'
 )
 
+CaseKey = Tuple[str, int, int]           # (pll, state, color)
+SvgFile = Tuple[str, str, int, int]      # (path, pll, color, state)
 
-def _match_exclude(pll: str, color: int, state: int) -> bool:
-    """
-    根据 EXCLUDE_RULES 判断是否跳过该文件。
-    规则格式: (pll_name, 'color'|'state', value)
-    """
-    for rule_pll, rule_key, rule_val in EXCLUDE_RULES:
-        if rule_pll.lower() != pll.lower():
-            continue
-        if rule_key == 'color' and color == rule_val:
-            return True
-        if rule_key == 'state' and state == rule_val:
-            return True
-    return False
+# ---------- 内存索引 ----------
+# mtimes: 数据来源的签名（生成器版本、打包文件 mtime 或各目录 mtime）
+# generated: True 表示图片由 case_image 生成
+# bundle: 正在使用的 SvgBundle，None 表示读散文件
+# all: 未过滤的 (pll, state, color) -> path
+# paths: 规范化 path -> (pll, state, color)，read_svg 用
+# by_id: case id -> (path, pll, color, state)，只含 PLL_NAMES 里有的
+# available: 有图的 case 位集
+# excluded: 上次过滤用的 EXCLUDE_RULES 位集，None 表示还没过滤
+# usable: available 去掉 excluded
+# files: 按 EXCLUDE_RULES 过滤后的 scan_all_svg() 结果
+# cases: files 的字典视图 (pll, state, color) -> path
+_index = {
+    'mtimes': None,
+    'generated': False,
+    'bundle': None,
+    'paths': {},
+    'all': {},
+    'by_id': {},
+    'available': subsets.EMPTY,
+    'excluded': None,
+    'usable': subsets.EMPTY,
+    'files': [],
+    'cases': {},
+}
+# 预渲染线程也会读索引：重建、丢弃、以及要连读几个字段的查询都在 _lock 里
+_lock = threading.RLock()
 
 
-def scan_all_svg() -> List[Tuple[str, str, int, int]]:
-    """
-    遍历 SVG_DIR，返回：
-        (完整文件路径, pll简称, color编号, state编号)
-    已自动剔除被排除的文件。
-    """
-    all_files: List[Tuple[str, str, int, int]] = []
+def _dir_mtimes(folders) -> Optional[Tuple]:
+    """SVG_DIR 及已知子目录的 mtime；目录不存在返回 None"""
+    try:
+        out = [os.stat(SVG_DIR).st_mtime_ns]
+        for folder in folders:
+            out.append(os.stat(os.path.join(SVG_DIR, folder)).st_mtime_ns)
+    except OSError:
+        return None
+    return tuple(out)
 
-    if not os.path.isdir(SVG_DIR):
-        return all_files
 
-    for pll_folder in os.listdir(SVG_DIR):
-        folder_path = os.path.join(SVG_DIR, pll_folder)
+def _norm(path: str) -> str:
+    return os.path.normcase(os.path.abspath(path))
+
+
+def scan_dir(root: str = SVG_DIR) -> Dict[CaseKey, str]:
+    """真正遍历磁盘，返回未过滤的 (pll, state, color) -> path"""
+    found: Dict[CaseKey, str] = {}
+
+    if not os.path.isdir(root):
+        return found
+
+    for pll_folder in sorted(os.listdir(root)):
+        folder_path = os.path.join(root, pll_folder)
         if not os.path.isdir(folder_path):
             continue
 
@@ -67,25 +100,207 @@ def scan_all_svg() -> List[Tuple[str, str, int, int]]:
             except ValueError:
                 continue
 
-            if not _match_exclude(pll_name, color, state):
-                all_files.append((path, pll_name, color, state))
+            found[(pll_name, state, color)] = path
+
+    return found
+
+
+def _folders() -> List[str]:
+    return sorted({os.path.basename(os.path.dirname(p))
+                   for p in _index['all'].values()})
+
+
+def generated_path(pll: str, state: int, color: int) -> str:
+    """生成的图没有文件，沿用散文件的命名当作 key，缓存、记录都不用改"""
+    folder = f'{pll}_pern'
+    return os.path.join(SVG_DIR, folder, f'{folder}_color{color}_state{state}.svg')
+
+
+def _signature() -> Optional[Tuple]:
+    if cfg.PROCEDURAL:
+        return ('generated', case_image.VERSION)
+    try:
+        return ('bundle', os.stat(BUNDLE_FILE).st_mtime_ns)
+    except OSError:
+        pass
+    return _dir_mtimes(_folders())
+
+
+def _set_bundle(bundle):
+    """换上新的 SvgBundle（None 表示不用）；旧的先关掉，免得文件句柄和 mmap 一直留着。调用方持锁"""
+    old = _index['bundle']
+    if old is not None and old is not bundle:
+        old.close()
+    _index['bundle'] = bundle
+
+
+def _load_source():
+    """生成器优先；其次打包文件；打不开就扫散文件目录"""
+    procedural = _index['generated'] = cfg.PROCEDURAL
+    bundle = None if procedural else open_bundle(BUNDLE_FILE)
+    _set_bundle(bundle)
+    if bundle is not None:
+        _index['all'] = {key: os.path.join(SVG_DIR, rel)
+                         for key, (rel, _, _) in bundle.index.items()}
+    else:
+        _index['all'] = (
+            {key: generated_path(*key) for key in case_image.case_keys()}
+            if procedural else scan_dir()
+        )
+    _index['paths'] = {_norm(p): key for key, p in _index['all'].items()}
+    _index['by_id'] = {cases.case_id(pll, state, color): (path, pll, color, state)
+                       for (pll, state, color), path in _index['all'].items()
+                       if cases.has(pll, state, color)}
+    _index['available'] = CaseSet.of(_index['by_id'])
+
+
+def _refresh(validate: bool = True):
+    """按需重建索引：数据来源 mtime 变化重新加载，排除规则变化只重新过滤"""
+    with _lock:
+        if validate or _index['mtimes'] is None:
+            mtimes = _signature()
+            if mtimes is None or mtimes != _index['mtimes']:
+                _load_source()
+                # 加载后再取一次，把新出现的子目录也纳入监视
+                _index['mtimes'] = _signature()
+                _index['excluded'] = None
+
+        excluded = subsets.excluded()       # 规则没变时是缓存里的同一个位集
+        if excluded != _index['excluded']:
+            usable = _index['available'] - excluded
+            by_id = _index['by_id']
+            # 按 case id 排，与按 (pll, state, color) 排序一致
+            _index['files'] = [by_id[cid] for cid in usable.ids().tolist()]
+            _index['cases'] = {(pll, state, color): path
+                               for path, pll, color, state in _index['files']}
+            _index['usable'] = usable
+            _index['excluded'] = excluded
+
+
+def invalidate():
+    """丢弃内存索引，下次访问时强制重扫"""
+    with _lock:
+        _index['mtimes'] = None
+        _index['excluded'] = None
+        _index['generated'] = False
+        _set_bundle(None)
+        _index['paths'] = {}
+        _index['all'] = {}
+        _index['by_id'] = {}
+        _index['available'] = subsets.EMPTY
+        _index['usable'] = subsets.EMPTY
+        _index['files'] = []
+        _index['cases'] = {}
+
+
+def _on_settings(changed):
+    # 换了卡面来源：validate=False 的调用不看签名，必须显式丢弃索引
+    if 'PROCEDURAL' in changed:
+        invalidate()
+
+
+settings.subscribe(_on_settings)
+
+
+def case_index(validate: bool = True) -> Dict[CaseKey, str]:
+    """
+    返回已过滤的 (pll, state, color) -> 完整文件路径。
+    validate=False 时跳过 mtime 检查，完全不碰文件系统（已建索引的前提下）。
+    返回的是内部缓存，调用方不要修改。
+    """
+    with _lock:
+        _refresh(validate)
+        return _index['cases']
+
+
+def scan_all_svg(validate: bool = True) -> List[SvgFile]:
+    """
+    返回：
+        (完整文件路径, pll简称, color编号, state编号)
+    已自动剔除被排除的文件。
+    结果来自内存索引，只有目录 mtime 或排除规则变化时才会重新扫描磁盘。
+    """
+    with _lock:
+        _refresh(validate)
+        return list(_index['files'])
+
+
+def case_set(validate: bool = True) -> CaseSet:
+    """有图且未被排除的 case 位集；抽样、出题在它上面再做交集"""
+    with _lock:
+        _refresh(validate)
+        return _index['usable']
+
+
+def card(cid: int) -> SvgFile:
+    """case id → (path, pll, color, state)（不受排除规则影响）"""
+    with _lock:
+        _refresh(validate=False)
+        return _index['by_id'][cid]
+
+
+def case_path(pll: str, state: int, color: int) -> Optional[str]:
+    """不受排除规则影响的路径查询（缩略图等展示用）"""
+    with _lock:
+        _refresh(validate=False)
+        return _index['all'].get((pll, state, color))
+
+
+def generated_key(path: str) -> Optional[CaseKey]:
+    """path 对应的图由生成器提供时返回 (pll, state, color)，否则 None"""
+    with _lock:
+        _refresh(validate=False)
+        if not _index['generated']:
+            return None
+        return _index['paths'].get(_norm(path))
+
+
+def read_svg(path: str) -> bytes:
+    """读一张 SVG 的字节：生成的图现场生成（有缓存），在打包文件里就从 mmap 取，否则读散文件"""
+    with _lock:
+        key = generated_key(path)
+        bundle = _index['bundle']
+        if key is None and bundle is not None:
+            packed = _index['paths'].get(_norm(path))
+            if packed is not None:
+                return bundle.read(packed)      # 持锁读：换数据来源时旧的 mmap 会被关掉
+    if key is not None:
+        return case_image.case_svg(*key)
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def svg_mtime(path: str) -> int:
+    """缓存失效用的 mtime：生成的图用生成器版本，打包文件里的图用打包文件的 mtime"""
+    with _lock:
+        if generated_key(path) is not None:
+            return case_image.VERSION
+        bundle = _index['bundle']
+        if bundle is not None and _norm(path) in _index['paths']:
+            return bundle.mtime_ns
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return 0
 
-    return all_files
 
-def build_standard_test_list() -> List[Tuple[str, str, int, int]]:
-    all_files = scan_all_svg()  # 拿到所有文件
-    from collections import defaultdict
+def build_standard_test_list(rng=random, subset: CaseSet = None) -> List[SvgFile]:
+    """每个 (pll, state) 随机一个颜色后打乱；subset 给定时只出其中的 case"""
+    with _lock:
+        usable = case_set()  # 走内存索引
+        by_id = _index['by_id']
+    if subset is not None:
+        usable &= subset
 
-    groups = defaultdict(list)
-    for path, pll, color, state in all_files:
-        key = (pll, state)  # 按 (pll, state) 分组
-        groups[key].append((path, pll, color, state))  # 同组的路径都存起来
+    groups: Dict[int, List[SvgFile]] = {}
+    for cid in usable.ids().tolist():  # id 升序，即按 (pll, state) 分组、组内按颜色
+        groups.setdefault(cid // cases.N_COLORS, []).append(by_id[cid])
 
     standard = []
-    for key in sorted(groups):  # 遍历所有分组
-        chosen = random.choice(groups[key])  # 每组随机选 1 个颜色
+    for group in groups.values():  # 遍历所有分组
+        chosen = rng.choice(group)  # 每组随机选 1 个颜色
         standard.append(chosen)
 
-    random.shuffle(standard)  # 打乱顺序
+    rng.shuffle(standard)  # 打乱顺序
     # print(len(standard))
-    return standard
\ No newline at end of file
+    return standard
@@ -0,0 +1,73 @@
+# core/trace.py
+"""
+核心算法的埋点。
+关闭时调用方只做一次 `if trace.ON:` 判断，不构造任何参数；
+打开后事件写进定长环形缓冲区，需要时 dump() 成 JSON Lines 文件。
+
+启用方式：
+    trace.enable()                 # 代码里打开
+    PLL_TRACE=trace.jsonl python main.py   # 环境变量打开，退出时自动写出
+用法：
+    if trace.ON:
+        trace.emit('score.curve', t=t, score=score)
+"""
+
+import atexit
+import json
+import os
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Tuple
+
+RING_SIZE = 100_000     # 环形缓冲区最多保留的事件数
+
+ON = False
+
+Event = Tuple[int, str, str, Dict]   # (perf_counter_ns, 线程名, 事件名, 字段)
+
+_ring: deque = deque(maxlen=RING_SIZE)
+
+
+def enable(size: int = RING_SIZE):
+    global ON, _ring
+    if _ring.maxlen != size:
+        _ring = deque(_ring, maxlen=size)
+    ON = True
+
+
+def disable():
+    global ON
+    ON = False
+
+
+def emit(name: str, **fields):
+    """记录一个事件；只应在 `if trace.ON:` 之内调用"""
+    _ring.append((time.perf_counter_ns(), threading.current_thread().name, name, fields))
+
+
+def events() -> List[Event]:
+    return list(_ring)
+
+
+def clear():
+    _ring.clear()
+
+
+def dump(path: str) -> int:
+    """把缓冲区写成 JSON Lines，返回写出的事件数"""
+    evs = events()
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        for ns, thread, name, fields in evs:
+            f.write(json.dumps(dict(ns=ns, thread=thread, name=name, **fields),
+                               ensure_ascii=False, default=str))
+            f.write('\n')
+    return len(evs)
+
+
+# ---------- 环境变量开关 ----------
+_env_file = os.environ.get('PLL_TRACE')
+if _env_file:
+    enable()
+    atexit.register(dump, _env_file)
@@ -1,75 +1,178 @@
 # core/weight_manager.py
-import json, os, math
-from typing import Dict, Tuple, List, Set
+import os, threading
+from typing import Dict, Iterable, Iterator, Mapping, Tuple, List, Set
+import numpy as np
 import core.config as cfg
+from core import persist
+from core import cases, scoring, storage
+from core import trace
 
 
 CFG_FILE = os.path.join(os.path.dirname(__file__), '..', 'resources', 'weights.json')
 
+
+class CaseWeights(Mapping):
+    """case id -> 权重 的只读视图，只包含训练过的 case；数据在 WeightManager 的数组里"""
+
+    def __init__(self, wm: 'WeightManager'):
+        self._wm = wm
+
+    def __getitem__(self, cid: int) -> float:
+        if not isinstance(cid, int) or not 0 <= cid < cases.N_CASES or not self._wm._known[cid]:
+            raise KeyError(cid)
+        return float(self._wm._w[cid])
+
+    def __iter__(self) -> Iterator[int]:
+        return (int(i) for i in np.flatnonzero(self._wm._known))
+
+    def __len__(self) -> int:
+        return int(self._wm._known.sum())
+
+
 class WeightManager:
-    """管理 CaseBaseWeight、ColorWeight、全局λ"""
+    """管理 CaseBaseWeight、ColorWeight、全局λ；权重是按 case id（见 core.cases）排的稠密数组"""
 
-    def __init__(self):
-        self.case: Dict[Tuple[str, int, int], float] = {}
+    def __init__(self, path: str = None, backend=None):
+        # 默认按 cfg.STORAGE 选后端；模拟器等场景可以直接指向一个 weights.json
+        self.backend = backend or (storage.JsonWeights(path) if path else storage.open_weights())
+        # 没训练过的 case 权重为 1.0（forget 的不动点），_known 记录哪些训练过
+        self._w = np.ones(cases.N_CASES)
+        self._known = np.zeros(cases.N_CASES, dtype=bool)
+        self._dirty = np.zeros(cases.N_CASES, dtype=bool)     # 改过还没写出的 case
+        self.case = CaseWeights(self)
+        self._lock = threading.Lock()   # 内存改动与后台落盘之间的互斥
         self.load()
 
     # ---------- 读 ----------
     def load(self):
-        if os.path.exists(CFG_FILE):
-            with open(CFG_FILE, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                self.case = {tuple(json.loads(k)): v for k, v in data.get('case', {}).items()}
-        else:
-            self.case = {}
+        persist.flush(self.backend.key)     # 先落盘尚未写出的改动，保证读到最新
+        w = self.backend.load()
+        self._known = ~np.isnan(w)
+        self._w = np.where(self._known, w, 1.0)
+        self._dirty[:] = False
+
+    def array(self) -> np.ndarray:
+        """按 case id 排的权重副本，未训练为 nan（与后端 load() 同格式）"""
+        return np.where(self._known, self._w, np.nan)
+
+    def assign(self, w: np.ndarray):
+        """整体换成 w（nan 为未训练），并登记写盘；回放时恢复录制开始时的权重用"""
+        w = np.asarray(w, dtype=float)
+        with self._lock:
+            self._known = ~np.isnan(w)
+            self._w = np.where(self._known, w, 1.0)
+            self._dirty[:] = True
+        self.save()
+
+    def _write(self):
+        """后台线程：把改过的 case 交给后端（文件后端整份改写，sqlite 只写这些行）"""
+        with self._lock:
+            ids = np.flatnonzero(self._dirty)
+            w = self.array()
+            self._dirty[:] = False
+        try:
+            self.backend.write(ids, w)
+        except OSError:
+            with self._lock:
+                self._dirty[ids] = True     # persist 会重试，这些行下次还要写
+            raise
 
     def save(self):
-        os.makedirs(os.path.dirname(CFG_FILE), exist_ok=True)
-        with open(CFG_FILE, 'w', encoding='utf-8') as f:
-            json.dump({
-                'case': {json.dumps(k): v for k, v in self.case.items()}
-            }, f, indent=2)
+        """登记一次写盘，由后台线程合并后写出"""
+        persist.schedule(self.backend.key, self._write)
+
+    def flush(self):
+        """立即把权重写到磁盘"""
+        persist.flush(self.backend.key)
 
     # ---------- 工具 ----------
     def time_factor(self, t: float) -> float:
         return max(min(t , 8) / 2 , 0.25 )       # 根据答题时间计算权重调整因子，时间大于8秒按8秒计算。
 
-    # ---------- 写 + 立即保存 ----------
+    def has_weights(self) -> bool:
+        """是否已有训练出的权重（代替每张图都去 stat 一次 weights.json）"""
+        return bool(self._known.any())
+
+    def weight(self, cid: int) -> float:
+        """case id 的抽样权重（不低于 CASE_MIN）"""
+        return max(float(self._w[cid]), cfg.CASE_MIN)
+
+    def weights(self) -> np.ndarray:
+        """全部 case 的有效权重数组，下标为 case id"""
+        return np.maximum(self._w, cfg.CASE_MIN)
+
+    # ---------- 写 + 后台保存 ----------
     def update(self, pll: str, state: int, color: int, is_correct: bool, time_taken: float):
-        # 主颜色权重更新
         key = (pll, state, color)
-        w = max(self.case.get(key, 1.0), cfg.CASE_MIN)
-
         if is_correct:
             factor = self.time_factor(time_taken)
         else:
             factor = self.time_factor(8)
 
-        new_w = w + cfg.LAMBDA * (factor - 1) * w
-        self.case[key] = max(min(new_w, cfg.CASE_MAX), cfg.CASE_MIN)
+        # 同一 (pll, state) 的 4 个颜色在数组里相邻：主颜色按 λ，其他颜色按同步因子
+        base = cases.key_id(pll, state) * cases.N_COLORS
+        ids = slice(base, base + cases.N_COLORS)
+        rate = np.full(cases.N_COLORS, cfg.COLOR_SYNC_FACTOR)
+        rate[color - 1] = cfg.LAMBDA
+        with self._lock:
+            w = np.maximum(self._w[ids], cfg.CASE_MIN)
+            self._w[ids] = scoring.clamp(w + rate * (factor - 1) * w)
+            self._known[ids] = True
+            self._dirty[ids] = True
+
+        if trace.ON:
+            trace.emit('weights.update', key=key, ok=is_correct, t=time_taken,
+                       factor=factor, old=float(w[color - 1]),
+                       new=float(self._w[base + color - 1]))
+        self.save()
+
+    def update_batch(self, attempts: Iterable[Tuple[int, bool, float]], forget: bool = False):
+        """
+        一次应用多条作答 (case id, 是否正确, 用时)，可顺带做本轮遗忘，只登记一次写盘。
+        每条作答对 4 个颜色的权重都是乘一个系数：先按 case 把系数累乘，最后统一 clamp，
+        所以结果与作答顺序无关（逐条 update 时中途的 clamp 会让顺序有影响）。
+        """
+        rows = list(attempts)
+        if rows:
+            cid = np.array([r[0] for r in rows])
+            ok = np.array([r[1] for r in rows], dtype=bool)
+            t = np.array([r[2] for r in rows], dtype=float)
+            factor = np.maximum(np.minimum(np.where(ok, t, 8), 8) / 2, 0.25)   # 同 time_factor
 
-        # 同步更新其他颜色
-        for c in range(1, 5):
-            if c == color:
-                continue
-            sync_key = (pll, state, c)
-            sync_w = max(self.case.get(sync_key, 1.0), cfg.CASE_MIN)
-            sync_new = sync_w + cfg.COLOR_SYNC_FACTOR * (factor - 1) * sync_w
-            self.case[sync_key] = max(min(sync_new, cfg.CASE_MAX), cfg.CASE_MIN)
+            # 每条作答一行 4 个颜色：主颜色按 λ，其他颜色按同步因子
+            rate = np.full((len(rows), cases.N_COLORS), cfg.COLOR_SYNC_FACTOR)
+            rate[np.arange(len(rows)), cid % cases.N_COLORS] = cfg.LAMBDA
+            ids = (cid // cases.N_COLORS * cases.N_COLORS)[:, None] + np.arange(cases.N_COLORS)
+            mult = np.ones(cases.N_CASES)
+            np.multiply.at(mult, ids, 1 + rate * (factor[:, None] - 1))
+            touched = np.zeros(cases.N_CASES, dtype=bool)
+            touched[ids] = True
 
+        with self._lock:
+            if rows:
+                w = scoring.clamp(np.maximum(self._w, cfg.CASE_MIN) * mult)
+                self._w = np.where(touched, w, self._w)
+                self._known |= touched
+                self._dirty |= touched
+            if forget:
+                self._w = np.where(self._known, scoring.forget(self._w), self._w)
+                self._dirty |= self._known
+        if trace.ON:
+            trace.emit('weights.batch', n=len(rows), forget=forget)
         self.save()
 
     def _get_colors_for_state(self, state_key: Tuple[str, int, int]) -> Set[Tuple[str, int, int]]:
         return {k for k in self.color.keys() if k[:3] == state_key}  # 获取同一状态下的所有颜色键
 
     def forget(self):
-        for k in list(self.case.keys()):
-            self.case[k] = cfg.FORGET_RATE * self.case[k] + 1 - cfg.FORGET_RATE   
+        with self._lock:
+            self._w = np.where(self._known, scoring.forget(self._w), self._w)
+            self._dirty |= self._known
+        if trace.ON:
+            trace.emit('weights.forget', n=len(self.case), rate=cfg.FORGET_RATE)
         self.save()  # 保存权重数据
 
     def build_weighted_list(self, all_files: List[Tuple[str, str, int, int]]):
-        weighted = []
-        for path, pll, color, state in all_files:
-            key = (pll, state, color)
-            w = max(self.case.get(key, 1.0), cfg.CASE_MIN)
-            weighted.append((path, pll, color, state, w))
-        return weighted
+        w = self.weights()[[cases.case_id(pll, state, color)
+                            for _, pll, color, state in all_files]]
+        return [f + (x,) for f, x in zip(all_files, w.tolist())]
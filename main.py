@@ -1,9 +1,11 @@
 import sys
 from PyQt5.QtWidgets import QApplication
 from ui.main_window import MainWindow
+from core import persist
 
 if __name__ == '__main__':
     app = QApplication(sys.argv)
+    app.aboutToQuit.connect(persist.flush)   # 退出前写完后台缓存的数据
     w = MainWindow()
     w.show()
     sys.exit(app.exec_())
\ No newline at end of file
@@ -0,0 +1,128 @@
+# ui/card_view.py
+"""
+训练器左侧的大图：
+- Prefetcher 在后台线程把下一张 SVG 栅格化成 QImage，用户看当前这张时就准备好；
+- CardView 一次性换上整帧，并在这一帧真正画出来时发出 painted 信号，计时从这里开始。
+生成的 case 图（core.case_image）直接用 QPainter 画多边形，不走 SVG 解析。
+"""
+
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Iterable, Optional
+
+from PyQt5.QtCore import Qt, QByteArray, QPointF, QRectF, pyqtSignal
+from PyQt5.QtGui import QColor, QImage, QPainter, QPen, QPixmap, QPolygonF
+from PyQt5.QtSvg import QSvgRenderer
+from PyQt5.QtWidgets import QWidget
+
+from core import case_image
+from core.svg_scanner import generated_key, read_svg
+
+CARD_SIZE = 400
+PREFETCH_AHEAD = 2     # 出牌计划已知时，提前渲染接下来几张
+
+
+def _qpolys(polys):
+    return tuple(QPolygonF([QPointF(x, y) for x, y in poly]) for poly in polys)
+
+
+# 几何 → QPolygonF，导入时一次建好、之后只读：预渲染线程和 GUI 线程同时画也不会看到半成品
+_FACES = _qpolys(case_image.FACES)
+_STICKERS = _qpolys(case_image.STICKERS)
+
+
+def paint_case(p: QPainter, key, size: int):
+    """直接画一张生成的 case 图，效果与 QSvgRenderer 渲染 case_svg() 一致"""
+    x0, y0, w, h = case_image.VIEWBOX
+    p.save()
+    p.setRenderHint(QPainter.Antialiasing)
+    p.scale(size / w, size / h)
+    p.translate(-x0, -y0)
+    p.fillRect(QRectF(x0, y0, w, h), QColor(case_image.BACKGROUND))
+    # 黑色立方体底：0.1 宽的圆角描边
+    pen = QPen(QColor(case_image.BODY), 0.1)
+    pen.setJoinStyle(Qt.RoundJoin)
+    p.setPen(pen)
+    p.setBrush(QColor(case_image.BODY))
+    for poly in _FACES:
+        p.drawPolygon(poly)
+    # 贴纸：SVG 里 stroke-width 为 0，不描边
+    p.setPen(Qt.NoPen)
+    for poly, fill in zip(_STICKERS, case_image.stickers(*key)):
+        p.setBrush(QColor(fill))
+        p.drawPolygon(poly)
+    p.restore()
+
+
+def paint_svg(p: QPainter, path: str, size: int):
+    """把 path 的图画进 size×size 的区域：生成的图直接画，其余走 QSvgRenderer"""
+    key = generated_key(path)
+    if key is not None:
+        paint_case(p, key, size)
+        return
+    renderer = QSvgRenderer(QByteArray(read_svg(path)))   # 打包文件里的图直接喂字节
+    renderer.render(p)
+
+
+def render_image(path: str, size: int = CARD_SIZE) -> QImage:
+    """SVG → QImage；只用 QImage，可以在非 GUI 线程里调用"""
+    img = QImage(size, size, QImage.Format_ARGB32_Premultiplied)
+    img.fill(Qt.transparent)
+    with QPainter(img) as p:
+        paint_svg(p, path, size)
+    return img
+
+
+# ---------- 预取 ----------
+class Prefetcher:
+    """后台预渲染；take() 取走结果，没预取过的就地渲染"""
+
+    def __init__(self, size: int = CARD_SIZE):
+        self.size = size
+        self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix='prefetch')
+        self._jobs: Dict[str, Future] = {}
+
+    def prefetch(self, path: str):
+        if path and path not in self._jobs:
+            self._jobs[path] = self._pool.submit(render_image, path, self.size)
+
+    def prefetch_many(self, paths: Iterable[str]):
+        """按顺序排队预渲染接下来的几张（出牌计划已知）"""
+        for path in paths:
+            self.prefetch(path)
+
+    def take(self, path: str) -> QImage:
+        job = self._jobs.pop(path, None)
+        if job is None:
+            return render_image(path, self.size)
+        return job.result()
+
+    def clear(self):
+        for job in self._jobs.values():
+            job.cancel()
+        self._jobs.clear()
+
+
+# ---------- 显示 ----------
+class CardView(QWidget):
+    """显示整帧图片；新帧第一次绘制完成时发出 painted"""
+    painted = pyqtSignal()
+
+    def __init__(self, parent=None, size: int = CARD_SIZE):
+        super().__init__(parent)
+        self.setFixedSize(size, size)
+        self._frame: Optional[QPixmap] = None
+        self._fresh = False
+
+    def show_frame(self, img: Optional[QImage]):
+        """原子地换上一帧（None 清空）；下一次 paintEvent 画的就是完整的新图"""
+        self._frame = QPixmap.fromImage(img) if img is not None else None
+        self._fresh = img is not None
+        self.update()
+
+    def paintEvent(self, e):
+        if self._frame is not None:
+            with QPainter(self) as p:
+                p.drawPixmap(0, 0, self._frame)
+        if self._fresh:
+            self._fresh = False
+            self.painted.emit()
@@ -1,31 +1,17 @@
 # ui/custom_trainer.py
-import os
-import random
-import time
-
 from PyQt5.QtCore import Qt, QTimer, QSize
-from PyQt5.QtGui import QFont, QIcon, QPixmap, QPainter, QColor
+from PyQt5.QtGui import QFont, QIcon, QColor
 from PyQt5.QtWidgets import (
     QWidget, QLabel, QPushButton, QVBoxLayout, QHBoxLayout,
-    QTableWidget, QTableWidgetItem, QHeaderView, QMessageBox
+    QTableWidget, QTableWidgetItem, QHeaderView, QMessageBox, QComboBox
 )
-from PyQt5.QtSvg import QSvgWidget, QSvgRenderer
 
-from core.svg_scanner import scan_all_svg
-from core.weight_manager import WeightManager, CFG_FILE
+from core.session import CustomSession
 from core import config as cfg
-from core.stat_store import StatStore
-
-store = StatStore()
-
-# ---------- 通用工具 ----------
-def svg_to_pixmap(path: str, size: int = 32) -> QPixmap:
-    renderer = QSvgRenderer(path)
-    pm = QPixmap(QSize(size, size))
-    pm.fill(Qt.transparent)
-    with QPainter(pm) as p:
-        renderer.render(p)
-    return pm
+from core import settings
+from ui.pixmap_cache import svg_to_pixmap
+from ui.card_view import PREFETCH_AHEAD, CardView, Prefetcher, render_image
+from ui.reaction_timer import ReactionTimer
 
 # ---------- 左侧面板 ----------
 class LeftPane(QWidget):
@@ -37,9 +23,8 @@ class LeftPane(QWidget):
         self.time_label.setFont(QFont('Arial', 20))
         self.time_label.setGeometry(0, 0, 400, 30)
 
-        self.svg_widget = QSvgWidget(self)
-        self.svg_widget.setFixedSize(400, 400)
-        self.svg_widget.move(0, 30)
+        self.card = CardView(self)     # 整帧切换，画出来后发 painted
+        self.card.move(0, 30)
 
         self.tip_label = QLabel(self)
         self.tip_label.setAlignment(Qt.AlignCenter)
@@ -55,30 +40,43 @@ class LeftPane(QWidget):
         self.tip_label.setVisible(bool(text))
 
     def load_svg(self, path: str):
-        if path:
-            self.svg_widget.load(path)
-        else:
-            # 空字符串时不调用 load，避免警告
-            self.svg_widget.renderer().load(b'')   # 直接清空内部 renderer
+        """同步渲染并显示；空字符串清空图片"""
+        self.card.show_frame(render_image(path) if path else None)
+
+    def show_card(self, img):
+        """显示预渲染好的一帧"""
+        self.card.show_frame(img)
+
+# 改了这些设置，下一轮的出牌计划要重排
+_PLAN_FIELDS = {'CUSTOM_TRAIN_COUNT', 'CASE_MIN', 'ROUND_REPLACE', 'ROUND_MAX_REPEATS',
+                'ROUND_MIN_GAP', 'DRILL'}
+
+# 练习范围下拉框：(显示名, 子集表达式，见 core/subsets.py)
+DRILL_PRESETS = [
+    ('全部', 'all'),
+    ('G 系列', 'G'),
+    ('相邻换角', 'adj'),
+    ('对角换角', 'diag'),
+    ('只换棱', 'edge'),
+    ('最弱 20 个', 'weakest:20'),
+]
 
 # ---------- 权重训练器 ----------
 class CustomTrainer(QWidget):
     def __init__(self, parent=None, return_to_menu=None):
         super().__init__(parent)
         self.return_to_menu = return_to_menu
-        self.wm = WeightManager()  # 全局一份
-
-        self.TOTAL = cfg.CUSTOM_TRAIN_COUNT
+        self.session = CustomSession()     # 抽牌、记录、权重都在 core 里
 
         self.current_info = None
         self.wait_correct = False
         self.recorded = False
-        self.start_time = 0
-        self.timer = QTimer()
-        self.timer.timeout.connect(self.update_time)
+        self.prefetcher = Prefetcher()     # 看当前这张时预渲染后面几张
 
         self.left_pane = LeftPane()
-        self.counter_label = QLabel(f'0 / {self.TOTAL}')
+        self.left_pane.card.painted.connect(self.on_card_painted)
+        self.clock = ReactionTimer(self.left_pane.set_time, self)   # 单调时钟 + 按键事件时间戳
+        self.counter_label = QLabel()
         self.counter_label.setAlignment(Qt.AlignCenter)
         self.counter_label.setFont(QFont('Arial', 16))
 
@@ -86,6 +84,13 @@ class CustomTrainer(QWidget):
         self.start_btn.setFixedSize(80, 30)
         self.start_btn.clicked.connect(self.start_test)
 
+        self.drill_box = QComboBox()       # 练习范围，切换只重排计划
+        self.drill_box.setFixedSize(90, 30)
+        for name, expr in DRILL_PRESETS:
+            self.drill_box.addItem(name, expr)
+        self._show_drill()
+        self.drill_box.activated.connect(self.on_drill)
+
         restart_btn = QPushButton('重新开始')
         restart_btn.setFixedSize(80, 30)
         restart_btn.clicked.connect(self.restart_test)
@@ -95,6 +100,7 @@ class CustomTrainer(QWidget):
         back_btn.clicked.connect(self.go_back)
 
         top_layout = QHBoxLayout()
+        top_layout.addWidget(self.drill_box)
         top_layout.addWidget(self.start_btn)
         top_layout.addWidget(restart_btn)
         top_layout.addWidget(back_btn)
@@ -128,35 +134,63 @@ class CustomTrainer(QWidget):
         layout.setContentsMargins(0, 0, 0, 0)
         self.setFixedSize(720, 510)
 
-        self.records = []
-        self.correct_count = 0
-        self.idx = 0
+        self._replan = False               # 设置变了、计划还没重排
+        settings.subscribe(self._on_settings)
         self.restart_test()
 
     # ---------- 公共方法 ----------
     def go_back(self):
         self.stop_timer()
+        self.session.flush()
         self.restart_test()
         if self.return_to_menu:
             self.return_to_menu()
         else:
             print("返回函数未设置")
 
+    def _show_drill(self):
+        """下拉框显示当前的 cfg.DRILL；不在预设里的表达式作为一项补上"""
+        i = self.drill_box.findData(cfg.DRILL)
+        if i < 0:
+            self.drill_box.addItem(cfg.DRILL, cfg.DRILL)
+            i = self.drill_box.count() - 1
+        self.drill_box.setCurrentIndex(i)
+
+    def on_drill(self, index):
+        settings.set('DRILL', self.drill_box.itemData(index))
+
+    def _on_settings(self, changed):
+        """拖滑块时只记一笔，页面重新显示时才重排，不跟着每一格重开"""
+        if 'DRILL' in changed:
+            self._show_drill()
+        if changed & _PLAN_FIELDS:
+            self._replan = True
+            if self.isVisible():
+                self.reconfigure()
+
+    def reconfigure(self):
+        """没在答题就按新设置重开一轮，答题中的这一轮不受影响"""
+        if self._replan and not self.test_started:
+            self.restart_test()
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.reconfigure()
+
     def start_test(self):
         """首次点击开始按钮后才开始计时、加载图片"""
         if self.test_started:
             return
         self.test_started = True
         self.start_btn.setEnabled(False)   # 防止重复点击
+        self.session.begin()
         self.next_image()                  # 真正开始
 
     def restart_test(self):
         """重置到未开始状态"""
-        self.TOTAL = cfg.CUSTOM_TRAIN_COUNT
-        self.records.clear()
-        self.correct_count = 0
-        self.idx = 0
-        self.counter_label.setText('0 / {}'.format(self.TOTAL))
+        self._replan = False
+        self.session.reset()               # 第一张已抽好，这里开始预渲染
+        self.counter_label.setText('0 / {}'.format(self.session.total))
         self.table.setRowCount(0)
 
         # 新增：回到初始未开始状态
@@ -164,95 +198,48 @@ class CustomTrainer(QWidget):
         self.start_btn.setEnabled(True)
         self.left_pane.load_svg('')        # 清空图片
         self.left_pane.set_time('0.00 s')
-        self.left_pane.show_tip('')
+        self.left_pane.show_tip(self.session.notice or '')   # 如练习范围为空时的提示
         self.stop_timer()
-        raw_files = scan_all_svg()
-        if not os.path.exists(CFG_FILE):
-            self.all_files = random.sample(raw_files, k=min(len(raw_files), cfg.CUSTOM_TRAIN_COUNT))
-        else:
-            weighted = self.wm.build_weighted_list(raw_files)
-            choices, weights = zip(*[(t[:4], t[4]) for t in weighted])
-            k = min(len(choices), cfg.CUSTOM_TRAIN_COUNT)
-            self.all_files = random.choices(choices, weights=weights, k=k)
-    
+        self.prefetcher.clear()
+        self.prefetcher.prefetch_many(path for path, *_ in self.session.peek(PREFETCH_AHEAD))
+
     def next_image(self):
-        if self.idx >= self.TOTAL:
+        if self.session.done:
             self.show_end_dialog()
             return
         self.wait_correct = False
         self.recorded = False
 
-        # 按权重或随机抽取
-        if os.path.exists(CFG_FILE):
-            weighted = self.wm.build_weighted_list(scan_all_svg())
-            choices, weights = zip(*[(t[:4], t[4]) for t in weighted])
-            path, pll, color, state = random.choices(choices, weights=weights, k=1)[0]
-        else:
-            path, pll, color, state = random.choice(self.all_files)
-
-        self.current_info = (path, pll, color, state)
-        self.left_pane.load_svg(path)
-        self.left_pane.set_time('0.00 s')
-        self.reset_timer()
+        # 下一张在上一张显示时就已抽好、渲染好，这里只是换帧
+        self.current_info = self.session.advance()
+        self.left_pane.show_card(self.prefetcher.take(self.current_info[0]))
+        self.clock.arm()                   # 真正的起点在 on_card_painted
         self.left_pane.show_tip('')
         self.setFocus()
-        self.idx += 1
-        self.counter_label.setText(f'{self.idx} / {self.TOTAL}')
+        self.counter_label.setText(f'{self.session.idx} / {self.session.total}')
+
+        # 预取：整轮顺序开局已排好，后台渲染接下来几张
+        self.prefetcher.prefetch_many(path for path, *_ in self.session.peek(PREFETCH_AHEAD))
 
-    def reset_timer(self):
-        self.start_time = time.time()
-        self.timer.start(50)
+    def on_card_painted(self):
+        """新图真正画到屏幕上才开始计时，渲染耗时不计入反应时间"""
+        if self.test_started and not self.wait_correct:
+            self.clock.mark_painted()
 
     def stop_timer(self):
-        self.timer.stop()
+        self.clock.cancel()
 
     def elapsed(self):
-        return time.time() - self.start_time
-
-    def update_time(self):
-        self.left_pane.set_time(f'{self.elapsed():.2f} s')
+        return self.clock.elapsed()
 
     def show_tip(self, text: str):
         self.left_pane.show_tip(text)
 
-    def add_record(self, path, pll, result):
-        row = self.table.rowCount()
-        self.table.insertRow(row)
-
-        icon_item = QTableWidgetItem()
-        icon_item.setIcon(QIcon(svg_to_pixmap(path, 96)))
-        icon_item.setTextAlignment(Qt.AlignCenter)
-        self.table.setItem(row, 0, icon_item)
-
-        pll_item = QTableWidgetItem(pll)
-        pll_item.setTextAlignment(Qt.AlignCenter)
-        self.table.setItem(row, 1, pll_item)
-
-        result_item = QTableWidgetItem(result)
-        result_item.setTextAlignment(Qt.AlignCenter)
-        if result == '错误':
-            result_item.setForeground(Qt.red)
-        else:
-            try:
-                t = float(result.split()[0])
-                color = Qt.green if t < 2.0 else QColor(255, 140, 0)
-                result_item.setForeground(color)
-            except ValueError:
-                pass
-        self.table.setItem(row, 2, result_item)
-        self.records.append((path, pll, result))
-        if result != '错误':
-            self.correct_count += 1
-        self.counter_label.setText(f'{self.idx} / {self.TOTAL}')
-
     # ----------------- CustomTrainer 新增 / 替换 -----------------
     def show_end_dialog(self):
         """训练结束，统计+排序+权重衰减"""
-        total_time = sum(
-            float(r[2].split()[0]) for r in self.records if r[2] != '错误'
-        )
-        avg = total_time / max(self.correct_count, 1)
-        correct_str = f'{self.correct_count} / {self.TOTAL}'
+        avg = self.session.average_time()
+        correct_str = f'{self.session.correct_count} / {self.session.total}'
 
         msg = QMessageBox(self)
         msg.setWindowTitle('训练结束')
@@ -261,22 +248,16 @@ class CustomTrainer(QWidget):
         msg.exec_()
 
         # 排序：错误优先，时间降序
-        def sort_key(rec):
-            res = rec[2]
-            if res == '错误':
-                return (0, 9999)
-            return (1, -float(res.split()[0]))
-        self.records.sort(key=sort_key)
-
-        # 清空并重新填充表格
         self.table.setRowCount(0)
-        for path, pll, res in self.records:
-            self._fill_row(path, pll, res)
+        for attempt in self.session.ranked():
+            self._fill_row(attempt)
 
-        # 全局权重衰减
-        self.wm.forget()
+        # 全局权重衰减并落盘
+        self.session.finish()
 
-    def _fill_row(self, path: str, pll: str, result: str):
+    def _fill_row(self, attempt):
+        path, pll = attempt.card[:2]
+        result = f'{attempt.time:.2f} s' if attempt.ok else '错误'
         row = self.table.rowCount()
         self.table.insertRow(row)
 
@@ -309,20 +290,18 @@ class CustomTrainer(QWidget):
         correct = self.current_info[1][0].upper()
 
         if self.wait_correct:
+            self.session.keystroke(ch)
             if ch == correct:
                 QTimer.singleShot(cfg.NEXT_DELAY_MS, self.next_image)
             return
 
-        self.stop_timer()
-        path, pll, color, state = self.current_info
-        t = self.elapsed() if ch == correct else 0.0
+        pll = self.current_info[1]
+        t, latency = self.clock.stop(event)   # 按键事件时间戳 - 图片绘制时刻
         ok = ch == correct
 
-        # 记录
-        store.push(pll, state, t, ok)
-        self.add_record(path, pll, '错误' if not ok else f'{t:.2f} s')
-        # 更新权重
-        self.wm.update(pll=pll, state=state, color=color, is_correct=ok, time_taken=t if ok else 0.0)
+        # 记录统计并更新权重
+        attempt = self.session.record(t, ok, ts=self.clock.shown_wall, latency=latency, key=ch)
+        self._fill_row(attempt)
 
         if ok:
             QTimer.singleShot(cfg.NEXT_DELAY_MS, self.next_image)
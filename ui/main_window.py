@@ -2,19 +2,18 @@
 from PyQt5.QtCore import Qt
 from PyQt5.QtWidgets import QMainWindow, QPushButton, QVBoxLayout, QWidget, QStackedWidget, QLabel
 from PyQt5.QtGui import QFont
-from ui.pll_trainer import PLLTrainer
-from ui.custom_trainer import CustomTrainer
-from ui.mastery_view import MasteryView
-from ui.setting import SettingsPage
+# 各页面在第一次进入时才导入，启动只需要主菜单
 
 class MainWindow(QMainWindow):
     def __init__(self):
         super().__init__()
         self.setWindowTitle('六格观察法')
         self.setFixedSize(800, 500)
-        # 存储训练器实例
+        # 各页面实例：第一次进入时创建，之后复用
         self.pll_trainer = None
         self.custom_trainer = None
+        self.mastery_view = None
+        self.settings_view = None
         self.menu_widget = None  # 存储主菜单实例
         # 标题
         title = QLabel('六格观察法')
@@ -67,38 +66,29 @@ class MainWindow(QMainWindow):
         self.stack.setCurrentWidget(self.menu_widget)
         self.menu_widget.setFocus()
 
+    def _show_page(self, attr, factory):
+        """页面第一次进入时才创建，之后一直复用"""
+        page = getattr(self, attr)
+        if page is None:
+            page = factory(return_to_menu=self.show_menu)
+            setattr(self, attr, page)
+            self.stack.addWidget(page)
+        self.stack.setCurrentWidget(page)
+        page.setFocus()
+        return page
+
     def show_pll_trainer(self):
-        # 每次都创建新实例，确保读取最新 cfg
-        if self.pll_trainer is not None:
-            # 如果旧实例存在，先从堆栈里移除并销毁
-            self.stack.removeWidget(self.pll_trainer)
-            self.pll_trainer.deleteLater()
-        self.pll_trainer = PLLTrainer(return_to_menu=self.show_menu)
-        self.stack.addWidget(self.pll_trainer)    
-        self.stack.setCurrentWidget(self.pll_trainer)
-        self.pll_trainer.setFocus()
-    
+        from ui.pll_trainer import PLLTrainer
+        self._show_page('pll_trainer', PLLTrainer)
+
     def show_custom_trainer(self):
-        # 每次都创建新实例，确保读取最新 cfg
-        if self.custom_trainer is not None:
-            # 如果旧实例存在，先从堆栈里移除并销毁
-            self.stack.removeWidget(self.custom_trainer)
-            self.custom_trainer.deleteLater()
-        self.custom_trainer = CustomTrainer(return_to_menu=self.show_menu)
-        self.stack.addWidget(self.custom_trainer)
-        self.stack.setCurrentWidget(self.custom_trainer)
-        self.custom_trainer.setFocus()
+        from ui.custom_trainer import CustomTrainer
+        self._show_page('custom_trainer', CustomTrainer)
 
     def show_stats(self):
-        if not hasattr(self, 'mastery_view') or self.mastery_view is None:
-            self.mastery_view = MasteryView(return_to_menu=self.show_menu)
-            self.stack.addWidget(self.mastery_view)
-        self.stack.setCurrentWidget(self.mastery_view)
-        self.mastery_view.setFocus()
-    
+        from ui.mastery_view import MasteryView
+        self._show_page('mastery_view', MasteryView)
+
     def show_settings(self):
-        if not hasattr(self, 'settings_view') or self.settings_view is None:
-            self.settings_view = SettingsPage(return_to_menu=self.show_menu)
-            self.stack.addWidget(self.settings_view)
-        self.stack.setCurrentWidget(self.settings_view)
-        self.settings_view.setFocus()
\ No newline at end of file
+        from ui.setting import SettingsPage
+        self._show_page('settings_view', SettingsPage)
@@ -1,27 +1,124 @@
 # ui/mastery_view.py
-import os
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import (Qt, QAbstractTableModel, QModelIndex,
+                          QSortFilterProxyModel, QSize)
 from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QPushButton,
-                             QTableWidget, QTableWidgetItem, QHeaderView,
+                             QTableView, QHeaderView, QStyledItemDelegate,
                              QAbstractItemView, QHBoxLayout, QMessageBox)
-from PyQt5.QtSvg import QSvgWidget
 from PyQt5.QtGui import QColor
 from core.stat_store import StatStore
+from core import cases
+from core.svg_scanner import case_path
+from ui.pixmap_cache import svg_to_pixmap
+
+THUMB = 96
+
+PATH_ROLE = Qt.UserRole + 1      # 缩略图 SVG 路径
+SORT_ROLE = Qt.UserRole + 2      # 排序用的原始数值
+
+# ---------- 数据模型 ----------
+class MasteryModel(QAbstractTableModel):
+    """每行一个 (pll, state)，行号即 key id；数据直接读 StatStore.snapshot() 的缓存视图"""
+    HEADERS = ["", "PLL", "平均时间", "正确率", "掌握值"]
+
+    def __init__(self, store: StatStore, parent=None):
+        super().__init__(parent)
+        self.store = store
+        self.rows = cases.key_cases(color=1)      # 缩略图统一用 color1
+        self._data = store.snapshot()
+        self._changed = set()
+        store.subscribe(self._on_stats_changed)
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return self.HEADERS[section]
+        return None
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        case = self.rows[index.row()]
+        col = index.column()
+        info = self._data.get(case.key_id, {})
+
+        if role == PATH_ROLE and col == 0:
+            return case_path(*case.key)
+        if role == SORT_ROLE:
+            return (index.row(), index.row(), info.get("avg_time", 0.0),
+                    info.get("accuracy", 0.0), info.get("mastery", 0.0))[col]
+        if role == Qt.DisplayRole:
+            if col == 1:
+                return case.label
+            if col == 2:
+                return str(info.get("avg_time", "-"))
+            if col == 3:
+                return f"{info.get('accuracy', 0) * 100:.0f}%" if info.get("accuracy") else "–"
+            if col == 4:
+                m = info.get("mastery")
+                return f"{m:.1f}" if isinstance(m, (int, float)) else "–"
+        if role == Qt.BackgroundRole and col > 0 and info.get("mastery") == 100:
+            return QColor("#c8e6c9")
+        return None
+
+    # ---------- 增量刷新 ----------
+    def _on_stats_changed(self, ids):
+        """StatStore 的变更通知：只记下变了哪些 key id"""
+        self._changed |= set(ids)
+
+    def refresh(self):
+        """只重算、重绘有变化的行"""
+        if not self._changed:
+            return
+        changed, self._changed = self._changed, set()
+        self._data = self.store.snapshot()
+        last = self.columnCount() - 1
+        for row in sorted(changed):
+            self.dataChanged.emit(self.index(row, 1), self.index(row, last))
+
+
+# ---------- 缩略图代理 ----------
+class ThumbDelegate(QStyledItemDelegate):
+    """只在行可见、需要绘制时取缓存缩略图"""
+
+    def paint(self, painter, option, index):
+        path = index.data(PATH_ROLE)
+        if not path:
+            return super().paint(painter, option, index)
+        pm = svg_to_pixmap(path, THUMB)
+        r = option.rect
+        painter.drawPixmap(r.x() + (r.width() - THUMB) // 2,
+                           r.y() + (r.height() - THUMB) // 2, pm)
+
+    def sizeHint(self, option, index):
+        return QSize(THUMB, THUMB)
+
 
 class MasteryView(QWidget):
     def __init__(self, return_to_menu):
         super().__init__()
         self.return_to_menu = return_to_menu
+        self.store = StatStore.shared()
         self.init_ui()
 
     def init_ui(self):
         layout = QVBoxLayout(self)
-        # 表格
-        self.table = QTableWidget(84, 5)
-        self.table.setHorizontalHeaderLabels(
-            ["", "PLL", "平均时间", "正确率", "掌握值"])
+        # 模型 → 排序代理 → 表格
+        self.model = MasteryModel(self.store, self)
+        self.proxy = QSortFilterProxyModel(self)
+        self.proxy.setSourceModel(self.model)
+        self.proxy.setSortRole(SORT_ROLE)
+        self.proxy.setDynamicSortFilter(True)   # 数据变化后自动保持排序
+        self.table = QTableView()
+        self.table.setModel(self.proxy)
+        self.table.setItemDelegateForColumn(0, ThumbDelegate(self.table))
         self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
         self.table.verticalHeader().setVisible(False)
+        self.table.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
         self.table.verticalHeader().setDefaultSectionSize(110)  # 行高
         header = self.table.horizontalHeader()
         header.setSectionResizeMode(0, QHeaderView.Fixed)  # 缩略图
@@ -30,24 +127,6 @@ class MasteryView(QWidget):
         header.setSectionResizeMode(3, QHeaderView.Stretch)  # 正确率
         header.setSectionResizeMode(4, QHeaderView.Stretch)  # 掌握值
         self.table.setColumnWidth(0, 110)  # 缩略图列宽
-        # 填充 84 行空占位
-        root = os.path.join(os.path.dirname(__file__), "..", "resources", "SVG")
-        idx = 0
-        for pll in ["Aa", "Ab", "E", "F", "Ga", "Gb", "Gc", "Gd",
-                    "Ja", "Jb", "Na", "Nb", "Ra", "Rb", "T", "Ua",
-                    "Ub", "V", "Y", "Z"]:
-            for state in range(1, 5):
-                # 缩略图（96×96）
-                svg_path = os.path.join(
-                    root, f"{pll}_pern", f"{pll}_pern_color1_state{state}.svg")
-                svg_w = QSvgWidget(svg_path)
-                svg_w.setFixedSize(96, 96)
-                self.table.setCellWidget(idx, 0, svg_w)
-                self.table.setItem(idx, 1, QTableWidgetItem(pll))
-                self.table.setItem(idx, 2, QTableWidgetItem("–"))
-                self.table.setItem(idx, 3, QTableWidgetItem("–"))
-                self.table.setItem(idx, 4, QTableWidgetItem("–"))
-                idx += 1
         layout.addWidget(self.table)
         # 按钮行
         btn_row = QWidget()
@@ -72,62 +151,21 @@ class MasteryView(QWidget):
         self.refresh_table()
 
     def refresh_table(self):
-        # 拉取数据
-        try:
-            data = StatStore().snapshot()
-        except Exception:
-            data = {}
-        # 生成 84 条 (pll, state) 原始顺序
-        base = [(pll, st) for pll in
-                ["Aa", "Ab", "E", "F", "Ga", "Gb", "Gc", "Gd", "H",
-                 "Ja", "Jb", "Na", "Nb", "Ra", "Rb", "T", "Ua",
-                 "Ub", "V", "Y", "Z"]
-                for st in range(1, 5)]
-        # 排序开关
-        if getattr(self, '_sort_by_mastery', False):
-            base.sort(key=lambda k: data.get(k, {}).get('mastery', 0))
-        # 默认顺序就是 (pll, state) 原序，无需再排
-        # 清空并一次性重建表格
-        # print("Data loaded from stat.json:", data)
-        self.table.setRowCount(0)
-        root = os.path.join(os.path.dirname(__file__), "..", "resources", "SVG")
-        for pll, state in base:
-            row = self.table.rowCount()
-            self.table.insertRow(row)
-            # 缩略图
-            svg_path = os.path.join(root, f"{pll}_pern", f"{pll}_pern_color1_state{state}.svg")
-            svg_w = QSvgWidget(svg_path)
-            svg_w.setFixedSize(96, 96)
-            self.table.setCellWidget(row, 0, svg_w)
-            self.table.setItem(row, 1, QTableWidgetItem(f"{pll}-{state}"))
-            info = data.get((pll, state), {})
-            # print(f"key={pll}|{state}, info={info}")
-            self.table.setItem(row, 2, QTableWidgetItem(str(info.get("avg_time", "-"))))
-            self.table.setItem(row, 3, QTableWidgetItem(
-                f"{info.get('accuracy', 0) * 100:.0f}%" if info.get("accuracy") else "–"))
-            self.table.setItem(row, 4, QTableWidgetItem(
-                f"{info.get('mastery', '–'):.1f}" if isinstance(info.get("mastery"), (int, float)) else "–"))
-            if info.get("mastery") == 100:
-                for col in range(self.table.columnCount()):
-                    item = self.table.item(row, col)
-                    if item:                           # 单元格有 QTableWidgetItem 再设置
-                        item.setBackground(QColor("#c8e6c9"))
-            # print("StatStore._file =", StatStore._file)
-            # print("exists?", os.path.exists(StatStore._file))
-            # print("Data loaded from stat.json:", data)
+        # 只刷新有新记录的行；没有变化时什么都不做
+        self.model.refresh()
 
     def toggle_sort(self, checked):
-        self._sort_by_mastery = checked
-        self.refresh_table()
+        # 排序只改代理的行映射，不重建任何控件
+        if checked:
+            self.proxy.sort(4, Qt.AscendingOrder)
+        else:
+            self.proxy.sort(-1)        # 恢复 (pll, state) 原序
 
     def clear_data(self):
         reply = QMessageBox.question(
             self, "确认清空", "确定要清空所有统计数据吗？",
             QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
         if reply == QMessageBox.Yes:
-            # 直接删除持久化文件即可
-            try:
-                os.remove(StatStore._file)
-            except FileNotFoundError:
-                pass
+            # 删除记录文件（连同尚未落盘的缓冲）以及共享实例的内存
+            StatStore.clear_all()
             self.refresh_table()   # 刷新空表
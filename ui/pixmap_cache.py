@@ -0,0 +1,94 @@
+# ui/pixmap_cache.py
+"""
+SVG 缩略图缓存：两个训练器和统计页面共用。
+key = (绝对路径, 尺寸, mtime)，内存里按 LRU 保留，超过 MAX_BYTES 淘汰最久未用的；
+可选的磁盘 PNG 缓存让重启后的第一次显示也不用再栅格化。
+"""
+
+import hashlib
+import os
+from collections import OrderedDict
+
+from PyQt5.QtCore import Qt, QSize
+from PyQt5.QtGui import QPixmap, QPainter
+
+from core import persist
+from core.svg_scanner import svg_mtime
+from ui.card_view import paint_svg
+
+MAX_BYTES = 64 * 1024 * 1024    # 内存缓存上限（按 ARGB32 估算）
+DISK_CACHE = True               # 是否启用磁盘 PNG 缓存
+DISK_DIR = os.path.join(os.path.dirname(__file__), '..', 'resources', 'thumbs')
+
+_cache: 'OrderedDict[tuple, QPixmap]' = OrderedDict()
+_bytes = 0
+
+# 命中统计：render=真正栅格化次数，disk=从 PNG 读取，hit=内存命中
+stats = {'render': 0, 'disk': 0, 'hit': 0}
+
+
+def _cost(pm: QPixmap) -> int:
+    return pm.width() * pm.height() * 4
+
+
+def _disk_path(key) -> str:
+    digest = hashlib.sha1(repr(key).encode('utf-8')).hexdigest()
+    return os.path.join(DISK_DIR, digest + '.png')
+
+
+def _render(path: str, size: int) -> QPixmap:
+    pm = QPixmap(QSize(size, size))
+    pm.fill(Qt.transparent)
+    with QPainter(pm) as p:
+        paint_svg(p, path, size)
+    stats['render'] += 1
+    return pm
+
+
+def _put(key, pm: QPixmap):
+    global _bytes
+    _cache[key] = pm
+    _bytes += _cost(pm)
+    while _bytes > MAX_BYTES and len(_cache) > 1:
+        _, old = _cache.popitem(last=False)
+        _bytes -= _cost(old)
+
+
+def svg_to_pixmap(path: str, size: int = 32) -> QPixmap:
+    """返回 path 的 size×size 缩略图；同一文件同一尺寸只栅格化一次"""
+    path = os.path.abspath(path)
+    key = (path, size, svg_mtime(path))
+
+    pm = _cache.get(key)
+    if pm is not None:
+        _cache.move_to_end(key)
+        stats['hit'] += 1
+        return pm
+
+    png = _disk_path(key) if DISK_CACHE else None
+    if png and os.path.exists(png):
+        pm = QPixmap(png)
+        if not pm.isNull():
+            stats['disk'] += 1
+            _put(key, pm)
+            return pm
+
+    pm = _render(path, size)
+    _put(key, pm)
+    if png:
+        # PNG 写盘交给后台线程，不占用答题 → 下一张的路径
+        img = pm.toImage()
+        persist.schedule(png, lambda: _save_png(img, png))
+    return pm
+
+
+def _save_png(img, png: str):
+    os.makedirs(os.path.dirname(png), exist_ok=True)
+    img.save(png, 'PNG')
+
+
+def clear():
+    """清空内存缓存（磁盘 PNG 保留）"""
+    global _bytes
+    _cache.clear()
+    _bytes = 0
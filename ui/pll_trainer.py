@@ -1,26 +1,15 @@
 # ui/pll_trainer.py
-import os
-import time
-
 from PyQt5.QtCore import Qt, QTimer, QSize
-from PyQt5.QtGui import QFont, QIcon, QPixmap, QPainter, QColor
+from PyQt5.QtGui import QFont, QIcon, QColor
 from PyQt5.QtWidgets import (
     QWidget, QLabel, QPushButton, QVBoxLayout, QHBoxLayout,
     QTableWidget, QTableWidgetItem, QHeaderView, QMessageBox
 )
-from PyQt5.QtSvg import QSvgWidget, QSvgRenderer
-from core.svg_scanner import build_standard_test_list
-from core.stat_store import StatStore
+from core.session import StandardSession
 from core import config as cfg
-
-# ---------- 工具 ----------
-def svg_to_pixmap(path: str, size: int = 32) -> QPixmap:
-    renderer = QSvgRenderer(path)
-    pm = QPixmap(QSize(size, size))
-    pm.fill(Qt.transparent)
-    with QPainter(pm) as p:
-        renderer.render(p)
-    return pm
+from ui.pixmap_cache import svg_to_pixmap
+from ui.card_view import PREFETCH_AHEAD, CardView, Prefetcher, render_image
+from ui.reaction_timer import ReactionTimer
 
 # ---------- 左侧面板 ----------
 class LeftPane(QWidget):
@@ -31,9 +20,8 @@ class LeftPane(QWidget):
         self.time_label.setAlignment(Qt.AlignCenter)
         self.time_label.setFont(QFont('Arial', 20))
         self.time_label.setGeometry(0, 0, 400, 30)
-        self.svg_widget = QSvgWidget(self)
-        self.svg_widget.setFixedSize(400, 400)
-        self.svg_widget.move(0, 30)
+        self.card = CardView(self)     # 整帧切换，画出来后发 painted
+        self.card.move(0, 30)
         self.tip_label = QLabel(self)
         self.tip_label.setAlignment(Qt.AlignCenter)
         self.tip_label.setStyleSheet("color:red; font-size:16px;")
@@ -48,33 +36,30 @@ class LeftPane(QWidget):
         self.tip_label.setVisible(bool(text))
 
     def load_svg(self, path: str):
-        if path:
-            self.svg_widget.load(path)
-        else:
-            self.svg_widget.renderer().load(b'')   # 直接清空内部 renderer
+        """同步渲染并显示；空字符串清空图片"""
+        self.card.show_frame(render_image(path) if path else None)
+
+    def show_card(self, img):
+        """显示预渲染好的一帧"""
+        self.card.show_frame(img)
 
 # ---------- 标准训练器 ----------
 class PLLTrainer(QWidget):
     def __init__(self, parent=None, return_to_menu=None):
         super().__init__(parent)
         self.return_to_menu = return_to_menu
-        self.corr_count = 0
-        self.store = StatStore()
-
-        self.all_files = build_standard_test_list()
-        self.TOTAL = len(self.all_files)
+        self.session = StandardSession()   # 抽牌、记录、汇总都在 core 里
 
         self.current_info = None
         self.wait_correct = False
         self.recorded = False
-        self.start_time = 0
-
-        self.timer = QTimer()
-        self.timer.timeout.connect(self.update_time)
+        self.prefetcher = Prefetcher()     # 看当前这张时预渲染后面几张
 
         # 左侧
         self.left_pane = LeftPane()
-        self.counter_label = QLabel(f'0 / {self.TOTAL}')
+        self.left_pane.card.painted.connect(self.on_card_painted)
+        self.clock = ReactionTimer(self.left_pane.set_time, self)   # 单调时钟 + 按键事件时间戳
+        self.counter_label = QLabel()
         self.counter_label.setAlignment(Qt.AlignCenter)
         self.counter_label.setFont(QFont('Arial', 16))
 
@@ -123,15 +108,13 @@ class PLLTrainer(QWidget):
         layout.setContentsMargins(0, 0, 0, 0)
         self.setFixedSize(720, 510)
 
-        self.records = []
-        self.correct_count = 0
-        self.idx = 0
         self.test_started = False
         self.restart_test()
 
     # ---------- 公共方法 ----------
     def go_back(self):
         self.stop_timer()
+        self.session.flush()
         self.restart_test()
         if self.return_to_menu:
             self.return_to_menu()
@@ -144,14 +127,13 @@ class PLLTrainer(QWidget):
             return
         self.test_started = True
         self.start_btn.setEnabled(False)   # 防止重复点击
+        self.session.begin()
         self.next_image()                  # 真正开始
 
     def restart_test(self):
         """重置到未开始状态"""
-        self.records.clear()
-        self.correct_count = 0
-        self.idx = 0
-        self.counter_label.setText('0 / {}'.format(self.TOTAL))
+        self.session.reset()
+        self.counter_label.setText('0 / {}'.format(self.session.total))
         self.table.setRowCount(0)
 
         # 新增：回到初始未开始状态
@@ -159,100 +141,61 @@ class PLLTrainer(QWidget):
         self.start_btn.setEnabled(True)
         self.left_pane.load_svg('')        # 清空图片
         self.left_pane.set_time('0.00 s')
-        self.left_pane.show_tip('')
+        self.left_pane.show_tip(self.session.notice or '')   # 如练习范围为空时的提示
         self.stop_timer()
-        self.all_files = build_standard_test_list()
+        self.prefetcher.clear()
+        self.prefetcher.prefetch_many(path for path, *_ in self.session.peek(PREFETCH_AHEAD))
 
     def next_image(self):
         if not self.test_started:          # 防止误触发
             return
-        if self.idx >= self.TOTAL:
+        if self.session.done:
             self.show_end_dialog()
             return
         self.wait_correct = False
         self.recorded = False
-        path, pll, color, state = self.all_files[self.idx]  # 按顺序抽取
-        self.current_info = (path, pll, color, state)
-        self.left_pane.load_svg(path)
-        self.left_pane.set_time('0.00 s')
-        self.reset_timer()
+        self.current_info = self.session.advance()   # 按顺序抽取
+        self.left_pane.show_card(self.prefetcher.take(self.current_info[0]))   # 换上预渲染好的整帧
+        self.clock.arm()                   # 真正的起点在 on_card_painted
         self.left_pane.show_tip('')
         self.setFocus()
-        self.idx += 1
-        self.counter_label.setText(f'{self.idx} / {self.TOTAL}')
+        self.counter_label.setText(f'{self.session.idx} / {self.session.total}')
+        # 预取接下来几张
+        self.prefetcher.prefetch_many(path for path, *_ in self.session.peek(PREFETCH_AHEAD))
 
-    def reset_timer(self):
-        self.start_time = time.time()
-        self.timer.start(50)
+    def on_card_painted(self):
+        """新图真正画到屏幕上才开始计时，渲染耗时不计入反应时间"""
+        if self.test_started and not self.wait_correct:
+            self.clock.mark_painted()
 
     def stop_timer(self):
-        self.timer.stop()
+        self.clock.cancel()
 
     def elapsed(self):
-        return time.time() - self.start_time
-
-    def update_time(self):
-        self.left_pane.set_time(f'{self.elapsed():.2f} s')
+        return self.clock.elapsed()
 
     def show_tip(self, text: str):
         self.left_pane.show_tip(text)
 
-    def add_record(self, path, pll, result):
-        row = self.table.rowCount()
-        self.table.insertRow(row)
-
-        icon_item = QTableWidgetItem()
-        icon_item.setIcon(QIcon(svg_to_pixmap(path, 96)))
-        icon_item.setTextAlignment(Qt.AlignCenter)
-        self.table.setItem(row, 0, icon_item)
-
-        pll_item = QTableWidgetItem(pll)
-        pll_item.setTextAlignment(Qt.AlignCenter)
-        self.table.setItem(row, 1, pll_item)
-
-        result_item = QTableWidgetItem(result)
-        result_item.setTextAlignment(Qt.AlignCenter)
-        if result == '错误':
-            result_item.setForeground(Qt.red)
-        else:
-            try:
-                t = float(result.split()[0])
-                color = Qt.green if t < 2.0 else QColor(255, 140, 0)
-                result_item.setForeground(color)
-            except ValueError:
-                pass
-        self.table.setItem(row, 2, result_item)
-
-        self.records.append((path, pll, result))
-        if result != '错误':
-            self.correct_count += 1
-
     def show_end_dialog(self):
-        total_time = sum(
-            float(r[2].split()[0]) for r in self.records if r[2] != '错误'
-        )
-        avg = total_time / max(self.correct_count, 1)
-        correct_str = f'{self.correct_count} / {self.TOTAL}'
+        avg = self.session.average_time()
+        correct_str = f'{self.session.correct_count} / {self.session.total}'
 
         msg = QMessageBox(self)
         msg.setWindowTitle('训练结束')
         msg.setText(f'平均时间：{avg:.2f} 秒\n正确率：{correct_str}')
         msg.addButton('确定', QMessageBox.AcceptRole)
+        self.session.finish()              # 本轮结束，统计立即落盘
         msg.exec_()
 
         # 排序：错误优先，时间降序
-        def sort_key(rec):
-            res = rec[2]
-            if res == '错误':
-                return (0, 9999)
-            return (1, -float(res.split()[0]))
-        self.records.sort(key=sort_key)
-
         self.table.setRowCount(0)
-        for path, pll, res in self.records:
-            self._fill_row(path, pll, res)
+        for attempt in self.session.ranked():
+            self._fill_row(attempt)
 
-    def _fill_row(self, path, pll, result):
+    def _fill_row(self, attempt):
+        path, pll = attempt.card[:2]
+        result = f'{attempt.time:.2f} s' if attempt.ok else '错误'
         row = self.table.rowCount()
         self.table.insertRow(row)
 
@@ -285,22 +228,18 @@ class PLLTrainer(QWidget):
         correct = self.current_info[1][0].upper()
 
         if self.wait_correct:
+            self.session.keystroke(ch)
             if ch == correct:
                 QTimer.singleShot(cfg.NEXT_DELAY_MS, self.next_image)
             return
 
-        if ch == correct:
-            self.stop_timer()
-            t = self.elapsed()
-            self.add_record(self.current_info[0], self.current_info[1], f'{t:.2f} s')
-            pll = os.path.basename(self.current_info[0]).split('_')[0]
-            self.store.push(pll, self.current_info[3], t, True)
+        t, latency = self.clock.stop(event)   # 按键事件时间戳 - 图片绘制时刻
+        ok = ch == correct
+        attempt = self.session.record(t, ok, ts=self.clock.shown_wall, latency=latency, key=ch)
+        self._fill_row(attempt)
+        if ok:
             QTimer.singleShot(cfg.NEXT_DELAY_MS, self.next_image)
         else:
-            self.stop_timer()
-            self.add_record(self.current_info[0], self.current_info[1], '错误')
             correct_name = self.current_info[1]
             self.left_pane.show_tip(f'正确答案是 {correct_name}，输入 {correct} 继续')
-            self.wait_correct = True
-            pll = os.path.basename(self.current_info[0]).split('_')[0]
-            self.store.push(pll, self.current_info[3], self.elapsed(), False)
\ No newline at end of file
+            self.wait_correct = True
\ No newline at end of file
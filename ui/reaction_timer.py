@@ -0,0 +1,103 @@
+# ui/reaction_timer.py
+"""
+反应计时：
+- 单调高精度时钟（time.perf_counter），不受系统校时影响；
+- 起点是新图第一次绘制完成（CardView.painted），不是换图的那一刻；
+- 终点用按键事件自带的时间戳，而不是处理函数被调用的时间；
+  事件时间戳（毫秒，Qt 自己的时钟）用"最小偏移"映射到 perf_counter；
+- 界面上的计时标签只在文字变化时才刷新，用粗粒度定时器。
+"""
+
+import time
+from typing import Callable, Optional, Tuple
+
+from PyQt5.QtCore import QObject, QTimer, Qt
+
+TICK_MS = 100      # 计时标签刷新间隔
+MAX_LATENCY = 0.5  # 秒：换算出的分发延迟超过它，视为时间戳时钟跳变，重新校准
+
+
+class ReactionTimer(QObject):
+    def __init__(self, show_text: Callable[[str], None], parent=None):
+        super().__init__(parent)
+        self.show_text = show_text
+        self.shown_at = 0.0        # 绘制完成时刻（perf_counter 秒）
+        self.shown_wall = 0.0      # 同一时刻的墙钟时间（写进记录）
+        self.result = 0.0          # 最近一次停表得到的反应时间
+        self.latency = 0.0         # 按键事件 → 处理函数 的延迟
+        self.running = False
+        self._offset: Optional[float] = None   # perf_counter 秒 - 事件时间戳秒 的最小值
+        self._last_text = ''
+        self._tick = QTimer(self)
+        self._tick.setTimerType(Qt.CoarseTimer)
+        self._tick.timeout.connect(self._update_label)
+
+    # ---------- 起停 ----------
+    def arm(self):
+        """新图已换上，等待绘制；此时按键按换图时刻计算"""
+        self.shown_at = time.perf_counter()
+        self.shown_wall = time.time()
+        self.running = True
+        self._set_text('0.00 s')
+
+    def mark_painted(self):
+        """新图画出来了：这才是计时起点"""
+        self.shown_at = time.perf_counter()
+        self.shown_wall = time.time()
+        self.running = True
+        self._tick.start(TICK_MS)
+
+    def stop(self, event=None) -> Tuple[float, float]:
+        """停表，返回 (反应时间, 事件分发延迟)；event 为触发停表的按键事件"""
+        now = time.perf_counter()
+        self._tick.stop()
+        if not self.running:
+            return self.result, self.latency
+        self.running = False
+        t_event = self.event_time(event, now)
+        self.result = max(t_event - self.shown_at, 0.0)
+        self.latency = now - t_event
+        self._set_text(f'{self.result:.2f} s')
+        return self.result, self.latency
+
+    def cancel(self):
+        self._tick.stop()
+        self.running = False
+
+    def elapsed(self) -> float:
+        if self.running:
+            return time.perf_counter() - self.shown_at
+        return self.result
+
+    # ---------- 事件时间戳 ----------
+    def calibrate(self, event, now: float = None):
+        """用一个输入事件更新时钟偏移；偏移取历史最小值，即分发最快的那次"""
+        ts = event.timestamp() if event is not None else 0
+        if not ts:
+            return
+        now = time.perf_counter() if now is None else now
+        offset = now - ts / 1000.0
+        if self._offset is None or offset < self._offset:
+            self._offset = offset
+
+    def event_time(self, event, now: float) -> float:
+        """把事件时间戳换算成 perf_counter 时刻；合成事件没有时间戳时退回处理时刻"""
+        self.calibrate(event, now)
+        ts = event.timestamp() if event is not None else 0
+        if not ts or self._offset is None:
+            return now
+        t = ts / 1000.0 + self._offset
+        if now - t > MAX_LATENCY:
+            # 时间戳回绕或换了时钟源：丢弃旧偏移，这一次按处理时刻算
+            self._offset = now - ts / 1000.0
+            return now
+        return min(t, now)
+
+    # ---------- 标签 ----------
+    def _update_label(self):
+        self._set_text(f'{self.elapsed():.1f} s')
+
+    def _set_text(self, text: str):
+        if text != self._last_text:
+            self._last_text = text
+            self.show_text(text)